@@ -1,7 +1,12 @@
-from fastapi import Request
+from typing import Optional
+
+from fastapi import Header, HTTPException, Request
+from starlette.requests import HTTPConnection
 
 from app.services.analyzer import AudioAnalyzerService
+from app.services.jobs import JobService
 from app.services.metrics import MetricsService
+from app.services.profiler import ProfilerService
 from app.services.redis import RedisService
 
 
@@ -13,5 +18,22 @@ def get_audio_analyzer_service(request: Request) -> AudioAnalyzerService:
     return request.app.state.audio_analyzer_service
 
 
-def get_metrics_service(request: Request) -> MetricsService:
-    return request.app.state.metrics_service
+def get_metrics_service(connection: HTTPConnection) -> MetricsService:
+    return connection.app.state.metrics_service
+
+
+def get_job_service(request: Request) -> JobService:
+    return request.app.state.job_service
+
+
+def get_profiler_service(request: Request) -> ProfilerService:
+    return request.app.state.profiler_service
+
+
+def require_profiler(
+    request: Request, x_profile_token: Optional[str] = Header(None)
+) -> ProfilerService:
+    profiler = get_profiler_service(request)
+    if not profiler.authorize(x_profile_token):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return profiler
@@ -1,10 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import AsyncIterator, Dict, List, Optional
 
-from app.api.dependencies import get_audio_analyzer_service, get_metrics_service
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+
+from app.api.dependencies import (
+    get_audio_analyzer_service,
+    get_job_service,
+    get_metrics_service,
+    get_profiler_service,
+    require_profiler,
+)
 from app.config.logger import get_logger
-from app.schemas.audio import AudioAnalysisRequest, AudioAnalysisResponse
+from app.models.job import AnalysisJob
+from app.models.profile import ProfileReport
+from app.schemas.audio import (
+    AudioAnalysisRequest,
+    AudioAnalysisResponse,
+    AudioBatchItem,
+    AudioBatchRequest,
+    AudioJobRequest,
+    AudioJobResponse,
+    AudioStreamUpdate,
+)
 from app.services.analyzer import AudioAnalyzerService
+from app.services.jobs import JobService
 from app.services.metrics import MetricsService
+from app.services.profiler import ProfilerService
+from app.services.streaming import PCM_FORMATS, StreamingService
 
 logger = get_logger(__name__)
 api_router = APIRouter()
@@ -13,16 +46,26 @@ api_router = APIRouter()
 @api_router.post("/audio/analyze", response_model=AudioAnalysisResponse)
 async def analyze_audio(
     request: AudioAnalysisRequest,
+    response: Response,
+    x_profile_token: Optional[str] = Header(None),
     analyzer: AudioAnalyzerService = Depends(get_audio_analyzer_service),
     metrics: MetricsService = Depends(get_metrics_service),
+    profiler: ProfilerService = Depends(get_profiler_service),
 ) -> AudioAnalysisResponse:
     metrics.record_request()
 
     try:
         logger.info(f"Analyzing audio: {request.audio_url}")
+        url = str(request.audio_url)
 
         with metrics.processing_duration.time():
-            result = await analyzer.analyze_audio(str(request.audio_url))
+            if profiler.authorize(x_profile_token):
+                result, report = await profiler.profile(
+                    url, lambda: analyzer.analyze_fresh(url, timeline=request.timeline)
+                )
+                response.headers["X-Profile-Id"] = report.profile_id
+            else:
+                result = await analyzer.analyze_audio(url, timeline=request.timeline)
 
         logger.info("Analysis completed successfully")
         return AudioAnalysisResponse(status="success", data=result)
@@ -39,3 +82,176 @@ async def analyze_audio(
         metrics.record_error("internal")
         logger.error(f"Internal error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@api_router.post("/audio/analyze/batch", response_class=StreamingResponse)
+async def analyze_audio_batch(
+    request: AudioBatchRequest,
+    analyzer: AudioAnalyzerService = Depends(get_audio_analyzer_service),
+    metrics: MetricsService = Depends(get_metrics_service),
+) -> StreamingResponse:
+    metrics.record_request()
+    logger.info(f"Analyzing batch of {len(request.audio_urls)} audio URLs")
+
+    indices: Dict[str, List[int]] = {}
+    invalid: List[AudioBatchItem] = []
+    for index, audio_url in enumerate(request.audio_urls):
+        try:
+            url = str(AudioAnalysisRequest(audio_url=audio_url).audio_url)
+            indices.setdefault(url, []).append(index)
+        except ValidationError:
+            metrics.record_error("validation")
+            invalid.append(
+                AudioBatchItem(
+                    index=index, audio_url=audio_url, status="error", error="Invalid audio URL"
+                )
+            )
+
+    async def stream() -> AsyncIterator[str]:
+        for item in invalid:
+            yield item.model_dump_json() + "\n"
+
+        async for url, result, error in analyzer.analyze_batch(list(indices)):
+            detail = _batch_error(error, metrics) if error else None
+            for index in indices[url]:
+                item = AudioBatchItem(
+                    index=index,
+                    audio_url=request.audio_urls[index],
+                    status="error" if error else "success",
+                    data=result,
+                    error=detail,
+                )
+                yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@api_router.websocket("/audio/stream")
+async def stream_audio(
+    websocket: WebSocket,
+    sample_format: str = Query("s16le", alias="format"),
+    sample_rate: int = 22050,
+    channels: int = 1,
+    metrics: MetricsService = Depends(get_metrics_service),
+):
+    metrics.record_request()
+
+    if (
+        sample_format not in (*PCM_FORMATS, "encoded")
+        or not 8000 <= sample_rate <= 192000
+        or not 1 <= channels <= 8
+    ):
+        metrics.record_error("validation")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Unsupported stream")
+        return
+
+    await websocket.accept()
+    logger.info(f"Streaming {sample_format} audio at {sample_rate} Hz, {channels} channel(s)")
+
+    async def receive():
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("text") == "end":
+            return None
+        return message.get("bytes") or b""
+
+    async def send(update):
+        await websocket.send_text(AudioStreamUpdate(**update).model_dump_json())
+
+    try:
+        await StreamingService(sample_format, sample_rate, channels).run(receive, send)
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("Audio stream disconnected")
+    except Exception as e:
+        metrics.record_error("internal")
+        logger.error(f"Audio stream failed: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Internal server error")
+
+
+@api_router.post("/audio/jobs", response_model=AudioJobResponse, status_code=202)
+async def submit_audio_job(
+    request: AudioJobRequest,
+    jobs: JobService = Depends(get_job_service),
+    metrics: MetricsService = Depends(get_metrics_service),
+) -> AudioJobResponse:
+    metrics.record_request()
+
+    try:
+        callback_url = str(request.callback_url) if request.callback_url else None
+        job = await jobs.submit(str(request.audio_url), callback_url, timeline=request.timeline)
+    except ConnectionError as e:
+        metrics.record_error("unavailable")
+        logger.error(f"Job submission failed: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+    logger.info(f"Queued analysis job {job.job_id}: {request.audio_url}")
+    return _job_response(job)
+
+
+@api_router.get("/audio/jobs/{job_id}", response_model=AudioJobResponse)
+async def get_audio_job(job_id: str, jobs: JobService = Depends(get_job_service)):
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+@api_router.post("/admin/profile", response_model=ProfileReport)
+async def profile_audio(
+    request: AudioAnalysisRequest,
+    analyzer: AudioAnalyzerService = Depends(get_audio_analyzer_service),
+    profiler: ProfilerService = Depends(require_profiler),
+) -> ProfileReport:
+    url = str(request.audio_url)
+    logger.info(f"Profiling analysis of {url}")
+
+    try:
+        _, report = await profiler.profile(
+            url, lambda: analyzer.analyze_fresh(url, timeline=request.timeline)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    return report
+
+
+@api_router.get("/admin/profiles/{profile_id}", response_model=ProfileReport)
+async def get_profile(
+    profile_id: str,
+    collapsed: bool = False,
+    profiler: ProfilerService = Depends(require_profiler),
+):
+    report = await profiler.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if collapsed:
+        return PlainTextResponse(report.collapsed())
+    return report
+
+
+def _job_response(job: AnalysisJob) -> AudioJobResponse:
+    return AudioJobResponse(
+        job_id=job.job_id,
+        status=job.status.value,
+        audio_url=job.audio_url,
+        data=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+def _batch_error(error: Exception, metrics: MetricsService) -> str:
+    if isinstance(error, ValueError):
+        metrics.record_error("validation")
+        return str(error)
+    if isinstance(error, FileNotFoundError):
+        metrics.record_error("not_found")
+        return "Audio file not found"
+
+    metrics.record_error("internal")
+    logger.error(f"Internal error in batch item: {error}")
+    return "Internal server error"
@@ -22,6 +22,57 @@ class Settings(BaseSettings):
     CACHE_MAX_MEMORY: str
     CACHE_POLICY: str
 
+    LOCAL_CACHE_SIZE: int = 1024
+    LOCAL_CACHE_TTL: float = 60.0
+    CACHE_INVALIDATION_CHANNEL: str = "audio:invalidate"
+
+    ANALYSIS_WORKERS: int = 2
+    CLASSIFY_WINDOW: float = 30.0
+    CLASSIFY_EXCERPTS: int = 1
+    CLASSIFY_EXCERPT_DURATION: float = 10.0
+    TIMELINE_WINDOW: float = 1.0
+    TIMELINE_BLOCK_DURATION: float = 60.0
+    CLASSIFY_BATCH_WINDOW: float = 0.005
+    CLASSIFY_BATCH_SIZE: int = 16
+    CLASSIFY_BATCH_MIN_CHUNK: int = 4
+
+    STREAM_UPDATE_INTERVAL: float = 1.0
+    STREAM_TIME_CONSTANT: float = 3.0
+    STREAM_TEMPO_WINDOW: float = 8.0
+
+    BATCH_MAX_URLS: int = 1000
+    BATCH_CONCURRENCY: int = 8
+
+    JOB_STREAM: str = "audio:jobs"
+    JOB_GROUP: str = "analyzers"
+    JOB_STREAM_MAXLEN: int = 100000
+    JOB_TTL: int = 86400
+    JOB_CONCURRENCY: int = 4
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_CLAIM_IDLE: float = 120.0
+    JOB_BLOCK_TIMEOUT: float = 5.0
+    JOB_WEBHOOK_TIMEOUT: float = 10.0
+
+    SINGLEFLIGHT_LOCK_TTL: float = 30.0
+    SINGLEFLIGHT_WAIT_TIMEOUT: float = 300.0
+    SINGLEFLIGHT_POLL_INTERVAL: float = 0.2
+
+    DOWNLOAD_MAX_CONNECTIONS: int = 100
+    DOWNLOAD_MAX_KEEPALIVE: int = 20
+    DOWNLOAD_KEEPALIVE_EXPIRY: float = 30.0
+    DOWNLOAD_PER_HOST_LIMIT: int = 10
+    DOWNLOAD_HTTP2: bool = False
+    DOWNLOAD_CHUNK_SIZE: int = 65536
+    DOWNLOAD_MEMORY_THRESHOLD: int = 16 * 1024 * 1024
+
+    LOOP_MONITOR_INTERVAL: float = 0.5
+    LOOP_BLOCK_THRESHOLD: float = 0.0
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_INTERVAL: float = 0.005
+    PROFILING_TTL: int = 3600
+
     BASE_DIR: Path = BASE_DIR
     APP_DIR: Path = BASE_DIR / "app"
     LOG_DIR: Path = BASE_DIR / "app" / "logs"
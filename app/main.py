@@ -6,8 +6,14 @@ from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.api.v1.router import api_router
 from app.config.logger import get_logger, setup_logging
+from app.repository.cache import CacheRepository
 from app.services.analyzer import AudioAnalyzerService
+from app.services.downloader import DownloaderService
+from app.services.executor import ExecutorService
+from app.services.jobs import JobService
+from app.services.loop_monitor import LoopMonitorService
 from app.services.metrics import MetricsService
+from app.services.profiler import ProfilerService
 from app.services.redis import RedisService
 
 logger = get_logger(__name__)
@@ -26,15 +32,43 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Redis connection failed: {e}")
         logger.warning("Running without Redis cache")
 
+    metrics_service = MetricsService()
+    loop_monitor = LoopMonitorService(metrics_service)
+    await loop_monitor.start()
+
+    cache_repository = CacheRepository(redis_service, metrics_service)
+    await cache_repository.start()
+
+    executor_service = ExecutorService()
+    await executor_service.start()
+    logger.info(f"Analysis worker pool started with {executor_service.max_workers} workers")
+
+    downloader_service = DownloaderService()
+    await downloader_service.start()
+
     app.state.redis_service = redis_service
-    app.state.audio_analyzer_service = AudioAnalyzerService(redis_service)
-    app.state.metrics_service = MetricsService()
+    app.state.executor_service = executor_service
+    app.state.downloader_service = downloader_service
+    app.state.audio_analyzer_service = AudioAnalyzerService(
+        redis_service, executor_service, downloader_service, cache_repository, metrics_service
+    )
+    app.state.metrics_service = metrics_service
+    app.state.profiler_service = ProfilerService(redis_service)
+
+    job_service = JobService(redis_service)
+    if redis_service.is_connected():
+        await job_service.start()
+    app.state.job_service = job_service
 
     logger.info("Application startup completed")
     yield
 
     logger.info("Shutting down application")
+    await downloader_service.close()
+    await executor_service.close()
+    await cache_repository.close()
     await redis_service.close()
+    await loop_monitor.close()
 
 
 def create_app() -> FastAPI:
@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Optional
 
+import numpy as np
 from pydantic import BaseModel
 
 
@@ -19,11 +20,20 @@ class AudioClassification(str, Enum):
     NOISE = "noise"
 
 
+class ClassifierTier(str, Enum):
+    RMS = "rms"
+    FRAME = "frame"
+    TEMPO = "tempo"
+    HARMONIC = "harmonic"
+
+
 class DownloadMetadata(BaseModel):
     url: str
     content_type: str
     file_size: int
     temp_path: str
+    content_hash: Optional[str] = None
+    format: Optional[AudioFormat] = None
 
 
 class AudioFeatures(BaseModel):
@@ -35,6 +45,32 @@ class AudioFeatures(BaseModel):
     format: AudioFormat
 
 
+class AudioStream(BaseModel):
+    sample_rate: int
+    channels: int
+    bit_depth: Optional[int] = None
+    frames: int
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+
+class DecodedAudio(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+
+    stream: AudioStream
+    samples: np.ndarray
+
+
 class ClassificationResult(BaseModel):
     classification: AudioClassification
     confidence: float
+    tier: Optional[ClassifierTier] = None
+
+
+class TimelineSegment(BaseModel):
+    start: float
+    end: float
+    classification: AudioClassification
+    confidence: float
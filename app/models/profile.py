@@ -0,0 +1,15 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class ProfileReport(BaseModel):
+    profile_id: str
+    audio_url: str
+    duration: float
+    samples: int
+    peak_memory: int
+    stacks: Dict[str, int]
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
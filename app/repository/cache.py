@@ -1,32 +1,191 @@
+import asyncio
 import hashlib
 import json
-from typing import Any, Dict, Optional
+import uuid
+from typing import Any, Dict, List, Optional
 
+from app.config.base import settings
+from app.config.logger import get_logger
+from app.repository.local_cache import LocalCache
+from app.services.metrics import MetricsService
 from app.services.redis import RedisService
 
+logger = get_logger(__name__)
+
 
 class CacheRepository:
-    def __init__(self, redis_service: RedisService):
+    def __init__(self, redis_service: RedisService, metrics: Optional[MetricsService] = None):
         self.redis = redis_service
+        self.local = LocalCache(settings.LOCAL_CACHE_SIZE, settings.LOCAL_CACHE_TTL, metrics)
+        self.node_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._fills: Dict[str, List[int]] = {}
 
     def generate_key(self, url: str) -> str:
         hash_value = hashlib.sha256(url.encode()).hexdigest()[:16]
         return f"audio:{hash_value}"
 
+    def generate_content_key(self, content_hash: str) -> str:
+        return f"audio:content:{content_hash[:32]}"
+
+    async def start(self):
+        if self._listener is None and settings.LOCAL_CACHE_SIZE > 0:
+            self._listener = asyncio.create_task(self._listen_invalidations())
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
     async def get(self, url: str) -> Optional[Dict[str, Any]]:
-        if not self.redis.is_connected():
-            return None
+        data = await self._get_key(self.generate_key(url))
+        if data and "ref" in data:
+            return await self._get_key(data["ref"])
+        return data
 
-        key = self.generate_key(url)
-        data = await self.redis.get(key)
-        return json.loads(data) if data else None
+    async def get_many(self, urls: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        entries = await self._get_keys([self.generate_key(url) for url in urls])
+        refs = await self._get_keys([entry["ref"] for entry in entries if entry and "ref" in entry])
+
+        results = {}
+        for url, entry in zip(urls, entries):
+            if entry and "ref" in entry:
+                entry = refs.pop(0)
+            results[url] = entry
+        return results
+
+    async def _get_keys(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if not self.redis.is_connected() or not keys:
+            return [None] * len(keys)
+
+        results = [self.local.get(key) for key in keys]
+        missing = [key for key, result in zip(keys, results) if result is None]
+        if not missing:
+            return results
+
+        generations = [self._begin_fill(key) for key in missing]
+        try:
+            entries = await self.redis.mget_with_ttl(missing)
+        finally:
+            current = [self._end_fill(key) for key in missing]
+
+        fetched = {}
+        for key, (data, ttl), before, after in zip(missing, entries, generations, current):
+            if not data:
+                continue
+            fetched[key] = json.loads(data)
+            if before == after and (ttl is None or ttl > 0):
+                self.local.set(key, fetched[key], ttl)
+
+        return [
+            fetched.get(key) if result is None else result for key, result in zip(keys, results)
+        ]
+
+    async def get_content(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        return await self._get_key(self.generate_content_key(content_hash))
+
+    async def _get_key(self, key: str) -> Optional[Dict[str, Any]]:
+        return (await self._get_keys([key]))[0]
+
+    def _begin_fill(self, key: str) -> int:
+        fill = self._fills.setdefault(key, [0, 0])
+        fill[0] += 1
+        return fill[1]
 
-    async def set(self, url: str, data: Dict[str, Any], ttl: int = 3600) -> bool:
+    def _end_fill(self, key: str) -> int:
+        fill = self._fills[key]
+        fill[0] -= 1
+        if fill[0] == 0:
+            del self._fills[key]
+        return fill[1]
+
+    def _discard_fills(self, key: str):
+        if key in self._fills:
+            self._fills[key][1] += 1
+
+    def _invalidate_local(self, key: str):
+        self.local.invalidate(key)
+        self._discard_fills(key)
+
+    def _clear_local(self):
+        self.local.clear()
+        for fill in self._fills.values():
+            fill[1] += 1
+
+    async def set(
+        self,
+        url: str,
+        data: Dict[str, Any],
+        ttl: int = 3600,
+        content_hash: Optional[str] = None,
+    ) -> bool:
+        if content_hash is None:
+            return await self._set_key(self.generate_key(url), data, ttl)
+
+        if not await self._set_key(self.generate_content_key(content_hash), data, ttl):
+            return False
+        return await self.link(url, content_hash, ttl)
+
+    async def link(self, url: str, content_hash: str, ttl: int = 3600) -> bool:
+        return await self._set_key(
+            self.generate_key(url), {"ref": self.generate_content_key(content_hash)}, ttl
+        )
+
+    async def _set_key(self, key: str, data: Dict[str, Any], ttl: int) -> bool:
         if not self.redis.is_connected():
             return False
 
         try:
-            key = self.generate_key(url)
-            return await self.redis.setex(key, ttl, json.dumps(data))
+            stored = await self.redis.setex(key, ttl, json.dumps(data))
+            if stored:
+                self.local.set(key, data, ttl)
+                self._discard_fills(key)
+                await self._publish_invalidation(key)
+            return stored
         except Exception:
             return False
+
+    async def invalidate(self, url: str) -> bool:
+        key = self.generate_key(url)
+        deleted = await self.redis.delete(key)
+        self._invalidate_local(key)
+        await self._publish_invalidation(key)
+        return deleted
+
+    async def _publish_invalidation(self, key: str):
+        await self.redis.publish(settings.CACHE_INVALIDATION_CHANNEL, f"{self.node_id}:{key}")
+
+    async def _listen_invalidations(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = await self.redis.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                if pubsub is None:
+                    await asyncio.sleep(5)
+                    continue
+
+                self._clear_local()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._handle_invalidation(message["data"])
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener failed: {e}")
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    def _handle_invalidation(self, message: str):
+        node_id, _, key = message.partition(":")
+        if node_id != self.node_id:
+            self._invalidate_local(key)
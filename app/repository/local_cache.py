@@ -0,0 +1,58 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.metrics import MetricsService
+
+
+class LocalCache:
+    def __init__(self, max_size: int, ttl: float, metrics: Optional[MetricsService] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.metrics = metrics or MetricsService()
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.metrics.record_local_cache(hit=False)
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._evict(key, "expired")
+            self.metrics.record_local_cache(hit=False)
+            return None
+
+        self._entries.move_to_end(key)
+        self.metrics.record_local_cache(hit=True)
+        return dict(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        if self.max_size <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, dict(value))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._evict(next(iter(self._entries)), "capacity")
+
+        self.metrics.local_cache_size.set(len(self._entries))
+
+    def invalidate(self, key: str):
+        if key in self._entries:
+            self._evict(key, "invalidated")
+
+    def clear(self):
+        self._entries.clear()
+        self.metrics.local_cache_size.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, key: str, reason: str):
+        del self._entries[key]
+        self.metrics.record_local_cache_eviction(reason)
+        self.metrics.local_cache_size.set(len(self._entries))
@@ -1,10 +1,14 @@
-from typing import Literal, Optional
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, HttpUrl, field_validator
 
+from app.config.base import settings
+
 
 class AudioAnalysisRequest(BaseModel):
     audio_url: HttpUrl
+    timeline: bool = False
 
     @field_validator("audio_url")
     @classmethod
@@ -16,6 +20,13 @@ class AudioAnalysisRequest(BaseModel):
         return v
 
 
+class AudioTimelineSegment(BaseModel):
+    start: float
+    end: float
+    classification: Literal["speech", "music", "silence", "noise"]
+    confidence: float = Field(ge=0.0, le=1.0)
+
+
 class AudioAnalysisData(BaseModel):
     duration: float
     sample_rate: int
@@ -25,8 +36,58 @@ class AudioAnalysisData(BaseModel):
     format: Optional[str] = None
     classification: Literal["speech", "music", "silence", "noise"]
     confidence: float = Field(ge=0.0, le=1.0)
+    timeline: Optional[List[AudioTimelineSegment]] = None
+
+    @field_validator("timeline", mode="before")
+    @classmethod
+    def expand_timeline(cls, v):
+        if v is None:
+            return v
+        fields = ["start", "end", "classification", "confidence"]
+        return [dict(zip(fields, row)) if isinstance(row, list) else row for row in v]
 
 
 class AudioAnalysisResponse(BaseModel):
     status: Literal["success", "error"]
     data: Optional[AudioAnalysisData] = None
+
+
+class AudioBatchRequest(BaseModel):
+    audio_urls: List[str] = Field(min_length=1)
+
+    @field_validator("audio_urls")
+    @classmethod
+    def validate_batch_size(cls, v):
+        if len(v) > settings.BATCH_MAX_URLS:
+            raise ValueError(f"At most {settings.BATCH_MAX_URLS} URLs per batch")
+        return v
+
+
+class AudioBatchItem(BaseModel):
+    index: int
+    audio_url: str
+    status: Literal["success", "error"]
+    data: Optional[AudioAnalysisData] = None
+    error: Optional[str] = None
+
+
+class AudioJobRequest(AudioAnalysisRequest):
+    callback_url: Optional[HttpUrl] = None
+
+
+class AudioJobResponse(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    audio_url: str
+    data: Optional[AudioAnalysisData] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class AudioStreamUpdate(BaseModel):
+    time: float
+    classification: Literal["speech", "music", "silence", "noise"]
+    confidence: float = Field(ge=0.0, le=1.0)
+    features: Dict[str, float]
+    final: bool = False
@@ -1,35 +1,159 @@
-import os
-from typing import Any, Dict
-
-import librosa
-from pydub import AudioSegment
+import asyncio
+import time
+from collections import defaultdict
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from app.config.base import settings
-from app.models.audio import AudioFeatures, AudioFormat
+from app.models.audio import (
+    AudioFeatures,
+    AudioFormat,
+    AudioStream,
+    ClassificationResult,
+    DownloadMetadata,
+    TimelineSegment,
+)
 from app.repository.cache import CacheRepository
-from app.services.classifier import ClassifierService
+from app.services import tasks
+from app.services.batcher import ClassifyBatcher
 from app.services.downloader import DownloaderService
+from app.services.executor import ExecutorService
+from app.services.metrics import MetricsService
+from app.services.probe import ProbeService
 from app.services.redis import RedisService
+from app.services.shared import Pcm
+from app.services.singleflight import SingleFlightService
 
 
 class AudioAnalyzerService:
-    def __init__(self, redis_service: RedisService):
-        self.cache = CacheRepository(redis_service)
-        self.downloader = DownloaderService()
-        self.classifier = ClassifierService()
+    def __init__(
+        self,
+        redis_service: RedisService,
+        executor: Optional[ExecutorService] = None,
+        downloader: Optional[DownloaderService] = None,
+        cache: Optional[CacheRepository] = None,
+        metrics: Optional[MetricsService] = None,
+    ):
+        self.cache = cache or CacheRepository(redis_service)
+        self.downloader = downloader or DownloaderService()
+        self.executor = executor or ExecutorService(max_workers=0)
+        self.singleflight = SingleFlightService(redis_service)
+        self.probe = ProbeService()
+        self.metrics = metrics or MetricsService()
+        self.batcher = ClassifyBatcher(self.executor, self.metrics)
 
-    async def analyze_audio(self, url: str) -> Dict[str, Any]:
-        cached = await self.cache.get(url)
+    async def analyze_audio(self, url: str, timeline: bool = False) -> Dict[str, Any]:
+        with self.metrics.time_stage("cache_lookup"):
+            cached = await self._get_cached(url, timeline)
+        self.metrics.record_cache("url", bool(cached))
         if cached:
-            return cached
+            return self.view(cached, timeline)
+        return await self._analyze_shared(url, timeline)
+
+    async def _analyze_shared(self, url: str, timeline: bool = False) -> Dict[str, Any]:
+        key = self.cache.generate_key(url)
+        result = await self.singleflight.do(
+            f"{key}:timeline" if timeline else key,
+            lambda: self._analyze(url, timeline),
+            lambda: self._get_cached(url, timeline),
+        )
+        return self.view(result, timeline)
+
+    async def analyze_batch(
+        self, urls: List[str]
+    ) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+        unique_urls = list(dict.fromkeys(urls))
+        with self.metrics.time_stage("cache_lookup"):
+            cached = await self.cache.get_many(unique_urls)
+        for url in unique_urls:
+            self.metrics.record_cache("url", bool(cached[url]))
+
+        for url in unique_urls:
+            if cached[url]:
+                yield url, self.view(cached[url], False), None
+
+        semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+        async def run(url: str):
+            async with semaphore:
+                try:
+                    return url, await self._analyze_shared(url), None
+                except Exception as e:
+                    return url, None, e
+
+        pending = [asyncio.create_task(run(url)) for url in unique_urls if not cached[url]]
+        try:
+            for next_result in asyncio.as_completed(pending):
+                yield await next_result
+        finally:
+            for task in pending:
+                task.cancel()
 
+    async def _get_cached(self, url: str, timeline: bool) -> Optional[Dict[str, Any]]:
+        cached = await self.cache.get(url)
+        return cached if self.covers(cached, timeline) else None
+
+    def covers(self, result: Optional[Dict[str, Any]], timeline: bool) -> bool:
+        return bool(result) and (not timeline or "timeline" in result)
+
+    def view(self, result: Dict[str, Any], timeline: bool) -> Dict[str, Any]:
+        if timeline or "timeline" not in result:
+            return result
+        return {key: value for key, value in result.items() if key != "timeline"}
+
+    async def analyze_fresh(self, url: str, timeline: bool = False) -> Dict[str, Any]:
+        return await self._analyze(url, timeline)
+
+    async def _analyze(self, url: str, timeline: bool = False) -> Dict[str, Any]:
+        with self.metrics.track_in_flight("analysis"):
+            return await self._run_analysis(url, timeline)
+
+    async def _run_analysis(self, url: str, timeline: bool) -> Dict[str, Any]:
         temp_path = None
         try:
-            metadata = await self.downloader.download(url)
+            metadata = await self.download(url)
             temp_path = metadata.temp_path
 
-            features = await self.extract_features(temp_path, metadata)
-            classification = await self.classifier.classify(temp_path)
+            if metadata.content_hash:
+                with self.metrics.time_stage("cache_lookup"):
+                    cached = await self.cache.get_content(metadata.content_hash)
+                self.metrics.record_cache("content", self.covers(cached, timeline))
+                if self.covers(cached, timeline):
+                    await self.cache.link(url, metadata.content_hash, settings.CACHE_TTL)
+                    return cached
+
+            metadata.format = self.detect_format(metadata)
+            with self.metrics.time_stage("probe"):
+                probed = self.probe.probe(temp_path) or await asyncio.to_thread(
+                    self.probe.inspect, temp_path
+                )
+            if probed:
+                self.check_duration(probed)
+
+            excerpts = self.excerpts(probed.duration) if probed else [(0.0, None)]
+            analysis = asyncio.gather(
+                *(
+                    self.analyze_excerpt(temp_path, offset, duration, metadata.format)
+                    for offset, duration in excerpts
+                )
+            )
+            if timeline:
+                analyzed, segments = await asyncio.gather(
+                    analysis, self.timeline(temp_path, metadata.format)
+                )
+            else:
+                analyzed, segments = await analysis, []
+
+            decoded = analyzed[0][0]
+            if probed:
+                stream = probed.model_copy(
+                    update={"bit_depth": probed.bit_depth or decoded.bit_depth}
+                )
+            else:
+                stream = decoded
+
+            features = self.extract_features(stream, metadata)
+            classification = self.aggregate([result for _, result in analyzed])
 
             result = {
                 "duration": features.duration,
@@ -41,58 +165,109 @@ class AudioAnalyzerService:
                 "classification": classification.classification.value,
                 "confidence": classification.confidence,
             }
+            if timeline:
+                result["timeline"] = [
+                    [segment.start, segment.end, segment.classification.value, segment.confidence]
+                    for segment in segments
+                ]
 
-            await self.cache.set(url, result, settings.CACHE_TTL)
+            with self.metrics.time_stage("cache_store"):
+                await self.cache.set(
+                    url, result, settings.CACHE_TTL, content_hash=metadata.content_hash
+                )
             return result
 
         finally:
             if temp_path:
-                self.downloader.cleanup(temp_path)
+                self.executor.after_pending(partial(self.downloader.cleanup, temp_path))
+
+    def excerpts(self, duration: float) -> List[Tuple[float, Optional[float]]]:
+        count = settings.CLASSIFY_EXCERPTS
+        length = settings.CLASSIFY_EXCERPT_DURATION
+        if count <= 1 or duration <= max(settings.CLASSIFY_WINDOW, count * length):
+            return [(0.0, settings.CLASSIFY_WINDOW)]
 
-    async def extract_features(self, file_path: str, metadata) -> AudioFeatures:
+        return [(max(0.0, (i + 0.5) * duration / count - length / 2), length) for i in range(count)]
+
+    async def analyze_excerpt(
+        self,
+        file_path: str,
+        offset: float,
+        duration: Optional[float],
+        audio_format: Optional[AudioFormat] = None,
+    ) -> Tuple[AudioStream, ClassificationResult]:
+        stream, pcm = await self.decode(file_path, duration, offset, audio_format)
         try:
-            audio = AudioSegment.from_file(file_path)
-
-            duration = len(audio) / 1000.0
-            if duration > settings.MAX_DURATION:
-                raise ValueError(f"Audio too long: {duration}s")
-
-            return AudioFeatures(
-                duration=duration,
-                sample_rate=audio.frame_rate,
-                channels=audio.channels,
-                bit_depth=audio.sample_width * 8 if audio.sample_width else None,
-                file_size=metadata.file_size,
-                format=self._detect_format(file_path, metadata.content_type),
+            return stream, await self.classify(stream, pcm)
+        finally:
+            pcm.unlink()
+
+    def aggregate(self, results: List[ClassificationResult]) -> ClassificationResult:
+        if len(results) == 1:
+            return results[0]
+
+        scores = defaultdict(float)
+        for result in results:
+            scores[result.classification] += result.confidence
+
+        classification = max(scores, key=scores.get)
+        return ClassificationResult(
+            classification=classification, confidence=scores[classification] / len(results)
+        )
+
+    async def decode(
+        self,
+        file_path: str,
+        duration: Optional[float] = None,
+        offset: float = 0.0,
+        audio_format: Optional[AudioFormat] = None,
+    ) -> Tuple[AudioStream, Pcm]:
+        start = time.perf_counter()
+        with self.metrics.time_stage("decode"):
+            stream, pcm = await self.executor.run(
+                tasks.decode, file_path, duration, offset, audio_format
             )
+        self.metrics.record_decode(stream.frames, time.perf_counter() - start)
+        return stream, pcm
+
+    async def download(self, url: str) -> DownloadMetadata:
+        start = time.perf_counter()
+        with self.metrics.track_in_flight("download"), self.metrics.time_stage("download"):
+            metadata = await self.downloader.download(url)
+        self.metrics.record_download(metadata.file_size, time.perf_counter() - start)
+        return metadata
 
-        except Exception:
-            try:
-                y, sr = librosa.load(file_path, sr=None)
-                duration = len(y) / sr
+    async def classify(self, stream: AudioStream, pcm: Pcm) -> ClassificationResult:
+        with self.metrics.time_stage("classify"):
+            result = await self.batcher.classify(stream, pcm)
+        if result.tier:
+            self.metrics.record_classifier_tier(result.tier.value)
+        return result
 
-                if duration > settings.MAX_DURATION:
-                    raise ValueError(f"Audio too long: {duration}s")
+    def check_duration(self, stream: AudioStream):
+        if stream.duration > settings.MAX_DURATION:
+            raise ValueError(f"Audio too long: {stream.duration}s")
 
-                return AudioFeatures(
-                    duration=duration,
-                    sample_rate=sr,
-                    channels=1,
-                    file_size=metadata.file_size,
-                    format=self.detect_format(file_path, metadata.content_type),
-                )
-            except Exception as e:
-                raise ValueError(f"Cannot process audio file: {str(e)}")
+    async def timeline(
+        self, file_path: str, audio_format: Optional[AudioFormat] = None
+    ) -> List[TimelineSegment]:
+        with self.metrics.time_stage("timeline"):
+            return await self.executor.run(tasks.timeline, file_path, audio_format)
 
-    def detect_format(self, file_path: str, content_type: str) -> AudioFormat:
-        ext = os.path.splitext(file_path)[1].lower()
+    def extract_features(self, stream: AudioStream, metadata: DownloadMetadata) -> AudioFeatures:
+        self.check_duration(stream)
 
-        ext_map = {
-            ".mp3": AudioFormat.MP3,
-            ".wav": AudioFormat.WAV,
-            ".ogg": AudioFormat.OGG,
-            ".m4a": AudioFormat.M4A,
-            ".flac": AudioFormat.FLAC,
-        }
+        return AudioFeatures(
+            duration=stream.duration,
+            sample_rate=stream.sample_rate,
+            channels=stream.channels,
+            bit_depth=stream.bit_depth,
+            file_size=metadata.file_size,
+            format=self.detect_format(metadata),
+        )
 
-        return ext_map.get(ext, AudioFormat.MP3)
+    def detect_format(self, metadata: DownloadMetadata) -> AudioFormat:
+        audio_format = metadata.format or self.probe.sniff(metadata.temp_path)
+        if audio_format is None:
+            raise ValueError(f"Unsupported audio format: {metadata.content_type or 'unknown'}")
+        return audio_format
@@ -0,0 +1,94 @@
+import asyncio
+import math
+from typing import List, Optional, Tuple
+
+from app.config.base import settings
+from app.models.audio import AudioStream, ClassificationResult
+from app.services import tasks
+from app.services.executor import ExecutorService
+from app.services.metrics import MetricsService
+from app.services.profiler import current_session
+from app.services.shared import Pcm
+
+
+class ClassifyBatcher:
+    def __init__(
+        self,
+        executor: ExecutorService,
+        metrics: Optional[MetricsService] = None,
+        window: float = settings.CLASSIFY_BATCH_WINDOW,
+        max_size: int = settings.CLASSIFY_BATCH_SIZE,
+        min_chunk: int = settings.CLASSIFY_BATCH_MIN_CHUNK,
+    ):
+        self.executor = executor
+        self.metrics = metrics
+        self.window = window
+        self.max_size = max_size
+        self.min_chunk = min_chunk
+        self._pending: List[Tuple[AudioStream, Pcm, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def classify(self, stream: AudioStream, pcm: Pcm) -> ClassificationResult:
+        if self.window <= 0 or self.max_size <= 1 or current_session() is not None:
+            return await self.executor.run(tasks.classify, stream, pcm)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((stream, pcm, future, loop.time()))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[AudioStream, Pcm, asyncio.Future, float]]):
+        batch = [entry for entry in batch if not entry[2].done()]
+        if not batch:
+            return
+
+        now = asyncio.get_running_loop().time()
+        if self.metrics:
+            self.metrics.record_classify_batch(
+                len(batch), [now - queued_at for _, _, _, queued_at in batch]
+            )
+
+        count = max(1, min(self.executor.max_workers, len(batch) // max(1, self.min_chunk)))
+        size = math.ceil(len(batch) / count)
+        bounds = range(0, len(batch) + size, size)
+        chunks = [batch[start:stop] for start, stop in zip(bounds, bounds[1:])]
+        await asyncio.gather(*(self._dispatch(chunk) for chunk in chunks))
+
+    async def _dispatch(self, batch: List[Tuple[AudioStream, Pcm, asyncio.Future, float]]):
+        try:
+            results = await self.executor.run(
+                tasks.classify_batch,
+                [stream for stream, _, _, _ in batch],
+                [pcm for _, pcm, _, _ in batch],
+            )
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if result is None:
+                future.set_exception(RuntimeError("Decoded audio is no longer available"))
+            else:
+                future.set_result(result)
@@ -1,70 +1,334 @@
+import math
+from functools import cached_property
+from itertools import product
+from typing import Callable, List, Optional
+
 import librosa
 import numpy as np
 
-from app.models.audio import AudioClassification, ClassificationResult
+from app.config.base import settings
+from app.models.audio import (
+    AudioClassification,
+    ClassificationResult,
+    ClassifierTier,
+    DecodedAudio,
+    TimelineSegment,
+)
+
+TIERS = [
+    (ClassifierTier.FRAME, ("zcr", "spectral_centroid")),
+    (ClassifierTier.TEMPO, ("tempo",)),
+    (ClassifierTier.HARMONIC, ("harmonic_ratio",)),
+]
+
+FEATURE_EXTREMES = {
+    "zcr": (0.0, 0.1),
+    "spectral_centroid": (0.0, 4000.0),
+    "tempo": (0.0, 120.0),
+    "harmonic_ratio": (0.0, 1.0),
+}
+
+TIMELINE_MARGIN = 5.0
+
+
+class FeatureGraph:
+    def __init__(self, y: np.ndarray, sr: int, n_fft: int = 2048, hop_length: int = 512):
+        self.y = y
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+
+    def select(self, rows: List[int]) -> "FeatureGraph":
+        graph = FeatureGraph(self.y[rows], self.sr, self.n_fft, self.hop_length)
+        for name in ("stft", "magnitude", "centroid", "onset_envelope"):
+            if name in self.__dict__:
+                graph.__dict__[name] = self.__dict__[name][rows]
+        return graph
+
+    @cached_property
+    def stft(self) -> np.ndarray:
+        return librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop_length)
+
+    @cached_property
+    def magnitude(self) -> np.ndarray:
+        return np.abs(self.stft)
+
+    @cached_property
+    def centroid(self) -> np.ndarray:
+        return librosa.feature.spectral_centroid(
+            S=self.magnitude, sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length
+        )
+
+    @cached_property
+    def onset_envelope(self) -> np.ndarray:
+        mel = librosa.feature.melspectrogram(S=self.magnitude**2, sr=self.sr, n_fft=self.n_fft)
+        db = 10.0 * np.log10(np.maximum(1e-10, mel))
+        db = np.maximum(db, db.max(axis=(-2, -1), keepdims=True) - 80.0)
+        return librosa.onset.onset_strength(
+            S=db, sr=self.sr, hop_length=self.hop_length, aggregate=np.median
+        )
+
+    @cached_property
+    def harmonic_mask(self) -> np.ndarray:
+        mask, _ = librosa.decompose.hpss(self.magnitude, mask=True)
+        return mask
+
+    @cached_property
+    def harmonic(self) -> np.ndarray:
+        return librosa.istft(
+            self.stft * self.harmonic_mask,
+            n_fft=self.n_fft,
+            hop_length=self.hop_length,
+            length=self.y.shape[-1],
+        )
+
+    @cached_property
+    def rms(self) -> np.ndarray:
+        return np.sqrt(np.mean(self.y**2, axis=-1))
+
+    @cached_property
+    def zcr(self) -> np.ndarray:
+        return np.mean(librosa.feature.zero_crossing_rate(self.y), axis=(-2, -1))
+
+    @cached_property
+    def spectral_centroid(self) -> np.ndarray:
+        return np.mean(self.centroid, axis=(-2, -1))
+
+    @cached_property
+    def tempo(self) -> np.ndarray:
+        envelope = self.onset_envelope
+        try:
+            tempo, _ = librosa.beat.beat_track(
+                onset_envelope=envelope, sr=self.sr, hop_length=self.hop_length, sparse=False
+            )
+            tempo = np.reshape(tempo, envelope.shape[:-1])
+        except Exception:
+            tempo = np.zeros(envelope.shape[:-1])
+        return np.where(envelope.any(axis=-1), tempo, 0.0)
+
+    @cached_property
+    def harmonic_ratio(self) -> np.ndarray:
+        return np.sum(self.harmonic**2, axis=-1) / (np.sum(self.y**2, axis=-1) + 1e-8)
 
 
 class ClassifierService:
     def __init__(self):
         self.sr = 22050
+        self.duration = settings.CLASSIFY_WINDOW
 
-    async def classify(self, file_path: str) -> ClassificationResult:
-        try:
-            y, sr = librosa.load(file_path, sr=self.sr, duration=30.0)
-            features = self.extract_features(y, sr)
-            classification, confidence = self.classify_features(features)
+    def classify(self, audio: DecodedAudio) -> ClassificationResult:
+        return self.classify_batch([audio])[0]
 
-            return ClassificationResult(
-                classification=AudioClassification(classification), confidence=confidence
-            )
-        except Exception:
-            return ClassificationResult(classification=AudioClassification.NOISE, confidence=0.5)
+    def classify_batch(self, audios: List[DecodedAudio]) -> List[ClassificationResult]:
+        results: List[Optional[ClassificationResult]] = [None] * len(audios)
+        groups = {}
+
+        for index, audio in enumerate(audios):
+            try:
+                window = self.truncate(audio)
+                features = {"rms": float(np.sqrt(np.mean(window**2)))}
+                decision = self.resolve(features)
+                if decision:
+                    results[index] = self._result(decision, ClassifierTier.RMS)
+                    continue
+
+                y = self.resample(window, audio.stream.sample_rate)
+                groups.setdefault(len(y), []).append((index, features, y))
+            except Exception:
+                results[index] = self._fallback()
+
+        for group in groups.values():
+            try:
+                self._classify_group(group, results)
+            except Exception:
+                for index, _, _ in group:
+                    results[index] = results[index] or self._fallback()
+
+        return results
+
+    def _classify_group(self, group: list, results: List[Optional[ClassificationResult]]):
+        graph = FeatureGraph(np.stack([y for _, _, y in group]), self.sr)
+
+        for tier, names in TIERS:
+            values = {name: getattr(graph, name) for name in names}
+            remaining = []
+            for row, (index, features, y) in enumerate(group):
+                features.update({name: float(value[row]) for name, value in values.items()})
+                decision = self.resolve(features)
+                if decision:
+                    results[index] = self._result(decision, tier)
+                else:
+                    remaining.append(row)
+
+            if not remaining:
+                return
+            if len(remaining) < len(group):
+                group = [group[row] for row in remaining]
+                graph = graph.select(remaining)
+
+    def _result(self, decision: tuple[str, float], tier: ClassifierTier) -> ClassificationResult:
+        classification, confidence = decision
+        return ClassificationResult(
+            classification=AudioClassification(classification), confidence=confidence, tier=tier
+        )
+
+    def _fallback(self) -> ClassificationResult:
+        return ClassificationResult(classification=AudioClassification.NOISE, confidence=0.5)
+
+    def prepare(self, audio: DecodedAudio) -> np.ndarray:
+        return self.resample(self.truncate(audio), audio.stream.sample_rate)
+
+    def truncate(self, audio: DecodedAudio) -> np.ndarray:
+        return self.mono(audio.samples[: int(self.duration * audio.stream.sample_rate)])
+
+    def mono(self, samples: np.ndarray) -> np.ndarray:
+        kind, size = samples.dtype.kind, samples.dtype.itemsize
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1, dtype=np.float32)
+        else:
+            samples = samples.astype(np.float32, copy=False)
+
+        if kind == "u":
+            return samples / 128 - 1
+        if kind == "i":
+            return samples / float(1 << (8 * size - 1))
+        return samples
+
+    def resample(self, y: np.ndarray, sr: int) -> np.ndarray:
+        if sr != self.sr:
+            y = librosa.resample(y, orig_sr=sr, target_sr=self.sr)
+        return y
 
     def extract_features(self, y: np.ndarray, sr: int) -> dict:
-        features = {}
+        graph = FeatureGraph(y, sr)
+        return {name: float(getattr(graph, name)) for name in ["rms", *FEATURE_EXTREMES]}
 
-        features["rms"] = float(np.sqrt(np.mean(y**2)))
-        features["zcr"] = float(np.mean(librosa.feature.zero_crossing_rate(y)))
+    def resolve(self, features: dict) -> Optional[tuple[str, float]]:
+        missing = [name for name in FEATURE_EXTREMES if name not in features]
+        combinations = np.array(list(product(*(FEATURE_EXTREMES[name] for name in missing))))
+        candidates = {name: np.full(len(combinations), value) for name, value in features.items()}
+        candidates.update({name: combinations[:, i] for i, name in enumerate(missing)})
 
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)
-        features["spectral_centroid"] = float(np.mean(spectral_centroids))
+        labels, confidences = self.classify_frames(candidates)
+        outcomes = set(zip(labels.tolist(), confidences.tolist()))
+        return outcomes.pop() if len(outcomes) == 1 else None
 
-        try:
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-            features["tempo"] = float(tempo)
-        except Exception:
-            features["tempo"] = 0.0
+    def timeline(self, audio: DecodedAudio, window: float) -> List[TimelineSegment]:
+        sr = audio.stream.sample_rate
 
-        y_harmonic, y_percussive = librosa.effects.hpss(y)
-        features["harmonic_ratio"] = float(np.sum(y_harmonic**2) / (np.sum(y**2) + 1e-8))
+        def read(offset: float, duration: float) -> DecodedAudio:
+            start, stop = int(offset * sr), int((offset + duration) * sr)
+            return DecodedAudio(stream=audio.stream, samples=audio.samples[start:stop])
 
-        return features
+        return self.timeline_blocks(read, window)
 
-    def classify_features(self, features: dict) -> tuple[str, float]:
-        if features["rms"] < 0.01:
-            return AudioClassification.SILENCE.value, 0.95
+    def timeline_blocks(
+        self, read: Callable[[float, float], DecodedAudio], window: float
+    ) -> List[TimelineSegment]:
+        per_block = max(1, round(settings.TIMELINE_BLOCK_DURATION / window))
 
-        if features["rms"] < 0.02:
-            return AudioClassification.NOISE.value, 0.75
+        features, first = {}, 0
+        while True:
+            offset = max(0.0, first * window - TIMELINE_MARGIN)
+            block = read(offset, (first + per_block) * window + TIMELINE_MARGIN - offset)
+            sr = block.stream.sample_rate
+            start = int(offset * sr)
+            duration = (start + len(block.samples)) / sr
+            last = min(first + per_block, max(1, math.ceil(duration / window)))
+            if last <= first:
+                break
 
-        music_score = 0.0
-        speech_score = 0.0
+            y = self.resample(self.mono(block.samples), sr)
+            times, frames = self.timeline_frames(y, start / sr)
+            index = np.floor(times / window)
+            bounds = np.searchsorted(index, np.arange(first, last + 1))
 
-        if features["tempo"] > 60:
-            music_score += 0.3
+            for name, values in frames.items():
+                features.setdefault(name, []).extend(
+                    np.median(values[lo:hi]) if hi > lo else np.nan
+                    for lo, hi in zip(bounds[:-1], bounds[1:])
+                )
+            if last < first + per_block:
+                break
+            first = last
 
-        if features["harmonic_ratio"] > 0.6:
-            music_score += 0.3
+        windows = len(features["rms"])
+        labels, confidences = self.classify_frames(features)
 
-        if 0.05 < features["zcr"] < 0.2:
-            speech_score += 0.4
+        changes = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+        bounds = np.concatenate(([0], changes, [len(labels)]))
+        segment_confidences = np.add.reduceat(confidences, bounds[:-1]) / np.diff(bounds)
+        edges = np.append(np.arange(windows) * window, duration)[bounds]
 
-        if features["spectral_centroid"] < 2000:
-            speech_score += 0.2
+        return [
+            TimelineSegment(
+                start=round(float(start), 3),
+                end=round(float(end), 3),
+                classification=AudioClassification(label),
+                confidence=round(float(confidence), 3),
+            )
+            for start, end, label, confidence in zip(
+                edges[:-1], edges[1:], labels[bounds[:-1]], segment_confidences
+            )
+        ]
 
-        if music_score > speech_score and music_score > 0.3:
-            return AudioClassification.MUSIC.value, min(0.95, 0.5 + music_score)
-        elif speech_score > 0.3:
-            return AudioClassification.SPEECH.value, min(0.95, 0.5 + speech_score)
-        else:
-            return AudioClassification.NOISE.value, 0.6
+    def timeline_frames(self, y: np.ndarray, offset: float) -> tuple[np.ndarray, dict]:
+        graph = FeatureGraph(y, self.sr)
+        hop_length = graph.hop_length
+
+        power = graph.magnitude**2
+        harmonic = np.sum(power * graph.harmonic_mask**2, axis=0)
+        rms = librosa.feature.rms(y=y, frame_length=graph.n_fft, hop_length=hop_length)[0]
+        zcr = librosa.feature.zero_crossing_rate(y, frame_length=graph.n_fft, hop_length=hop_length)
+        tempo = librosa.feature.tempo(
+            onset_envelope=graph.onset_envelope, sr=self.sr, hop_length=hop_length, aggregate=None
+        )
+        frames = {
+            "rms": rms,
+            "zcr": zcr[0],
+            "spectral_centroid": graph.centroid[0],
+            "tempo": tempo,
+            "harmonic_ratio": harmonic / (np.sum(power, axis=0) + 1e-8),
+        }
+
+        count = min(len(values) for values in frames.values())
+        times = offset + np.arange(count) * hop_length / self.sr
+        return times, {name: values[:count] for name, values in frames.items()}
+
+    def classify_frames(self, features: dict) -> tuple[np.ndarray, np.ndarray]:
+        rms = np.asarray(features["rms"])
+        zcr = np.asarray(features["zcr"])
+
+        music_score = 0.3 * (np.asarray(features["tempo"]) > 60) + 0.3 * (
+            np.asarray(features["harmonic_ratio"]) > 0.6
+        )
+        speech_score = 0.4 * ((zcr > 0.05) & (zcr < 0.2)) + 0.2 * (
+            np.asarray(features["spectral_centroid"]) < 2000
+        )
+
+        conditions = [
+            rms < 0.01,
+            rms < 0.02,
+            (music_score > speech_score) & (music_score > 0.3),
+            speech_score > 0.3,
+        ]
+        labels = np.select(
+            conditions,
+            [
+                AudioClassification.SILENCE.value,
+                AudioClassification.NOISE.value,
+                AudioClassification.MUSIC.value,
+                AudioClassification.SPEECH.value,
+            ],
+            AudioClassification.NOISE.value,
+        )
+        confidences = np.select(
+            conditions,
+            [0.95, 0.75, np.minimum(0.95, 0.5 + music_score), np.minimum(0.95, 0.5 + speech_score)],
+            0.6,
+        )
+        return labels, confidences
+
+    def classify_features(self, features: dict) -> tuple[str, float]:
+        labels, confidences = self.classify_frames(features)
+        return str(labels), float(confidences)
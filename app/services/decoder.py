@@ -0,0 +1,131 @@
+from typing import Optional, Tuple
+
+import av
+import librosa
+import numpy as np
+import soundfile as sf
+
+from app.models.audio import AudioFormat, AudioStream, DecodedAudio
+from app.services.probe import ProbeService
+from app.services.shared import MappedPcm
+
+SEEK_PREROLL = 0.1
+
+SUBTYPE_BITS = {
+    "PCM_S8": 8,
+    "PCM_U8": 8,
+    "PCM_16": 16,
+    "PCM_24": 24,
+    "PCM_32": 32,
+    "FLOAT": 32,
+    "DOUBLE": 64,
+}
+
+
+class DecoderService:
+    def __init__(self):
+        self.probe = ProbeService()
+        self.decoders = {
+            AudioFormat.WAV: self._decode_soundfile,
+            AudioFormat.FLAC: self._decode_soundfile,
+            AudioFormat.OGG: self._decode_soundfile,
+            AudioFormat.MP3: self._decode_soundfile,
+            AudioFormat.M4A: self._decode_av,
+        }
+
+    def decode(
+        self,
+        file_path: str,
+        duration: Optional[float] = None,
+        offset: float = 0.0,
+        audio_format: Optional[AudioFormat] = None,
+    ) -> DecodedAudio:
+        audio_format = audio_format or self.probe.sniff(file_path)
+        decoder = self.decoders.get(audio_format, self._decode_librosa)
+        try:
+            return decoder(file_path, duration, offset)
+        except Exception as e:
+            raise ValueError(f"Cannot process audio file: {str(e)}")
+
+    def map(
+        self, file_path: str, duration: Optional[float] = None, offset: float = 0.0
+    ) -> Optional[Tuple[AudioStream, MappedPcm]]:
+        layout = self.probe.wav_layout(file_path)
+        if layout is None:
+            return None
+
+        stream, data_offset, dtype = layout
+        start = min(stream.frames, int(offset * stream.sample_rate))
+        frames = stream.frames - start
+        if duration is not None:
+            frames = min(frames, int(duration * stream.sample_rate))
+
+        pcm = MappedPcm(
+            path=file_path,
+            offset=data_offset + start * stream.channels * np.dtype(dtype).itemsize,
+            frames=frames,
+            channels=stream.channels,
+            dtype=dtype,
+        )
+        return stream.model_copy(update={"frames": frames}), pcm
+
+    def _decode_soundfile(
+        self, file_path: str, duration: Optional[float], offset: float
+    ) -> DecodedAudio:
+        with sf.SoundFile(file_path) as f:
+            if offset:
+                f.seek(int(offset * f.samplerate))
+            frames = -1 if duration is None else int(duration * f.samplerate)
+            y = f.read(frames, dtype="float32", always_2d=True)
+
+            stream = AudioStream(
+                sample_rate=f.samplerate,
+                channels=f.channels,
+                bit_depth=SUBTYPE_BITS.get(f.subtype),
+                frames=len(y),
+            )
+
+        samples = y[:, 0] if f.channels == 1 else y.mean(axis=1)
+        return DecodedAudio(stream=stream, samples=np.ascontiguousarray(samples))
+
+    def _decode_av(self, file_path: str, duration: Optional[float], offset: float) -> DecodedAudio:
+        with av.open(file_path) as container:
+            source = container.streams.audio[0]
+            context = source.codec_context
+            sample_rate, channels = context.sample_rate, context.channels
+            resampler = av.AudioResampler(format="fltp", layout=context.layout, rate=sample_rate)
+
+            if offset > SEEK_PREROLL:
+                container.seek(int((offset - SEEK_PREROLL) * av.time_base))
+            start = int(offset * sample_rate)
+            stop = None if duration is None else start + int(duration * sample_rate)
+
+            chunks, position = [], None
+            for frame in container.decode(source):
+                if position is None:
+                    position = round(frame.time * sample_rate) if frame.time is not None else 0
+                for converted in resampler.resample(frame):
+                    samples = converted.to_ndarray().mean(axis=0, dtype=np.float32)
+                    first, position = position, position + len(samples)
+                    low = max(0, start - first)
+                    high = len(samples) if stop is None else min(len(samples), stop - first)
+                    if high > low:
+                        chunks.append(samples[low:high])
+                if stop is not None and position >= stop:
+                    break
+
+        samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        stream = AudioStream(sample_rate=sample_rate, channels=channels, frames=len(samples))
+        return DecodedAudio(stream=stream, samples=samples)
+
+    def _decode_librosa(
+        self, file_path: str, duration: Optional[float], offset: float
+    ) -> DecodedAudio:
+        y, sr = librosa.load(
+            file_path, sr=None, mono=False, offset=offset, duration=duration, dtype=np.float32
+        )
+        channels = 1 if y.ndim == 1 else y.shape[0]
+        samples = librosa.to_mono(y)
+
+        stream = AudioStream(sample_rate=sr, channels=channels, frames=len(samples))
+        return DecodedAudio(stream=stream, samples=samples)
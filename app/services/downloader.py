@@ -1,79 +1,164 @@
+import asyncio
+import hashlib
 import os
+import shutil
 import tempfile
-from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 import aiofiles
 import httpx
 
 from app.config.base import settings
-from app.models.audio import DownloadMetadata
+from app.models.audio import AudioFormat, DownloadMetadata
+from app.services.probe import HEADER_SIZE, sniff_format
 
 
 class DownloaderService:
-    async def download(self, url: str) -> DownloadMetadata:
-        timeout = httpx.Timeout(settings.DOWNLOAD_TIMEOUT, connect=10.0)
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self._hosts: Dict[str, List] = {}
+        self._memory_files: Dict[str, int] = {}
 
-        async with httpx.AsyncClient(
-            timeout=timeout,
-            follow_redirects=True,
-            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
-        ) as client:
+    async def start(self):
+        if self.client is None:
+            self.client = self._create_client()
+
+    async def close(self):
+        if self.client:
+            client, self.client = self.client, None
+            await client.aclose()
 
+    async def download(self, url: str) -> DownloadMetadata:
+        await self.start()
+
+        async with self._host_slot(httpx.URL(url).host):
             try:
-                response = await client.get(url)
-                response.raise_for_status()
+                async with self.client.stream("GET", url) as response:
+                    response.raise_for_status()
+
+                    content_type = response.headers.get("content-type", "")
+                    content_length = response.headers.get("content-length")
+                    if content_length and int(content_length) > settings.MAX_FILE_SIZE:
+                        raise ValueError(f"File too large: {content_length} bytes")
+
+                    expected_size = int(content_length) if content_length else None
+                    temp_path, file_size, content_hash, audio_format = await self._write_stream(
+                        response, expected_size
+                    )
+
             except httpx.ConnectError:
                 raise ConnectionError(f"Cannot connect to {url}")
             except httpx.HTTPStatusError as e:
                 raise FileNotFoundError(f"HTTP {e.response.status_code}: {url}")
 
-            content_type = response.headers.get("content-type", "")
-            file_ext = self._get_extension(url, content_type)
-
-            if response.content is None or len(response.content) == 0:
+        return DownloadMetadata(
+            url=url,
+            content_type=content_type,
+            file_size=file_size,
+            temp_path=temp_path,
+            content_hash=content_hash,
+            format=audio_format,
+        )
+
+    async def _write_stream(
+        self, response: httpx.Response, expected_size: Optional[int]
+    ) -> Tuple[str, int, str, Optional[AudioFormat]]:
+        temp_path = self._create_temp_file(expected_size)
+        file_size = 0
+        digest = hashlib.sha256()
+        header = b""
+        try:
+            f = await aiofiles.open(temp_path, "wb")
+            try:
+                async for chunk in response.aiter_bytes(settings.DOWNLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > settings.MAX_FILE_SIZE:
+                        raise ValueError(f"File too large: over {settings.MAX_FILE_SIZE} bytes")
+                    if len(header) < HEADER_SIZE:
+                        missing = HEADER_SIZE - len(header)
+                        header += chunk[:missing]
+                    if (
+                        temp_path in self._memory_files
+                        and file_size > settings.DOWNLOAD_MEMORY_THRESHOLD
+                    ):
+                        await f.close()
+                        temp_path = await self._spill(temp_path)
+                        f = await aiofiles.open(temp_path, "ab")
+                    digest.update(chunk)
+                    await f.write(chunk)
+            finally:
+                await f.close()
+
+            if file_size == 0:
                 raise ValueError("Downloaded file is empty")
+        except BaseException:
+            self.cleanup(temp_path)
+            raise
 
-            if len(response.content) > settings.MAX_FILE_SIZE:
-                raise ValueError(f"File too large: {len(response.content)} bytes")
+        return temp_path, file_size, digest.hexdigest(), sniff_format(header)
 
-            temp_file = tempfile.NamedTemporaryFile(
-                suffix=file_ext, dir=settings.TEMP_DIR, delete=False
-            )
-            temp_path = temp_file.name
-            temp_file.close()
-
-            async with aiofiles.open(temp_path, "wb") as f:
-                await f.write(response.content)
-
-            file_size = os.path.getsize(temp_path)
-
-            return DownloadMetadata(
-                url=url, content_type=content_type, file_size=file_size, temp_path=temp_path
-            )
-
-    def _get_extension(self, url: str, content_type: str) -> str:
-        url_ext = Path(url).suffix.lower()
-        valid_exts = [".mp3", ".wav", ".ogg", ".m4a", ".flac"]
-
-        if url_ext in valid_exts:
-            return url_ext
-
-        content_map = {
-            "audio/mpeg": ".mp3",
-            "audio/wav": ".wav",
-            "audio/ogg": ".ogg",
-            "audio/mp4": ".m4a",
-            "audio/flac": ".flac",
-        }
-
-        for ct, ext in content_map.items():
-            if content_type.startswith(ct):
-                return ext
-
-        return ".mp3"
+    async def _spill(self, memory_path: str) -> str:
+        disk_path = self._create_disk_file()
+        try:
+            await asyncio.to_thread(shutil.copyfile, memory_path, disk_path)
+        except BaseException:
+            self.cleanup(disk_path)
+            raise
+        finally:
+            self.cleanup(memory_path)
+        return disk_path
+
+    def _create_temp_file(self, expected_size: Optional[int] = None) -> str:
+        threshold = settings.DOWNLOAD_MEMORY_THRESHOLD
+        if not hasattr(os, "memfd_create") or threshold <= 0 or (expected_size or 0) > threshold:
+            return self._create_disk_file()
+
+        fd = os.memfd_create("download", os.MFD_CLOEXEC)
+        path = f"/proc/{os.getpid()}/fd/{fd}"
+        if not os.access(path, os.R_OK | os.W_OK):
+            os.close(fd)
+            return self._create_disk_file()
+        self._memory_files[path] = fd
+        return path
+
+    def _create_disk_file(self) -> str:
+        temp_file = tempfile.NamedTemporaryFile(dir=settings.TEMP_DIR, delete=False)
+        temp_file.close()
+        return temp_file.name
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.DOWNLOAD_TIMEOUT, connect=10.0),
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=settings.DOWNLOAD_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DOWNLOAD_MAX_KEEPALIVE,
+                keepalive_expiry=settings.DOWNLOAD_KEEPALIVE_EXPIRY,
+            ),
+            http2=settings.DOWNLOAD_HTTP2,
+        )
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        slot = self._hosts.setdefault(
+            host, [asyncio.Semaphore(settings.DOWNLOAD_PER_HOST_LIMIT), 0]
+        )
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self._hosts[host]
+
+    def cleanup(self, file_path: str):
+        fd = self._memory_files.pop(file_path, None)
+        if fd is not None:
+            os.close(fd)
+            return
 
-    @staticmethod
-    def cleanup(file_path: str):
         try:
             if os.path.exists(file_path):
                 os.unlink(file_path)
@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Set
+
+from app.config.base import settings
+from app.config.logger import get_logger
+from app.services import tasks
+from app.services.profiler import current_session, profile_call
+from app.services.shared import release
+
+logger = get_logger(__name__)
+
+
+class ExecutorService:
+    def __init__(self, max_workers: int = settings.ANALYSIS_WORKERS):
+        self.max_workers = max_workers
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._restart_lock = asyncio.Lock()
+        self._in_flight: Set[asyncio.Future] = set()
+
+    async def start(self):
+        if self.max_workers <= 0:
+            return
+
+        self.pool = self._create_pool()
+        await self._warm_up(self.pool)
+
+    async def close(self):
+        if self.pool:
+            pool, self.pool = self.pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        session = current_session()
+        pool = self.pool
+        try:
+            if session is None:
+                return await self._submit(pool, fn, *args)
+
+            result, stacks, peak_memory = await self._submit(pool, profile_call, fn, *args)
+            session.add("worker", stacks, peak_memory)
+            return result
+        except BrokenProcessPool:
+            await self._restart(pool)
+            raise
+
+    async def _restart(self, broken: Optional[ProcessPoolExecutor]):
+        async with self._restart_lock:
+            if broken is None or self.pool is not broken:
+                return
+
+            logger.error("Analysis worker pool is broken, restarting it")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.pool = self._create_pool()
+            try:
+                await self._warm_up(self.pool)
+            except BrokenProcessPool:
+                logger.error("Replacement analysis worker pool failed to start")
+
+    async def _warm_up(self, pool: ProcessPoolExecutor):
+        await asyncio.gather(*(self._submit(pool, tasks.ping) for _ in range(self.max_workers)))
+
+    async def _submit(
+        self, pool: Optional[ProcessPoolExecutor], fn: Callable[..., Any], *args: Any
+    ) -> Any:
+        future = asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        self._in_flight.add(future)
+        future.add_done_callback(self._in_flight.discard)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(self._release)
+            raise
+
+    def after_pending(self, callback: Callable[[], Any]):
+        pending = [future for future in self._in_flight if not future.done()]
+        if not pending:
+            callback()
+            return
+
+        remaining = [len(pending)]
+
+        def done(_):
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                callback()
+
+        for future in pending:
+            future.add_done_callback(done)
+
+    @staticmethod
+    def _release(future: Future):
+        if not future.cancelled() and future.exception() is None:
+            release(future.result())
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=tasks.init_worker,
+        )
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import socket
+from typing import Dict, Optional, Set
+
+import httpx
+
+from app.config.base import settings
+from app.config.logger import get_logger
+from app.models.job import AnalysisJob, JobStatus
+from app.services.analyzer import AudioAnalyzerService
+from app.services.jobs import JobService
+from app.services.redis import RedisService
+
+logger = get_logger(__name__)
+
+
+class JobWorker:
+    def __init__(
+        self, redis_service: RedisService, jobs: JobService, analyzer: AudioAnalyzerService
+    ):
+        self.redis = redis_service
+        self.jobs = jobs
+        self.analyzer = analyzer
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.client: Optional[httpx.AsyncClient] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        await self.jobs.start()
+        self.client = self.client or httpx.AsyncClient(timeout=settings.JOB_WEBHOOK_TIMEOUT)
+        logger.info(f"Job worker {self.consumer} consuming {settings.JOB_STREAM}")
+
+        loop = asyncio.get_running_loop()
+        next_claim = 0.0
+        try:
+            while not self._stopping.is_set():
+                free = settings.JOB_CONCURRENCY - len(self._inflight)
+                if free <= 0:
+                    await asyncio.wait(self._inflight, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                if loop.time() >= next_claim:
+                    next_claim = loop.time() + settings.JOB_CLAIM_IDLE / 2
+                    entries = await self.redis.xautoclaim(
+                        settings.JOB_STREAM,
+                        settings.JOB_GROUP,
+                        self.consumer,
+                        settings.JOB_CLAIM_IDLE,
+                        free,
+                    )
+                    if entries:
+                        logger.warning(f"Reclaimed {len(entries)} stalled jobs")
+                        self._dispatch(entries)
+                        continue
+
+                entries = await self.redis.xreadgroup(
+                    settings.JOB_STREAM,
+                    settings.JOB_GROUP,
+                    self.consumer,
+                    free,
+                    settings.JOB_BLOCK_TIMEOUT,
+                )
+                if entries is None:
+                    await asyncio.sleep(1)
+                    continue
+                self._dispatch(entries)
+        finally:
+            if self._inflight:
+                await asyncio.wait(self._inflight)
+            await self.client.aclose()
+
+    def _dispatch(self, entries):
+        for message_id, fields in entries:
+            task = asyncio.create_task(self.process(message_id, fields))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def process(self, message_id: str, fields: Dict[str, str]):
+        job = await self.jobs.get(fields.get("job_id", ""))
+        if job is None or job.finished:
+            await self._ack(message_id)
+            return
+
+        job.attempts += 1
+        if job.attempts > settings.JOB_MAX_ATTEMPTS:
+            job.status = JobStatus.FAILED
+            job.error = "Job exceeded the maximum number of attempts"
+        else:
+            job.status = JobStatus.RUNNING
+            await self.jobs.save(job)
+            await self._analyze(message_id, job)
+
+        await self.jobs.save(job)
+        await self._ack(message_id)
+        await self._notify(job)
+
+    async def _analyze(self, message_id: str, job: AnalysisJob):
+        heartbeat = asyncio.create_task(self._heartbeat(message_id))
+        try:
+            job.result = await self.analyzer.analyze_audio(job.audio_url, timeline=job.timeline)
+            job.status = JobStatus.SUCCEEDED
+        except (ValueError, FileNotFoundError, ConnectionError) as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            job.status = JobStatus.FAILED
+            job.error = "Internal server error"
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, message_id: str):
+        while True:
+            await asyncio.sleep(settings.JOB_CLAIM_IDLE / 3)
+            await self.redis.xclaim_touch(
+                settings.JOB_STREAM, settings.JOB_GROUP, self.consumer, message_id
+            )
+
+    async def _ack(self, message_id: str):
+        await self.redis.xack(settings.JOB_STREAM, settings.JOB_GROUP, message_id)
+
+    async def _notify(self, job: AnalysisJob):
+        if not job.callback_url or self.client is None:
+            return
+        try:
+            response = await self.client.post(
+                job.callback_url,
+                content=job.model_dump_json(),
+                headers={"content-type": "application/json"},
+            )
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Webhook for job {job.job_id} failed: {e}")
@@ -0,0 +1,57 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config.base import settings
+from app.models.job import AnalysisJob, JobStatus
+from app.services.redis import RedisService
+
+
+class JobService:
+    def __init__(self, redis_service: RedisService):
+        self.redis = redis_service
+
+    def generate_key(self, job_id: str) -> str:
+        return f"audio:job:{job_id}"
+
+    async def start(self) -> bool:
+        return await self.redis.xgroup_create(settings.JOB_STREAM, settings.JOB_GROUP)
+
+    async def submit(
+        self, audio_url: str, callback_url: Optional[str] = None, timeline: bool = False
+    ) -> AnalysisJob:
+        if not self.redis.is_connected():
+            raise ConnectionError("Job queue is unavailable")
+
+        now = datetime.now(timezone.utc)
+        job = AnalysisJob(
+            job_id=uuid.uuid4().hex,
+            audio_url=audio_url,
+            callback_url=callback_url,
+            timeline=timeline,
+            status=JobStatus.QUEUED,
+            created_at=now,
+            updated_at=now,
+        )
+
+        if not await self.save(job):
+            raise ConnectionError("Job queue is unavailable")
+
+        message_id = await self.redis.xadd(
+            settings.JOB_STREAM, {"job_id": job.job_id}, settings.JOB_STREAM_MAXLEN
+        )
+        if message_id is None:
+            raise ConnectionError("Job queue is unavailable")
+
+        return job
+
+    async def get(self, job_id: str) -> Optional[AnalysisJob]:
+        data = await self.redis.get(self.generate_key(job_id))
+        return AnalysisJob.model_validate(json.loads(data)) if data else None
+
+    async def save(self, job: AnalysisJob) -> bool:
+        job.updated_at = datetime.now(timezone.utc)
+        return await self.redis.setex(
+            self.generate_key(job.job_id), settings.JOB_TTL, job.model_dump_json()
+        )
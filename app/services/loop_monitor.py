@@ -0,0 +1,76 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.config.base import settings
+from app.config.logger import get_logger
+from app.services.metrics import MetricsService
+
+logger = get_logger(__name__)
+
+
+class LoopMonitorService:
+    def __init__(
+        self,
+        metrics: MetricsService,
+        interval: float = settings.LOOP_MONITOR_INTERVAL,
+        block_threshold: float = settings.LOOP_BLOCK_THRESHOLD,
+    ):
+        self.metrics = metrics
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._heartbeat = 0.0
+        self._loop_thread = 0
+
+    async def start(self):
+        if self.interval <= 0 or self._task is not None:
+            return
+
+        self._stopped.clear()
+        self._heartbeat = time.monotonic()
+        self._loop_thread = threading.get_ident()
+        self._task = asyncio.create_task(self._measure())
+
+        if self.block_threshold > 0:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def close(self):
+        self._stopped.set()
+        if self._task:
+            task, self._task = self._task, None
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._watchdog:
+            watchdog, self._watchdog = self._watchdog, None
+            watchdog.join()
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.metrics.record_loop_lag(max(0.0, loop.time() - expected))
+
+    def _watch(self):
+        limit = self.interval + self.block_threshold
+        reported = 0.0
+        while not self._stopped.wait(min(self.interval, self.block_threshold) / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat
+            if stalled < limit or heartbeat == reported:
+                continue
+
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(f"Event loop blocked for {stalled - self.interval:.2f}s:\n{stack}")
@@ -1,14 +1,130 @@
-from prometheus_client import Counter, Histogram
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUESTS_TOTAL = Counter("audio_requests_total", "Total requests")
+PROCESSING_DURATION = Histogram("audio_processing_duration_seconds", "Processing time")
+ERRORS_TOTAL = Counter("audio_errors_total", "Total errors", ["error_type"])
+
+LOCAL_CACHE_HITS = Counter("audio_local_cache_hits_total", "In-process cache hits")
+LOCAL_CACHE_MISSES = Counter("audio_local_cache_misses_total", "In-process cache misses")
+LOCAL_CACHE_EVICTIONS = Counter(
+    "audio_local_cache_evictions_total", "In-process cache evictions", ["reason"]
+)
+LOCAL_CACHE_SIZE = Gauge("audio_local_cache_entries", "Entries held in the in-process cache")
+
+CLASSIFIER_TIER_TOTAL = Counter(
+    "audio_classifier_tier_total", "Classifications decided at each feature tier", ["tier"]
+)
+
+CLASSIFY_BATCH_SIZE = Histogram(
+    "audio_classify_batch_size",
+    "Clips classified together in one micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+CLASSIFY_QUEUE_WAIT = Histogram(
+    "audio_classify_queue_wait_seconds",
+    "Time a clip waited for its micro-batch to be dispatched",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+STAGE_DURATION = Histogram(
+    "audio_stage_duration_seconds", "Time spent in each analysis stage", ["stage"]
+)
+CACHE_LOOKUPS = Counter(
+    "audio_cache_lookups_total", "Result cache lookups by key type and outcome", ["key", "result"]
+)
+IN_FLIGHT = Gauge("audio_in_flight", "Operations currently in progress", ["operation"])
+
+DOWNLOAD_BYTES = Counter("audio_download_bytes_total", "Bytes downloaded")
+DOWNLOAD_THROUGHPUT = Histogram(
+    "audio_download_throughput_bytes_per_second",
+    "Download throughput per file",
+    buckets=(1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8),
+)
+DECODED_SAMPLES = Counter("audio_decoded_samples_total", "Sample frames decoded")
+DECODE_RATE = Histogram(
+    "audio_decode_samples_per_second",
+    "Decode speed per file in sample frames per second",
+    buckets=(1e5, 1e6, 1e7, 1e8, 1e9, 1e10),
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "audio_event_loop_lag_seconds",
+    "Delay between when a loop-lag probe was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
 
 
 class MetricsService:
     def __init__(self):
-        self.requests_total = Counter("audio_requests_total", "Total requests")
-        self.processing_duration = Histogram("audio_processing_duration_seconds", "Processing time")
-        self.errors_total = Counter("audio_errors_total", "Total errors", ["error_type"])
+        self.requests_total = REQUESTS_TOTAL
+        self.processing_duration = PROCESSING_DURATION
+        self.errors_total = ERRORS_TOTAL
+        self.local_cache_hits = LOCAL_CACHE_HITS
+        self.local_cache_misses = LOCAL_CACHE_MISSES
+        self.local_cache_evictions = LOCAL_CACHE_EVICTIONS
+        self.local_cache_size = LOCAL_CACHE_SIZE
+        self.classifier_tier_total = CLASSIFIER_TIER_TOTAL
+        self.classify_batch_size = CLASSIFY_BATCH_SIZE
+        self.classify_queue_wait = CLASSIFY_QUEUE_WAIT
+        self.stage_duration = STAGE_DURATION
+        self.cache_lookups = CACHE_LOOKUPS
+        self.in_flight = IN_FLIGHT
+        self.download_bytes = DOWNLOAD_BYTES
+        self.download_throughput = DOWNLOAD_THROUGHPUT
+        self.decoded_samples = DECODED_SAMPLES
+        self.decode_rate = DECODE_RATE
+        self.event_loop_lag = EVENT_LOOP_LAG
 
     def record_request(self):
         self.requests_total.inc()
 
     def record_error(self, error_type: str):
         self.errors_total.labels(error_type=error_type).inc()
+
+    def record_local_cache(self, hit: bool):
+        if hit:
+            self.local_cache_hits.inc()
+        else:
+            self.local_cache_misses.inc()
+
+    def record_local_cache_eviction(self, reason: str):
+        self.local_cache_evictions.labels(reason=reason).inc()
+
+    def record_classifier_tier(self, tier: str):
+        self.classifier_tier_total.labels(tier=tier).inc()
+
+    def record_classify_batch(self, size: int, waits: List[float]):
+        self.classify_batch_size.observe(size)
+        for wait in waits:
+            self.classify_queue_wait.observe(wait)
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_duration.labels(stage=stage).observe(time.perf_counter() - start)
+
+    def track_in_flight(self, operation: str):
+        return self.in_flight.labels(operation=operation).track_inprogress()
+
+    def record_cache(self, key: str, hit: bool):
+        self.cache_lookups.labels(key=key, result="hit" if hit else "miss").inc()
+
+    def record_download(self, size: int, seconds: float):
+        self.download_bytes.inc(size)
+        if seconds > 0:
+            self.download_throughput.observe(size / seconds)
+
+    def record_decode(self, samples: int, seconds: float):
+        self.decoded_samples.inc(samples)
+        if seconds > 0:
+            self.decode_rate.observe(samples / seconds)
+
+    def record_loop_lag(self, lag: float):
+        self.event_loop_lag.observe(lag)
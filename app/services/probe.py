@@ -0,0 +1,361 @@
+import os
+import struct
+from typing import BinaryIO, Optional, Tuple
+
+import av
+import soundfile as sf
+
+from app.models.audio import AudioFormat, AudioStream
+
+WAV_PCM_FORMATS = (0x0001, 0x0003, 0xFFFE)
+
+WAV_DTYPES = {(1, 8): "u1", (1, 16): "<i2", (1, 32): "<i4", (3, 32): "<f4", (3, 64): "<f8"}
+
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+MP3_BITRATES = {
+    3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+SF_UNKNOWN_FRAMES = 2**63 - 1
+
+HEADER_SIZE = 12
+
+
+def sniff_format(header: bytes) -> Optional[AudioFormat]:
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return AudioFormat.WAV
+    if header[:4] == b"fLaC":
+        return AudioFormat.FLAC
+    if header[:4] == b"OggS":
+        return AudioFormat.OGG
+    if header[4:8] == b"ftyp":
+        return AudioFormat.M4A
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return AudioFormat.MP3
+    return None
+
+
+class ProbeService:
+    def sniff(self, file_path: str) -> Optional[AudioFormat]:
+        try:
+            with open(file_path, "rb") as f:
+                return sniff_format(f.read(HEADER_SIZE))
+        except OSError:
+            return None
+
+    def probe(self, file_path: str) -> Optional[AudioStream]:
+        probes = {
+            AudioFormat.WAV: self._probe_wav,
+            AudioFormat.FLAC: self._probe_flac,
+            AudioFormat.OGG: self._probe_ogg,
+            AudioFormat.M4A: self._probe_mp4,
+            AudioFormat.MP3: self._probe_mp3,
+        }
+        try:
+            with open(file_path, "rb") as f:
+                audio_format = sniff_format(f.read(HEADER_SIZE))
+                f.seek(0)
+                if audio_format:
+                    return probes[audio_format](f)
+        except (OSError, struct.error, IndexError, ValueError, ZeroDivisionError):
+            pass
+        return None
+
+    def inspect(self, file_path: str) -> Optional[AudioStream]:
+        try:
+            info = sf.info(file_path)
+            if 0 < info.frames < SF_UNKNOWN_FRAMES and info.samplerate:
+                return AudioStream(
+                    sample_rate=info.samplerate, channels=info.channels, frames=info.frames
+                )
+        except RuntimeError:
+            pass
+
+        try:
+            with av.open(file_path) as container:
+                source = container.streams.audio[0]
+                sample_rate = source.codec_context.sample_rate
+                if source.duration is not None:
+                    duration = float(source.duration * source.time_base)
+                elif container.duration is not None:
+                    duration = container.duration / av.time_base
+                else:
+                    return None
+                if not sample_rate or duration <= 0:
+                    return None
+                return AudioStream(
+                    sample_rate=sample_rate,
+                    channels=source.codec_context.channels,
+                    frames=int(duration * sample_rate),
+                )
+        except (av.FFmpegError, OSError, ValueError, IndexError):
+            return None
+
+    def wav_layout(self, file_path: str) -> Optional[Tuple[AudioStream, int, str]]:
+        try:
+            with open(file_path, "rb") as f:
+                if sniff_format(f.read(HEADER_SIZE)) != AudioFormat.WAV:
+                    return None
+                layout = self._wav_layout(f)
+        except (OSError, struct.error, IndexError, ValueError):
+            return None
+        if layout is None:
+            return None
+
+        stream, offset, tag = layout
+        dtype = WAV_DTYPES.get((tag, stream.bit_depth))
+        return (stream, offset, dtype) if dtype else None
+
+    def _probe_wav(self, f: BinaryIO) -> Optional[AudioStream]:
+        layout = self._wav_layout(f)
+        return layout[0] if layout else None
+
+    def _wav_layout(self, f: BinaryIO) -> Optional[Tuple[AudioStream, int, int]]:
+        f.seek(12)
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+
+            if chunk_id == b"fmt ":
+                fmt = f.read(size)
+                f.seek(size % 2, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None or size in (0, 0xFFFFFFFF):
+                    return None
+                tag, channels, sample_rate, _, block_align, bits = struct.unpack(
+                    "<HHIIHH", fmt[:16]
+                )
+                if tag not in WAV_PCM_FORMATS or not channels or not sample_rate or not block_align:
+                    return None
+                if tag == 0xFFFE and len(fmt) >= 26:
+                    tag = struct.unpack_from("<H", fmt, 24)[0]
+
+                offset = f.tell()
+                available = os.fstat(f.fileno()).st_size - offset
+                stream = AudioStream(
+                    sample_rate=sample_rate,
+                    channels=channels,
+                    bit_depth=bits,
+                    frames=min(size, available) // block_align,
+                )
+                if block_align != channels * bits // 8:
+                    tag = None
+                return stream, offset, tag
+            else:
+                f.seek(size + size % 2, os.SEEK_CUR)
+
+    def _probe_flac(self, f: BinaryIO) -> Optional[AudioStream]:
+        f.seek(4)
+        block_header = f.read(4)
+        if block_header[0] & 0x7F != 0:
+            return None
+
+        info = f.read(34)
+        packed = int.from_bytes(info[10:18], "big")
+        sample_rate = packed >> 44
+        channels = ((packed >> 41) & 0x7) + 1
+        bits = ((packed >> 36) & 0x1F) + 1
+        frames = packed & 0xFFFFFFFFF
+        if not sample_rate or not frames:
+            return None
+
+        return AudioStream(
+            sample_rate=sample_rate, channels=channels, bit_depth=bits, frames=frames
+        )
+
+    def _probe_ogg(self, f: BinaryIO) -> Optional[AudioStream]:
+        page = f.read(4096)
+        start = 27 + page[26]
+        packet = page[start:]
+
+        if packet[:7] == b"\x01vorbis":
+            channels = packet[11]
+            sample_rate = struct.unpack("<I", packet[12:16])[0]
+            pre_skip = 0
+        elif packet[:8] == b"OpusHead":
+            channels = packet[9]
+            sample_rate = 48000
+            pre_skip = struct.unpack("<H", packet[10:12])[0]
+        else:
+            return None
+
+        granule = self._last_ogg_granule(f)
+        if granule is None or granule <= pre_skip:
+            return None
+
+        return AudioStream(sample_rate=sample_rate, channels=channels, frames=granule - pre_skip)
+
+    def _last_ogg_granule(self, f: BinaryIO) -> Optional[int]:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - 65536))
+        tail = f.read()
+
+        index = tail.rfind(b"OggS")
+        while index >= 0:
+            granule = struct.unpack_from("<q", tail, index + 6)[0]
+            if granule >= 0:
+                return granule
+            index = tail.rfind(b"OggS", 0, index)
+        return None
+
+    def _probe_mp3(self, f: BinaryIO) -> Optional[AudioStream]:
+        offset = 0
+        header = f.read(10)
+        if header[:3] == b"ID3":
+            size = 0
+            for byte in header[6:10]:
+                size = (size << 7) | (byte & 0x7F)
+            offset = 10 + size + (10 if header[5] & 0x10 else 0)
+
+        f.seek(offset)
+        frame = f.read(512)
+        if len(frame) < 4 or frame[0] != 0xFF or frame[1] & 0xE0 != 0xE0:
+            return None
+
+        version = (frame[1] >> 3) & 0x3
+        layer = (frame[1] >> 1) & 0x3
+        rate_index = (frame[2] >> 2) & 0x3
+        if version == 1 or layer != 1 or rate_index == 3:
+            return None
+
+        sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+        channels = 1 if (frame[3] >> 6) == 3 else 2
+        samples_per_frame = 1152 if version == 3 else 576
+
+        frames = self._mp3_frame_count(frame, version, channels)
+        if frames is None:
+            bitrate = MP3_BITRATES[3 if version == 3 else 2][frame[2] >> 4] * 1000
+            if not bitrate:
+                return None
+            payload = self._mp3_payload_end(f) - offset
+            return AudioStream(
+                sample_rate=sample_rate,
+                channels=channels,
+                frames=max(0, payload * 8 * sample_rate // bitrate),
+            )
+
+        total, delay, padding = frames
+        return AudioStream(
+            sample_rate=sample_rate,
+            channels=channels,
+            frames=max(0, total * samples_per_frame - delay - padding),
+        )
+
+    def _mp3_payload_end(self, f: BinaryIO) -> int:
+        end = f.seek(0, os.SEEK_END)
+        if end >= 128 and self._read_at(f, end - 128, 3) == b"TAG":
+            end -= 128
+
+        footer = self._read_at(f, max(0, end - 32), 32)
+        if footer[:8] == b"APETAGEX":
+            size, flags = struct.unpack_from("<II", footer, 12)
+            end -= size + (32 if flags & 0x80000000 else 0)
+        return end
+
+    def _mp3_frame_count(self, frame: bytes, version: int, channels: int):
+        if version == 3:
+            side_info = 32 if channels == 2 else 17
+        else:
+            side_info = 17 if channels == 2 else 9
+
+        xing = 4 + side_info + (0 if frame[1] & 0x1 else 2)
+        tag, flags, total = struct.unpack_from(">4sII", frame, xing)
+        if tag in (b"Xing", b"Info"):
+            if not flags & 0x1:
+                return None
+
+            lame = xing + 8 + 4 * bin(flags & 0x3).count("1") + (100 if flags & 0x4 else 0)
+            lame += 4 if flags & 0x8 else 0
+            delay = padding = 0
+            if frame.startswith(b"LAME", lame):
+                packed = struct.unpack_from(">I", frame, lame + 20)[0] & 0xFFFFFF
+                delay, padding = packed >> 12, packed & 0xFFF
+            return total, delay, padding
+
+        if frame[36:40] == b"VBRI":
+            return struct.unpack(">I", frame[50:54])[0], 0, 0
+
+        return None
+
+    def _probe_mp4(self, f: BinaryIO) -> Optional[AudioStream]:
+        size = f.seek(0, os.SEEK_END)
+        moov = self._find_box(f, 0, size, b"moov")
+        if moov is None:
+            return None
+
+        for trak in self._iter_boxes(f, *moov, b"trak"):
+            mdia = self._find_box(f, *trak, b"mdia")
+            if mdia is None:
+                continue
+
+            hdlr = self._find_box(f, *mdia, b"hdlr")
+            if hdlr is None or self._read_at(f, hdlr[0] + 8, 4) != b"soun":
+                continue
+
+            mdhd = self._find_box(f, *mdia, b"mdhd")
+            stsd = self._find_path(f, mdia, [b"minf", b"stbl", b"stsd"])
+            if mdhd is None or stsd is None:
+                return None
+
+            data = self._read_at(f, mdhd[0], 32)
+            if data[0] == 1:
+                timescale, duration = struct.unpack(">IQ", data[20:32])
+            else:
+                timescale, duration = struct.unpack(">II", data[12:20])
+
+            entry = self._read_at(f, stsd[0] + 8, 36)
+            channels = struct.unpack(">H", entry[24:26])[0]
+            bits = struct.unpack(">H", entry[26:28])[0]
+            sample_rate = struct.unpack(">I", entry[32:36])[0] >> 16
+            if not timescale or not duration or not sample_rate:
+                return None
+
+            return AudioStream(
+                sample_rate=sample_rate,
+                channels=channels,
+                bit_depth=bits or None,
+                frames=duration * sample_rate // timescale,
+            )
+        return None
+
+    def _iter_boxes(self, f: BinaryIO, start: int, end: int, box_type: bytes):
+        position = start
+        while position + 8 <= end:
+            f.seek(position)
+            header = f.read(16)
+            size, current = struct.unpack(">I4s", header[:8])
+            header_size = 8
+            if size == 1:
+                size = struct.unpack(">Q", header[8:16])[0]
+                header_size = 16
+            elif size == 0:
+                size = end - position
+            if size < header_size:
+                return
+
+            if current == box_type:
+                yield position + header_size, position + size
+            position += size
+
+    def _find_box(self, f: BinaryIO, start: int, end: int, box_type: bytes):
+        return next(self._iter_boxes(f, start, end, box_type), None)
+
+    def _find_path(self, f: BinaryIO, box, path):
+        for box_type in path:
+            box = self._find_box(f, *box, box_type)
+            if box is None:
+                return None
+        return box
+
+    def _read_at(self, f: BinaryIO, position: int, size: int) -> bytes:
+        f.seek(position)
+        return f.read(size)
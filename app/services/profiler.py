@@ -0,0 +1,140 @@
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from types import FrameType
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config.base import settings
+from app.config.logger import get_logger
+from app.models.profile import ProfileReport
+from app.services.redis import RedisService
+
+logger = get_logger(__name__)
+
+
+def collapse(frame: Optional[FrameType]) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id: int, interval: float = settings.PROFILING_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            thread, self._thread = self._thread, None
+            thread.join()
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+
+def profile_call(fn: Callable[..., Any], *args: Any) -> Tuple[Any, Dict[str, int], int]:
+    sampler = SamplingProfiler(threading.get_ident())
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.start()
+
+    sampler.start()
+    try:
+        result = fn(*args)
+    finally:
+        sampler.stop()
+        peak = tracemalloc.get_traced_memory()[1]
+        if not tracing:
+            tracemalloc.stop()
+    return result, dict(sampler.stacks), peak
+
+
+class ProfileSession:
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self.peak_memory = 0
+
+    def add(self, prefix: str, stacks: Dict[str, int], peak_memory: int = 0):
+        for stack, count in stacks.items():
+            self.stacks[f"{prefix};{stack}"] += count
+        self.peak_memory = max(self.peak_memory, peak_memory)
+
+
+_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+def current_session() -> Optional[ProfileSession]:
+    return _session.get()
+
+
+class ProfilerService:
+    def __init__(self, redis_service: RedisService):
+        self.redis = redis_service
+
+    def generate_key(self, profile_id: str) -> str:
+        return f"audio:profile:{profile_id}"
+
+    def authorize(self, token: Optional[str]) -> bool:
+        if not settings.PROFILING_ENABLED or not settings.PROFILING_TOKEN or not token:
+            return False
+        return hmac.compare_digest(token.encode(), settings.PROFILING_TOKEN.encode())
+
+    async def profile(
+        self, audio_url: str, fn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, ProfileReport]:
+        session = ProfileSession()
+        sampler = SamplingProfiler(threading.get_ident())
+        token = _session.set(session)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            result = await fn()
+        finally:
+            sampler.stop()
+            _session.reset(token)
+        session.add("loop", sampler.stacks)
+
+        report = ProfileReport(
+            profile_id=uuid.uuid4().hex,
+            audio_url=audio_url,
+            duration=time.perf_counter() - start,
+            samples=sum(session.stacks.values()),
+            peak_memory=session.peak_memory,
+            stacks=dict(session.stacks.most_common()),
+        )
+        if not await self.save(report):
+            logger.warning(f"Profile {report.profile_id} could not be stored")
+        return result, report
+
+    async def save(self, report: ProfileReport) -> bool:
+        return await self.redis.setex(
+            self.generate_key(report.profile_id), settings.PROFILING_TTL, report.model_dump_json()
+        )
+
+    async def get(self, profile_id: str) -> Optional[ProfileReport]:
+        data = await self.redis.get(self.generate_key(profile_id))
+        return ProfileReport.model_validate(json.loads(data)) if data else None
@@ -1,9 +1,24 @@
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import redis.asyncio as redis
+from redis.asyncio.client import PubSub
 
 from app.config.base import settings
 
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+EXTEND_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
 
 class RedisService:
     def __init__(self):
@@ -42,6 +57,19 @@ class RedisService:
         except Exception:
             return None
 
+    async def mget_with_ttl(self, keys: List[str]) -> List[Tuple[Optional[str], Optional[float]]]:
+        if not self.is_connected() or not keys:
+            return [(None, None)] * len(keys)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.mget(keys)
+            for key in keys:
+                pipe.pttl(key)
+            values, *ttls = await pipe.execute()
+            return [(value, ttl / 1000 if ttl >= 0 else None) for value, ttl in zip(values, ttls)]
+        except Exception:
+            return [(None, None)] * len(keys)
+
     async def setex(self, key: str, ttl: int, value: str) -> bool:
         if not self.is_connected():
             return False
@@ -50,3 +78,114 @@ class RedisService:
             return result is True
         except Exception:
             return False
+
+    async def delete(self, key: str) -> bool:
+        if not self.is_connected():
+            return False
+        try:
+            return await self.redis.delete(key) > 0
+        except Exception:
+            return False
+
+    async def publish(self, channel: str, message: str) -> bool:
+        if not self.is_connected():
+            return False
+        try:
+            await self.redis.publish(channel, message)
+            return True
+        except Exception:
+            return False
+
+    async def subscribe(self, channel: str) -> Optional[PubSub]:
+        if not self.is_connected():
+            return None
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        return pubsub
+
+    async def set_nx(self, key: str, value: str, ttl: float) -> Optional[bool]:
+        if not self.is_connected():
+            return None
+        try:
+            result = await self.redis.set(key, value, nx=True, px=int(ttl * 1000))
+            return result is True
+        except Exception:
+            return None
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        if not self.is_connected():
+            return False
+        try:
+            return await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, key, token) == 1
+        except Exception:
+            return False
+
+    async def extend_lock(self, key: str, token: str, ttl: float) -> bool:
+        if not self.is_connected():
+            return False
+        try:
+            return await self.redis.eval(EXTEND_LOCK_SCRIPT, 1, key, token, int(ttl * 1000)) == 1
+        except Exception:
+            return False
+
+    async def xadd(self, stream: str, fields: Dict[str, str], maxlen: int) -> Optional[str]:
+        if not self.is_connected():
+            return None
+        try:
+            return await self.redis.xadd(stream, fields, maxlen=maxlen, approximate=True)
+        except Exception:
+            return None
+
+    async def xgroup_create(self, stream: str, group: str) -> bool:
+        if not self.is_connected():
+            return False
+        try:
+            await self.redis.xgroup_create(stream, group, id="0", mkstream=True)
+            return True
+        except redis.ResponseError as e:
+            return "BUSYGROUP" in str(e)
+        except Exception:
+            return False
+
+    async def xreadgroup(
+        self, stream: str, group: str, consumer: str, count: int, block: float
+    ) -> Optional[List[Tuple[str, Dict[str, str]]]]:
+        if not self.is_connected():
+            return None
+        try:
+            response = await self.redis.xreadgroup(
+                group, consumer, {stream: ">"}, count=count, block=int(block * 1000)
+            )
+            return response[0][1] if response else []
+        except Exception:
+            return None
+
+    async def xautoclaim(
+        self, stream: str, group: str, consumer: str, min_idle: float, count: int
+    ) -> Optional[List[Tuple[str, Dict[str, str]]]]:
+        if not self.is_connected():
+            return None
+        try:
+            response = await self.redis.xautoclaim(
+                stream, group, consumer, int(min_idle * 1000), count=count
+            )
+            return [entry for entry in response[1] if entry[1]]
+        except Exception:
+            return None
+
+    async def xclaim_touch(self, stream: str, group: str, consumer: str, message_id: str) -> bool:
+        if not self.is_connected():
+            return False
+        try:
+            await self.redis.xclaim(stream, group, consumer, 0, [message_id], justid=True)
+            return True
+        except Exception:
+            return False
+
+    async def xack(self, stream: str, group: str, message_id: str) -> bool:
+        if not self.is_connected():
+            return False
+        try:
+            return await self.redis.xack(stream, group, message_id) == 1
+        except Exception:
+            return False
@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Iterator, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+
+class SharedArray(BaseModel):
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> "SharedArray":
+        shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+        try:
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            return cls(name=shm.name, shape=array.shape, dtype=array.dtype.str)
+        finally:
+            shm.close()
+
+    @contextmanager
+    def open(self) -> Iterator[np.ndarray]:
+        shm = SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf)
+        try:
+            yield array
+        finally:
+            del array
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+    def unlink(self):
+        try:
+            shm = SharedMemory(name=self.name)
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class MappedPcm(BaseModel):
+    path: str
+    offset: int
+    frames: int
+    channels: int
+    dtype: str
+
+    @contextmanager
+    def open(self) -> Iterator[np.ndarray]:
+        if not self.frames:
+            yield np.zeros((0, self.channels), dtype=np.dtype(self.dtype))
+            return
+
+        array = np.memmap(
+            self.path,
+            dtype=np.dtype(self.dtype),
+            mode="r",
+            offset=self.offset,
+            shape=(self.frames, self.channels),
+        )
+        try:
+            yield array
+        finally:
+            del array
+
+    def unlink(self):
+        pass
+
+
+Pcm = Union[SharedArray, MappedPcm]
+
+
+def release(value: Any):
+    if isinstance(value, (SharedArray, MappedPcm)):
+        value.unlink()
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            release(item)
@@ -0,0 +1,108 @@
+import asyncio
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config.base import settings
+from app.config.logger import get_logger
+from app.services.redis import RedisService
+
+logger = get_logger(__name__)
+
+
+class SingleFlightService:
+    def __init__(self, redis_service: RedisService):
+        self.redis = redis_service
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Any:
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                return await self._lead(key, fn, lookup)
+
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+    async def _lead(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await self._run_distributed(key, fn, lookup)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
+
+    async def _run_distributed(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Any:
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SINGLEFLIGHT_WAIT_TIMEOUT
+
+        while True:
+            acquired = await self.redis.set_nx(lock_key, token, settings.SINGLEFLIGHT_LOCK_TTL)
+            if acquired is None:
+                return await fn()
+
+            if acquired:
+                return await self._run_locked(lock_key, token, fn, lookup)
+
+            cached = await lookup()
+            if cached is not None:
+                return cached
+
+            if loop.time() >= deadline:
+                logger.warning(f"Timed out waiting for {lock_key}, running without the lock")
+                return await fn()
+
+            await asyncio.sleep(settings.SINGLEFLIGHT_POLL_INTERVAL)
+
+    async def _run_locked(
+        self,
+        lock_key: str,
+        token: str,
+        fn: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Any:
+        renewal = asyncio.create_task(self._renew(lock_key, token))
+        try:
+            cached = await lookup()
+            if cached is not None:
+                return cached
+            return await fn()
+        finally:
+            renewal.cancel()
+            await self.redis.release_lock(lock_key, token)
+
+    async def _renew(self, lock_key: str, token: str):
+        ttl = settings.SINGLEFLIGHT_LOCK_TTL
+        while True:
+            await asyncio.sleep(ttl / 3)
+            if not await self.redis.extend_lock(lock_key, token, ttl):
+                logger.warning(f"Lost lease on {lock_key}")
+                return
@@ -0,0 +1,294 @@
+import asyncio
+import shutil
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import librosa
+import numpy as np
+import soxr
+
+from app.config.base import settings
+from app.services.classifier import ClassifierService
+
+PCM_FORMATS = {
+    "s16le": ("<i2", 32768.0),
+    "s32le": ("<i4", 2147483648.0),
+    "f32le": ("<f4", 1.0),
+}
+
+
+class PcmDecoder:
+    def __init__(self, sample_format: str, channels: int):
+        dtype, self.scale = PCM_FORMATS[sample_format]
+        self.dtype = np.dtype(dtype)
+        self.channels = channels
+        self.frame_size = self.dtype.itemsize * channels
+        self.remainder = b""
+
+    def decode(self, chunk: bytes) -> np.ndarray:
+        data = self.remainder + chunk
+        usable = len(data) - len(data) % self.frame_size
+        self.remainder = data[usable:]
+
+        samples = np.frombuffer(data[:usable], dtype=self.dtype).astype(np.float32)
+        samples /= self.scale
+        return samples.reshape(-1, self.channels).mean(axis=1)
+
+
+class StreamAnalyzer:
+    def __init__(
+        self,
+        sample_rate: int,
+        update_interval: float = settings.STREAM_UPDATE_INTERVAL,
+        time_constant: float = settings.STREAM_TIME_CONSTANT,
+        tempo_window: float = settings.STREAM_TEMPO_WINDOW,
+        n_fft: int = 2048,
+        hop_length: int = 512,
+        kernel_size: int = 31,
+    ):
+        self.classifier = ClassifierService()
+        self.sr = self.classifier.sr
+        self.resampler = (
+            soxr.ResampleStream(sample_rate, self.sr, 1, dtype="float32")
+            if sample_rate != self.sr
+            else None
+        )
+
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.kernel_size = kernel_size
+        self.window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+        self.frequencies = librosa.fft_frequencies(sr=self.sr, n_fft=n_fft)
+        self.mel_basis = librosa.filters.mel(sr=self.sr, n_fft=n_fft)
+        self.decay = float(np.exp(-hop_length / (self.sr * time_constant)))
+
+        self.buffer = np.zeros(n_fft - hop_length, dtype=np.float32)
+        self.history = np.zeros((kernel_size - 1, n_fft // 2 + 1), dtype=np.float32)
+        self.previous_mel = None
+        self.peak_db = -np.inf
+        self.onsets = np.zeros(int(tempo_window * self.sr / hop_length), dtype=np.float32)
+        self.filled = 0
+
+        self.update_samples = max(hop_length, int(update_interval * self.sr))
+        self.next_update = self.update_samples
+        self.total = 0
+        self.stats = dict.fromkeys(
+            ["weight", "power", "zcr", "centroid", "energy", "harmonic"], 0.0
+        )
+
+    def feed(self, samples: np.ndarray) -> List[Dict[str, float]]:
+        if self.resampler:
+            samples = self.resampler.resample_chunk(samples)
+
+        updates = []
+        while len(samples):
+            remaining = self.next_update - self.total
+            part, samples = samples[:remaining], samples[remaining:]
+            self._process(part)
+
+            if self.total >= self.next_update:
+                updates.append(self.snapshot())
+                self.next_update += self.update_samples
+        return updates
+
+    def finish(self) -> Dict[str, float]:
+        if self.resampler:
+            self._process(self.resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, float]:
+        stats = self.stats
+        weight = stats["weight"] or 1.0
+        features = {
+            "rms": float(np.sqrt(stats["power"] / weight)),
+            "zcr": stats["zcr"] / weight,
+            "spectral_centroid": stats["centroid"] / weight,
+            "tempo": self._tempo(),
+            "harmonic_ratio": stats["harmonic"] / (stats["energy"] + 1e-8),
+        }
+        classification, confidence = self.classifier.classify_features(features)
+
+        return {
+            "time": round(self.total / self.sr, 3),
+            "classification": classification,
+            "confidence": confidence,
+            "features": {name: round(float(value), 6) for name, value in features.items()},
+        }
+
+    def _process(self, samples: np.ndarray):
+        self.total += len(samples)
+        self.buffer = np.concatenate([self.buffer, samples.astype(np.float32, copy=False)])
+
+        count = (len(self.buffer) - self.n_fft) // self.hop_length + 1
+        if count <= 0:
+            return
+
+        step = self.hop_length
+        consumed = count * step
+        frames = np.lib.stride_tricks.sliding_window_view(self.buffer, self.n_fft)[::step][:count]
+        self.buffer = self.buffer[consumed:]
+
+        context = step + 1
+        recent = frames[:, -context:]
+        signs = np.signbit(recent)
+        magnitude = np.abs(np.fft.rfft(frames * self.window, axis=1)).astype(np.float32)
+        power = magnitude**2
+
+        self._accumulate(
+            weight=np.ones(count),
+            power=np.mean(recent[:, 1:] ** 2, axis=1),
+            zcr=np.mean(signs[:, 1:] != signs[:, :-1], axis=1),
+            centroid=(magnitude @ self.frequencies) / (magnitude.sum(axis=1) + 1e-10),
+            energy=power.sum(axis=1),
+            harmonic=np.sum(power * self._harmonic_mask(magnitude) ** 2, axis=1),
+        )
+        self._push_onsets(power)
+
+    def _accumulate(self, **values: np.ndarray):
+        count = len(next(iter(values.values())))
+        weights = (1 - self.decay) * self.decay ** np.arange(count - 1, -1, -1)
+        for name, value in values.items():
+            self.stats[name] = self.decay**count * self.stats[name] + float(weights @ value)
+
+    def _harmonic_mask(self, magnitude: np.ndarray) -> np.ndarray:
+        width = self.kernel_size
+        stacked = np.concatenate([self.history, magnitude])
+        keep = width - 1
+        self.history = stacked[-keep:]
+
+        harmonic = np.median(
+            np.lib.stride_tricks.sliding_window_view(stacked, width, axis=0), axis=-1
+        )
+        padded = np.pad(magnitude, ((0, 0), (width // 2, width // 2)), mode="reflect")
+        percussive = np.median(
+            np.lib.stride_tricks.sliding_window_view(padded, width, axis=1), axis=-1
+        )
+
+        harmonic, percussive = harmonic**2, percussive**2
+        return harmonic / (harmonic + percussive + 1e-10)
+
+    def _push_onsets(self, power: np.ndarray):
+        mel = librosa.power_to_db(power @ self.mel_basis.T, top_db=None)
+        self.peak_db = max(self.peak_db, float(mel.max()))
+        mel = np.maximum(mel, self.peak_db - 80.0)
+        previous = mel[:1] if self.previous_mel is None else self.previous_mel
+        self.previous_mel = mel[-1:]
+
+        flux = np.maximum(0.0, np.diff(np.concatenate([previous, mel]), axis=0))
+        onsets = np.median(flux, axis=1).astype(np.float32)
+
+        size = len(self.onsets)
+        self.onsets = np.concatenate([self.onsets, onsets])[-size:]
+        self.filled = min(len(self.onsets), self.filled + len(onsets))
+
+    def _tempo(self) -> float:
+        filled = self.filled
+        onsets = self.onsets[-filled:]
+        if self.filled * self.hop_length < 2 * self.sr or not onsets.any():
+            return 0.0
+        try:
+            tempo = librosa.feature.tempo(
+                onset_envelope=onsets, sr=self.sr, hop_length=self.hop_length
+            )
+            return float(tempo[0])
+        except Exception:
+            return 0.0
+
+
+class FfmpegDecoder:
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+    async def start(self):
+        if not shutil.which("ffmpeg"):
+            raise RuntimeError("ffmpeg is not available")
+
+        self.process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-i",
+            "pipe:0",
+            "-f",
+            "f32le",
+            "-ac",
+            "1",
+            "-ar",
+            str(self.sample_rate),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+
+    async def write(self, chunk: bytes):
+        self.process.stdin.write(chunk)
+        await self.process.stdin.drain()
+
+    def close_input(self):
+        if not self.process.stdin.is_closing():
+            self.process.stdin.close()
+
+    async def read(self) -> bytes:
+        return await self.process.stdout.read(settings.DOWNLOAD_CHUNK_SIZE)
+
+    async def close(self):
+        if self.process and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+
+class StreamingService:
+    def __init__(self, sample_format: str, sample_rate: int, channels: int):
+        self.sample_format = sample_format
+        self.analyzer = StreamAnalyzer(sample_rate)
+        if sample_format == "encoded":
+            self.decoder = PcmDecoder("f32le", 1)
+            self.ffmpeg = FfmpegDecoder(sample_rate)
+        else:
+            self.decoder = PcmDecoder(sample_format, channels)
+            self.ffmpeg = None
+
+    async def run(
+        self,
+        receive: Callable[[], Awaitable[Optional[bytes]]],
+        send: Callable[[Dict], Awaitable[None]],
+    ):
+        if self.ffmpeg:
+            await self._run_encoded(receive, send)
+        else:
+            while (chunk := await receive()) is not None:
+                await self._feed(chunk, send)
+
+        await send({**await asyncio.to_thread(self.analyzer.finish), "final": True})
+
+    async def _run_encoded(self, receive, send):
+        await self.ffmpeg.start()
+
+        async def pump():
+            try:
+                while (chunk := await receive()) is not None:
+                    await self.ffmpeg.write(chunk)
+            finally:
+                self.ffmpeg.close_input()
+
+        async def drain():
+            while data := await self.ffmpeg.read():
+                await self._feed(data, send)
+
+        writer = asyncio.create_task(pump())
+        reader = asyncio.create_task(drain())
+        try:
+            done, _ = await asyncio.wait({writer, reader}, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            writer.cancel()
+            reader.cancel()
+            await self.ffmpeg.close()
+            await asyncio.gather(writer, reader, return_exceptions=True)
+
+    async def _feed(self, chunk: bytes, send: Callable[[Dict], Awaitable[None]]):
+        samples = self.decoder.decode(chunk)
+        if len(samples):
+            for update in await asyncio.to_thread(self.analyzer.feed, samples):
+                await send(update)
@@ -0,0 +1,95 @@
+from contextlib import ExitStack
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config.base import settings
+from app.models.audio import (
+    AudioFormat,
+    AudioStream,
+    ClassificationResult,
+    DecodedAudio,
+    TimelineSegment,
+)
+from app.services.classifier import ClassifierService
+from app.services.decoder import DecoderService
+from app.services.shared import Pcm, SharedArray
+
+_decoder: Optional[DecoderService] = None
+_classifier: Optional[ClassifierService] = None
+
+
+def init_worker():
+    global _decoder, _classifier
+    _decoder = DecoderService()
+    _classifier = ClassifierService()
+
+    noise = np.random.default_rng(0).uniform(-0.1, 0.1, _classifier.sr).astype(np.float32)
+    _classifier.extract_features(noise, _classifier.sr)
+
+
+def ping() -> bool:
+    return True
+
+
+def decode(
+    file_path: str,
+    duration: Optional[float] = None,
+    offset: float = 0.0,
+    audio_format: Optional[AudioFormat] = None,
+) -> Tuple[AudioStream, Pcm]:
+    if audio_format in (AudioFormat.WAV, None):
+        mapped = _get_decoder().map(file_path, duration, offset)
+        if mapped:
+            return mapped
+
+    decoded = _get_decoder().decode(file_path, duration, offset, audio_format)
+    return decoded.stream, SharedArray.from_array(decoded.samples)
+
+
+def classify(stream: AudioStream, pcm: Pcm) -> ClassificationResult:
+    with pcm.open() as samples:
+        return _get_classifier().classify(DecodedAudio(stream=stream, samples=samples))
+
+
+def classify_batch(
+    streams: List[AudioStream], pcms: List[Pcm]
+) -> List[Optional[ClassificationResult]]:
+    with ExitStack() as stack:
+        audios = {}
+        for index, (stream, pcm) in enumerate(zip(streams, pcms)):
+            try:
+                samples = stack.enter_context(pcm.open())
+            except FileNotFoundError:
+                continue
+            audios[index] = DecodedAudio(stream=stream, samples=samples)
+
+        results = dict(zip(audios, _get_classifier().classify_batch(list(audios.values()))))
+        return [results.get(index) for index in range(len(streams))]
+
+
+def timeline(file_path: str, audio_format: Optional[AudioFormat] = None) -> List[TimelineSegment]:
+    def read(offset: float, duration: float) -> DecodedAudio:
+        if audio_format in (AudioFormat.WAV, None):
+            mapped = _get_decoder().map(file_path, duration, offset)
+            if mapped:
+                stream, pcm = mapped
+                with pcm.open() as samples:
+                    return DecodedAudio(stream=stream, samples=np.array(samples))
+        return _get_decoder().decode(file_path, duration, offset, audio_format)
+
+    return _get_classifier().timeline_blocks(read, settings.TIMELINE_WINDOW)
+
+
+def _get_decoder() -> DecoderService:
+    global _decoder
+    if _decoder is None:
+        _decoder = DecoderService()
+    return _decoder
+
+
+def _get_classifier() -> ClassifierService:
+    global _classifier
+    if _classifier is None:
+        _classifier = ClassifierService()
+    return _classifier
@@ -0,0 +1,51 @@
+import asyncio
+import signal
+
+from app.config.logger import get_logger, setup_logging
+from app.repository.cache import CacheRepository
+from app.services.analyzer import AudioAnalyzerService
+from app.services.downloader import DownloaderService
+from app.services.executor import ExecutorService
+from app.services.job_worker import JobWorker
+from app.services.jobs import JobService
+from app.services.metrics import MetricsService
+from app.services.redis import RedisService
+
+logger = get_logger(__name__)
+
+
+async def run_worker():
+    setup_logging()
+    logger.info("Starting audio analyzer job worker")
+
+    redis_service = RedisService()
+    await redis_service.connect()
+
+    metrics_service = MetricsService()
+
+    cache_repository = CacheRepository(redis_service, metrics_service)
+    await cache_repository.start()
+
+    executor_service = ExecutorService()
+    await executor_service.start()
+
+    downloader_service = DownloaderService()
+    await downloader_service.start()
+
+    analyzer = AudioAnalyzerService(
+        redis_service, executor_service, downloader_service, cache_repository, metrics_service
+    )
+    worker = JobWorker(redis_service, JobService(redis_service), analyzer)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        logger.info("Shutting down job worker")
+        await downloader_service.close()
+        await executor_service.close()
+        await cache_repository.close()
+        await redis_service.close()
@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import sys
+
+from benchmarks.stages import BenchmarkEnvironment, run_all
+from benchmarks.stats import load_baseline, regression, save_baseline
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the audio analyzer benchmarks")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    with BenchmarkEnvironment() as env:
+        results = asyncio.run(run_all(env, args.repeat))
+
+    baseline = load_baseline()
+    failures = []
+    for result in results:
+        print(result.summary())
+        failure = regression(result, baseline.get(result.name))
+        if failure:
+            failures.append(failure)
+
+    if args.update_baseline:
+        save_baseline(results)
+        print("Baseline updated")
+        return 0
+
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
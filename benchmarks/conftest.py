@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+from benchmarks.stages import BenchmarkEnvironment
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: performance benchmark compared to baseline.json")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("RUN_BENCHMARKS") == "1":
+        return
+    skip = pytest.mark.skip(reason="set RUN_BENCHMARKS=1 to run benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def environment():
+    with BenchmarkEnvironment() as env:
+        yield env
@@ -0,0 +1,189 @@
+import io
+import struct
+from typing import Callable, Dict, List
+
+import numpy as np
+import soundfile as sf
+from pydantic import BaseModel
+from scipy import signal
+
+SUBTYPES = {
+    "wav": "PCM_16",
+    "flac": "PCM_16",
+    "ogg": "VORBIS",
+    "mp3": "MPEG_LAYER_III",
+}
+
+WRITE_BLOCK = 8192
+OGG_SERIAL = 0x5EED
+
+
+def _ogg_crc_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7 if crc & 0x80000000 else crc << 1) & 0xFFFFFFFF
+        table.append(crc)
+    return table
+
+
+OGG_CRC_TABLE = _ogg_crc_table()
+
+
+class CorpusItem(BaseModel):
+    name: str
+    kind: str
+    format: str
+    duration: float
+    sample_rate: int
+    channels: int
+    data: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+def silence(rng: np.random.Generator, n: int, sr: int) -> np.ndarray:
+    return np.zeros(n)
+
+
+def tone(rng: np.random.Generator, n: int, sr: int) -> np.ndarray:
+    t = np.arange(n) / sr
+    return 0.4 * np.sin(2 * np.pi * 440 * t) + 0.1 * np.sin(2 * np.pi * 880 * t)
+
+
+def noise(rng: np.random.Generator, n: int, sr: int) -> np.ndarray:
+    return rng.uniform(-0.3, 0.3, n)
+
+
+def speech(rng: np.random.Generator, n: int, sr: int) -> np.ndarray:
+    t = np.arange(n) / sr
+    pitch = 120 * (1 + 0.1 * np.sin(2 * np.pi * 0.7 * t)) + rng.normal(0, 2, n)
+    pulses = (np.diff(np.floor(np.cumsum(pitch) / sr), prepend=0) > 0).astype(float)
+
+    voiced = np.zeros(n)
+    for formant, bandwidth in ((500, 80), (1500, 120), (2500, 160)):
+        radius = np.exp(-np.pi * bandwidth / sr)
+        theta = 2 * np.pi * formant / sr
+        voiced += signal.lfilter([1.0], [1.0, -2 * radius * np.cos(theta), radius**2], pulses)
+
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    pauses = (np.sin(2 * np.pi * 0.25 * t) > -0.7).astype(float)
+    speech = voiced * syllables * pauses + 0.002 * rng.standard_normal(n)
+    return 0.5 * speech / (np.max(np.abs(speech)) + 1e-9)
+
+
+def music(rng: np.random.Generator, n: int, sr: int) -> np.ndarray:
+    t = np.arange(n) / sr
+    chord = sum(
+        np.sin(2 * np.pi * f * h * t) / h for f in (220.0, 277.18, 329.63) for h in (1, 2, 3)
+    )
+
+    beat = int(sr * 0.5)
+    decay = np.exp(-np.arange(beat) / (0.03 * sr))
+    kick = np.sin(2 * np.pi * 60 * np.arange(beat) / sr) * decay
+    drums = np.tile(kick + 0.3 * rng.uniform(-1, 1, beat) * decay**4, n // beat + 1)[:n]
+
+    mix = 0.15 * chord + 0.5 * drums
+    return 0.6 * mix / np.max(np.abs(mix))
+
+
+KINDS: Dict[str, Callable[[np.random.Generator, int, int], np.ndarray]] = {
+    "silence": silence,
+    "tone": tone,
+    "noise": noise,
+    "speech": speech,
+    "music": music,
+}
+
+
+def synthesize(
+    kind: str, duration: float, sample_rate: int, channels: int, seed: int
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    mono = KINDS[kind](rng, int(duration * sample_rate), sample_rate)
+    if channels == 1:
+        return mono.astype(np.float32)
+    return np.stack([mono] * channels, axis=1).astype(np.float32)
+
+
+def encode(samples: np.ndarray, sample_rate: int, audio_format: str) -> bytes:
+    buffer = io.BytesIO()
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    with sf.SoundFile(
+        buffer,
+        "w",
+        sample_rate,
+        channels,
+        subtype=SUBTYPES[audio_format],
+        format=audio_format.upper(),
+    ) as f:
+        for start in range(0, len(samples), WRITE_BLOCK):
+            end = start + WRITE_BLOCK
+            f.write(samples[start:end])
+
+    data = buffer.getvalue()
+    return fix_ogg_serial(data) if audio_format == "ogg" else data
+
+
+def variant(data: bytes, index: int) -> bytes:
+    if not data.startswith(b"RIFF"):
+        return data
+    return data[:-4] + struct.pack("<I", index)
+
+
+def fix_ogg_serial(data: bytes) -> bytes:
+    pages = bytearray(data)
+    position = 0
+    while position + 27 <= len(pages) and pages.startswith(b"OggS", position):
+        table = position + 27
+        table_end = table + pages[position + 26]
+        end = table_end + sum(pages[table:table_end])
+
+        struct.pack_into("<I", pages, position + 14, OGG_SERIAL)
+        struct.pack_into("<I", pages, position + 22, 0)
+        crc = 0
+        for byte in pages[position:end]:
+            crc = ((crc << 8) & 0xFFFFFFFF) ^ OGG_CRC_TABLE[(crc >> 24) ^ byte]
+        struct.pack_into("<I", pages, position + 22, crc)
+        position = end
+    return bytes(pages)
+
+
+def generate(
+    kinds: List[str] = list(KINDS),
+    formats: List[str] = list(SUBTYPES),
+    durations: List[float] = [5.0],
+    sample_rates: List[int] = [44100],
+    seed: int = 0,
+) -> List[CorpusItem]:
+    items = []
+    for kind in kinds:
+        channels = 2 if kind == "music" else 1
+        for duration in durations:
+            for sample_rate in sample_rates:
+                samples = synthesize(kind, duration, sample_rate, channels, seed)
+                for audio_format in formats:
+                    items.append(
+                        CorpusItem(
+                            name=f"{kind}-{int(duration)}s-{sample_rate}.{audio_format}",
+                            kind=kind,
+                            format=audio_format,
+                            duration=duration,
+                            sample_rate=sample_rate,
+                            channels=channels,
+                            data=encode(samples, sample_rate, audio_format),
+                        )
+                    )
+    return items
+
+
+def default_corpus(seed: int = 0) -> List[CorpusItem]:
+    return [
+        *generate(seed=seed),
+        *generate(kinds=["speech"], formats=["wav"], sample_rates=[16000, 22050], seed=seed),
+        *generate(kinds=["music"], formats=["flac"], sample_rates=[48000], seed=seed),
+        *generate(kinds=["music", "speech"], formats=["wav", "mp3"], durations=[30.0], seed=seed),
+    ]
@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Dict, List, Literal, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from app.config.base import settings
+from benchmarks.corpus import generate
+from benchmarks.origin import OriginServer
+from benchmarks.redis_server import RedisProcess, RedisStandIn
+from benchmarks.stages import analyzer_client
+from benchmarks.stats import BenchmarkResult
+
+
+class LoadTestConfig(BaseModel):
+    mode: Literal["closed", "open"] = "closed"
+    concurrency: int = 8
+    rate: float = 10.0
+    duration: float = 30.0
+    requests: int = 0
+    hot_urls: int = 10
+    hot_ratio: float = 0.8
+    warmup: bool = False
+    timeline: bool = False
+    latency: float = 0.0
+    bandwidth: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class Sample(BaseModel):
+    hot: bool
+    latency: float
+    status: int
+
+
+class LoadTestReport(BaseModel):
+    config: LoadTestConfig
+    elapsed: float
+    requests: int
+    succeeded: int
+    statuses: Dict[str, int]
+    overall: BenchmarkResult
+    hot: BenchmarkResult
+    cold: BenchmarkResult
+    origin_requests: int
+    origin_errors: int
+
+    @classmethod
+    def from_samples(
+        cls, config: LoadTestConfig, samples: List[Sample], elapsed: float, origin: OriginServer
+    ) -> "LoadTestReport":
+        def result(name: str, selected: List[Sample]) -> BenchmarkResult:
+            return BenchmarkResult.from_timings(
+                name, [sample.latency for sample in selected], elapsed
+            )
+
+        statuses = Counter(str(sample.status or "error") for sample in samples)
+        return cls(
+            config=config,
+            elapsed=elapsed,
+            requests=len(samples),
+            succeeded=sum(200 <= sample.status < 300 for sample in samples),
+            statuses=dict(sorted(statuses.items())),
+            overall=result("overall", samples),
+            hot=result("hot", [sample for sample in samples if sample.hot]),
+            cold=result("cold", [sample for sample in samples if not sample.hot]),
+            origin_requests=origin.requests,
+            origin_errors=origin.errors,
+        )
+
+    def summary(self) -> str:
+        config = self.config
+        load = (
+            f"concurrency={config.concurrency}"
+            if config.mode == "closed"
+            else f"rate={config.rate:g}/s"
+        )
+        lines = [
+            f"mode={config.mode} {load} hot_urls={config.hot_urls} hot_ratio={config.hot_ratio:g}",
+            f"requests={self.requests} succeeded={self.succeeded} elapsed={self.elapsed:.1f}s "
+            f"goodput={self.succeeded / self.elapsed if self.elapsed else 0.0:.1f}/s",
+            f"statuses={self.statuses}",
+            f"origin requests={self.origin_requests} injected_errors={self.origin_errors}",
+            self.overall.summary(),
+            self.hot.summary(),
+            self.cold.summary(),
+        ]
+        return "\n".join(lines)
+
+
+class Workload:
+    def __init__(
+        self, origin: OriginServer, names: List[str], hot_urls: int, hot_ratio: float, seed: int
+    ):
+        self.origin = origin
+        self.names = names
+        self.hot_ratio = hot_ratio
+        self.hot = [self.url(index) for index in range(hot_urls)]
+        self._cold = itertools.count(hot_urls)
+        self._random = random.Random(seed)
+
+    def url(self, index: int) -> str:
+        return self.origin.url(self.names[index % len(self.names)], index)
+
+    def next(self) -> Tuple[str, bool]:
+        if self.hot and self._random.random() < self.hot_ratio:
+            return self._random.choice(self.hot), True
+        return self.url(next(self._cold)), False
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, workload: Workload, config: LoadTestConfig):
+        self.client = client
+        self.workload = workload
+        self.config = config
+        self.samples: List[Sample] = []
+        self.elapsed = 0.0
+        self._issued = 0
+        self._random = random.Random(config.seed)
+
+    async def run(self) -> List[Sample]:
+        if self.config.warmup:
+            await asyncio.gather(*(self.analyze(url) for url in self.workload.hot))
+
+        self.samples = []
+        self._issued = 0
+        start = time.perf_counter()
+        deadline = start + self.config.duration
+        if self.config.mode == "closed":
+            await asyncio.gather(*(self._worker(deadline) for _ in range(self.config.concurrency)))
+        else:
+            await self._arrivals(deadline)
+        self.elapsed = time.perf_counter() - start
+        return self.samples
+
+    def _admit(self, deadline: float) -> bool:
+        if self.config.requests and self._issued >= self.config.requests:
+            return False
+        if not self.config.requests and time.perf_counter() >= deadline:
+            return False
+        self._issued += 1
+        return True
+
+    async def _worker(self, deadline: float):
+        while self._admit(deadline):
+            url, hot = self.workload.next()
+            await self.request(url, hot, time.perf_counter())
+
+    async def _arrivals(self, deadline: float):
+        tasks = []
+        scheduled = time.perf_counter()
+        while self._admit(deadline):
+            scheduled += self._random.expovariate(self.config.rate)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            url, hot = self.workload.next()
+            tasks.append(asyncio.create_task(self.request(url, hot, scheduled)))
+        await asyncio.gather(*tasks)
+
+    async def request(self, url: str, hot: bool, scheduled: float):
+        status = await self.analyze(url)
+        self.samples.append(Sample(hot=hot, latency=time.perf_counter() - scheduled, status=status))
+
+    async def analyze(self, url: str) -> int:
+        payload = {"audio_url": url, "timeline": self.config.timeline}
+        try:
+            response = await self.client.post("/v1/audio/analyze", json=payload)
+            return response.status_code
+        except httpx.HTTPError:
+            return 0
+
+
+async def run(
+    config: LoadTestConfig,
+    target: Optional[str] = None,
+    redis_mode: str = "thread",
+    origin_host: str = "127.0.0.1",
+) -> LoadTestReport:
+    corpus = generate(formats=["wav"], durations=[5.0, 15.0], sample_rates=[22050, 44100])
+    origin = OriginServer(
+        {item.name: item.data for item in corpus},
+        host=origin_host,
+        latency=config.latency,
+        bandwidth=config.bandwidth,
+        error_rate=config.error_rate,
+        seed=config.seed,
+    )
+    workload = Workload(
+        origin, [item.name for item in corpus], config.hot_urls, config.hot_ratio, config.seed
+    )
+
+    redis_url = settings.REDIS_URL
+    with ExitStack() as stack:
+        stack.enter_context(origin)
+        if not target:
+            redis = RedisProcess() if redis_mode == "process" else RedisStandIn()
+            settings.REDIS_URL = stack.enter_context(redis).url
+            stack.callback(setattr, settings, "REDIS_URL", redis_url)
+
+        async with analyzer_client(target, max(config.concurrency, 100)) as (client, _):
+            loadtest = LoadTest(client, workload, config)
+            samples = await loadtest.run()
+
+        return LoadTestReport.from_samples(config, samples, loadtest.elapsed, origin)
+
+
+def main() -> int:
+    defaults = LoadTestConfig()
+    parser = argparse.ArgumentParser(description="Drive /v1/audio/analyze against a local origin")
+    parser.add_argument("--mode", choices=["closed", "open"], default=defaults.mode)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--rate", type=float, default=defaults.rate, help="open-loop req/s")
+    parser.add_argument("--duration", type=float, default=defaults.duration)
+    parser.add_argument("--requests", type=int, default=defaults.requests)
+    parser.add_argument("--hot-urls", type=int, default=defaults.hot_urls)
+    parser.add_argument("--hot-ratio", type=float, default=defaults.hot_ratio)
+    parser.add_argument("--warmup", action="store_true")
+    parser.add_argument("--timeline", action="store_true")
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="origin seconds")
+    parser.add_argument("--bandwidth", type=float, default=defaults.bandwidth, help="bytes/s")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--target", help="base URL of a running service instead of in-process")
+    parser.add_argument("--redis", choices=["thread", "process"], default="thread")
+    parser.add_argument("--origin-host", default="127.0.0.1")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    config = LoadTestConfig(
+        **{name: getattr(args, name) for name in LoadTestConfig.model_fields if name in vars(args)}
+    )
+    report = asyncio.run(run(config, args.target, args.redis, args.origin_host))
+    print(report.model_dump_json(indent=2) if args.json else report.summary())
+    return 0 if report.succeeded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
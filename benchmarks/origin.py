@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from benchmarks.corpus import variant
+
+CONTENT_TYPES = {
+    "wav": "audio/wav",
+    "flac": "audio/flac",
+    "ogg": "audio/ogg",
+    "mp3": "audio/mpeg",
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    server: "OriginServer"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].lstrip("/")
+        fail = self.server.record_request()
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        if fail:
+            self.send_error(503)
+            return
+
+        data = self.server.resolve(path)
+        if data is None:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header(
+            "Content-Type", CONTENT_TYPES.get(path.rsplit(".", 1)[-1], "application/octet-stream")
+        )
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.send_body(data)
+
+    def send_body(self, data: bytes):
+        if self.server.bandwidth <= 0:
+            self.wfile.write(data)
+            return
+
+        start = time.monotonic()
+        for offset in range(0, len(data), CHUNK_SIZE):
+            end = offset + CHUNK_SIZE
+            self.wfile.write(data[offset:end])
+            delay = start + min(end, len(data)) / self.server.bandwidth - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OriginServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        files: Optional[Dict[str, bytes]] = None,
+        host: str = "127.0.0.1",
+        latency: float = 0.0,
+        bandwidth: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__((host, 0), OriginHandler)
+        self.files: Dict[str, bytes] = dict(files or {})
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, name: str, index: Optional[int] = None) -> str:
+        if index is None:
+            return f"{self.base_url}/{name}"
+        return f"{self.base_url}/{index}/{name}"
+
+    def resolve(self, path: str) -> Optional[bytes]:
+        index, _, name = path.rpartition("/")
+        data = self.files.get(name)
+        if data is None or not index:
+            return data
+        return variant(data, int(index)) if index.isdigit() else None
+
+    def record_request(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            self.errors += fail
+            return fail
+
+    def start(self) -> "OriginServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="origin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "OriginServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+OK = b"+OK\r\n"
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return encode(value.encode())
+    if isinstance(value, Exception):
+        return b"-ERR %s\r\n" % str(value).encode()
+    return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+
+
+class RedisStandIn:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self.commands = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    def start(self) -> "RedisStandIn":
+        self._thread = threading.Thread(target=self._run, name="redis-stand-in", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def flush(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._flush(), self._loop).result()
+
+    async def _flush(self):
+        self.data.clear()
+
+    def __enter__(self) -> "RedisStandIn":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self.serve())
+        self._ready.set()
+        self._loop.run_forever()
+        self._server.close()
+        self._loop.run_until_complete(self._server.wait_closed())
+        self._loop.close()
+
+    async def serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                command = await self._read_command(reader)
+                if command is None:
+                    break
+                self.commands += 1
+                writer.write(self.execute(command, writer))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for subscribers in self.channels.values():
+                subscribers.discard(writer)
+            writer.close()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+
+        args = []
+        for _ in range(int(line[1:])):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    def execute(self, command: List[bytes], writer: asyncio.StreamWriter) -> bytes:
+        name, args = command[0].upper().decode(), command[1:]
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return encode(ValueError(f"unknown command '{name}'"))
+        try:
+            if name in ("SUBSCRIBE", "UNSUBSCRIBE"):
+                return handler(writer, *args)
+            return handler(*args)
+        except (TypeError, ValueError, IndexError) as e:
+            return encode(ValueError(str(e)))
+
+    def _lookup(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def _store(self, key: bytes, value: bytes, ttl: Optional[float] = None):
+        self.data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+
+    def cmd_ping(self, *args) -> bytes:
+        return encode(args[0]) if args else b"+PONG\r\n"
+
+    def cmd_client(self, *args) -> bytes:
+        return OK
+
+    def cmd_select(self, *args) -> bytes:
+        return OK
+
+    def cmd_config(self, *args) -> bytes:
+        return OK if args[0].upper() == b"SET" else encode([])
+
+    def cmd_flushdb(self, *args) -> bytes:
+        self.data.clear()
+        return OK
+
+    def cmd_get(self, key: bytes) -> bytes:
+        return encode(self._lookup(key))
+
+    def cmd_mget(self, *keys: bytes) -> bytes:
+        return encode([self._lookup(key) for key in keys])
+
+    def cmd_set(self, key: bytes, value: bytes, *options: bytes) -> bytes:
+        ttl, nx, options = None, False, [option.upper() for option in options]
+        for i, option in enumerate(options):
+            if option == b"EX":
+                ttl = float(options[i + 1])
+            elif option == b"PX":
+                ttl = float(options[i + 1]) / 1000
+            elif option == b"NX":
+                nx = True
+        if nx and self._lookup(key) is not None:
+            return encode(None)
+        self._store(key, value, ttl)
+        return OK
+
+    def cmd_setex(self, key: bytes, ttl: bytes, value: bytes) -> bytes:
+        self._store(key, value, float(ttl))
+        return OK
+
+    def cmd_del(self, *keys: bytes) -> bytes:
+        return encode(sum(self.data.pop(key, None) is not None for key in keys))
+
+    def cmd_pexpire(self, key: bytes, ttl: bytes) -> bytes:
+        value = self._lookup(key)
+        if value is None:
+            return encode(0)
+        self._store(key, value, float(ttl) / 1000)
+        return encode(1)
+
+    def cmd_pttl(self, key: bytes) -> bytes:
+        if self._lookup(key) is None:
+            return encode(-2)
+        expires = self.data[key][1]
+        return encode(-1 if expires is None else int((expires - time.monotonic()) * 1000))
+
+    def cmd_xgroup(self, *args) -> bytes:
+        return OK
+
+    def cmd_eval(self, script: bytes, numkeys: bytes, key: bytes, token: bytes, *args) -> bytes:
+        if self._lookup(key) != token:
+            return encode(0)
+        if b'"pexpire"' in script:
+            return self.cmd_pexpire(key, args[0])
+        if b'"del"' in script:
+            return self.cmd_del(key)
+        return encode(ValueError("unsupported script"))
+
+    def cmd_publish(self, channel: bytes, message: bytes) -> bytes:
+        subscribers = self.channels.get(channel, set())
+        payload = encode([b"message", channel, message])
+        for writer in list(subscribers):
+            writer.write(payload)
+        return encode(len(subscribers))
+
+    def cmd_subscribe(self, writer: asyncio.StreamWriter, *channels: bytes) -> bytes:
+        replies = []
+        for channel in channels:
+            self.channels.setdefault(channel, set()).add(writer)
+            count = sum(writer in subscribers for subscribers in self.channels.values())
+            replies.append(encode([b"subscribe", channel, count]))
+        return b"".join(replies)
+
+    def cmd_unsubscribe(self, writer: asyncio.StreamWriter, *channels: bytes) -> bytes:
+        replies = []
+        for channel in channels or [c for c, s in self.channels.items() if writer in s]:
+            self.channels.get(channel, set()).discard(writer)
+            count = sum(writer in subscribers for subscribers in self.channels.values())
+            replies.append(encode([b"unsubscribe", channel, count]))
+        return b"".join(replies) or encode([b"unsubscribe", None, 0])
+
+
+class RedisProcess:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    def start(self) -> "RedisProcess":
+        self._process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.redis_server",
+                "--host",
+                self.host,
+                "--port",
+                str(self.port),
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.port = int(self._process.stdout.readline().rsplit(":", 1)[1].split("/")[0])
+        return self
+
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            self._process.wait()
+            self._process = None
+
+    def flush(self):
+        with socket.create_connection((self.host, self.port)) as connection:
+            connection.sendall(encode([b"FLUSHDB"]))
+            connection.recv(16)
+
+    def __enter__(self) -> "RedisProcess":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory Redis stand-in for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6399)
+    args = parser.parse_args()
+
+    server = RedisStandIn(args.host, args.port).start()
+    print(server.url, flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import asyncio
+import os
+import tempfile
+from contextlib import ExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI
+
+from app.config.base import settings
+from app.models.audio import AudioFormat, DecodedAudio
+from app.repository.cache import CacheRepository
+from app.services.analyzer import AudioAnalyzerService
+from app.services.classifier import ClassifierService
+from app.services.decoder import DecoderService
+from app.services.downloader import DownloaderService
+from app.services.executor import ExecutorService
+from app.services.redis import RedisService
+from benchmarks.corpus import CorpusItem, default_corpus
+from benchmarks.origin import OriginServer
+from benchmarks.redis_server import RedisStandIn
+from benchmarks.stats import BenchmarkResult, Timer
+
+
+class BenchmarkEnvironment:
+    def __init__(self, corpus: Optional[List[CorpusItem]] = None):
+        self.corpus = corpus if corpus is not None else default_corpus()
+        self.origin = OriginServer({item.name: item.data for item in self.corpus})
+        self.redis = RedisStandIn()
+        self.paths: Dict[str, str] = {}
+        self._stack = ExitStack()
+        self._redis_url = settings.REDIS_URL
+
+    def __enter__(self) -> "BenchmarkEnvironment":
+        self._stack.enter_context(self.origin)
+        self._stack.enter_context(self.redis)
+        directory = self._stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-"))
+        for item in self.corpus:
+            path = os.path.join(directory, item.name)
+            with open(path, "wb") as f:
+                f.write(item.data)
+            self.paths[item.name] = path
+
+        settings.REDIS_URL = self.redis.url
+        return self
+
+    def __exit__(self, *exc):
+        settings.REDIS_URL = self._redis_url
+        self._stack.close()
+
+    def url(self, item: CorpusItem) -> str:
+        return self.origin.url(item.name)
+
+    def items(self, formats: Optional[List[str]] = None, max_duration: float = 0.0):
+        return [
+            item
+            for item in self.corpus
+            if (formats is None or item.format in formats)
+            and (not max_duration or item.duration <= max_duration)
+        ]
+
+
+async def bench_download(env: BenchmarkEnvironment, repeat: int = 3) -> BenchmarkResult:
+    downloader = DownloaderService()
+    timer, total = Timer(), 0
+    try:
+        for _ in range(repeat):
+            for item in env.items():
+                with timer:
+                    metadata = await downloader.download(env.url(item))
+                downloader.cleanup(metadata.temp_path)
+                total += metadata.file_size
+    finally:
+        await downloader.close()
+    return timer.result("download", total / 2**20, "MiB")
+
+
+async def bench_decode(env: BenchmarkEnvironment, repeat: int = 3) -> List[BenchmarkResult]:
+    executor = ExecutorService()
+    await executor.start()
+    analyzer = AudioAnalyzerService(RedisService(), executor=executor)
+    results = []
+    try:
+        for audio_format in sorted({item.format for item in env.corpus}):
+            timer, audio_seconds = Timer(), 0.0
+            for _ in range(repeat):
+                for item in env.items([audio_format]):
+                    with timer:
+                        _, pcm = await analyzer.decode(
+                            env.paths[item.name], audio_format=AudioFormat(audio_format)
+                        )
+                    pcm.unlink()
+                    audio_seconds += item.duration
+            results.append(timer.result(f"decode.{audio_format}", audio_seconds, "audio_s"))
+    finally:
+        await executor.close()
+    return results
+
+
+def decoded(env: BenchmarkEnvironment) -> List[DecodedAudio]:
+    decoder = DecoderService()
+    return [
+        decoder.decode(env.paths[item.name], settings.CLASSIFY_WINDOW)
+        for item in env.items(["wav", "flac"])
+    ]
+
+
+def bench_features(env: BenchmarkEnvironment, repeat: int = 3) -> BenchmarkResult:
+    classifier = ClassifierService()
+    audios = decoded(env)
+    timer, audio_seconds = Timer(), 0.0
+    for _ in range(repeat):
+        for audio in audios:
+            with timer:
+                classifier.extract_features(classifier.prepare(audio), classifier.sr)
+            audio_seconds += audio.stream.duration
+    return timer.result("features", audio_seconds, "audio_s")
+
+
+def bench_classify(env: BenchmarkEnvironment, repeat: int = 3) -> List[BenchmarkResult]:
+    classifier = ClassifierService()
+    audios = decoded(env)
+
+    single = Timer()
+    for _ in range(repeat):
+        for audio in audios:
+            with single:
+                classifier.classify(audio)
+
+    batch = Timer()
+    for _ in range(repeat):
+        with batch:
+            classifier.classify_batch(audios)
+
+    return [
+        single.result("classify"),
+        batch.result("classify.batch", repeat * len(audios), "files"),
+    ]
+
+
+async def bench_cache(env: BenchmarkEnvironment, repeat: int = 200) -> List[BenchmarkResult]:
+    redis_service = RedisService()
+    await redis_service.connect()
+    cache = CacheRepository(redis_service)
+    payload = {
+        "classification": "music",
+        "confidence": 0.9,
+        "features": {"duration": 10.0, "sample_rate": 44100, "channels": 2},
+    }
+    urls = [f"{env.origin.base_url}/cache-{i}.wav" for i in range(repeat)]
+
+    stored, remote, local = Timer(), Timer(), Timer()
+    try:
+        for i, url in enumerate(urls):
+            with stored:
+                await cache.set(url, payload, content_hash=f"{i:064x}")
+        for url in urls:
+            cache.local.clear()
+            with remote:
+                await cache.get(url)
+        for url in urls:
+            with local:
+                await cache.get(url)
+    finally:
+        await redis_service.close()
+
+    return [stored.result("cache.set"), remote.result("cache.get"), local.result("cache.get.local")]
+
+
+@asynccontextmanager
+async def analyzer_client(
+    target: Optional[str] = None, max_connections: int = 100
+) -> AsyncIterator[Tuple[httpx.AsyncClient, Optional[FastAPI]]]:
+    limits = httpx.Limits(max_connections=max_connections)
+    timeout = httpx.Timeout(settings.DOWNLOAD_TIMEOUT * 4)
+    if target:
+        async with httpx.AsyncClient(base_url=target, limits=limits, timeout=timeout) as client:
+            yield client, None
+        return
+
+    from app.main import create_app, lifespan
+
+    app = create_app()
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", limits=limits, timeout=timeout
+        ) as client:
+            yield client, app
+
+
+async def bench_endpoint(
+    env: BenchmarkEnvironment, repeat: int = 2, concurrency: int = 8
+) -> List[BenchmarkResult]:
+    urls = [env.url(item) for item in env.items(max_duration=settings.CLASSIFY_WINDOW)]
+
+    async with analyzer_client() as (client, app):
+
+        async def analyze(url: str, timer: Timer):
+            with timer:
+                response = await client.post("/v1/audio/analyze", json={"audio_url": url})
+            response.raise_for_status()
+
+        cold = Timer()
+        for _ in range(repeat):
+            for url in urls:
+                env.redis.flush()
+                app.state.audio_analyzer_service.cache.local.clear()
+                await analyze(url, cold)
+
+        primed = Timer()
+        for url in urls:
+            await analyze(url, primed)
+
+        warm = Timer()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(url: str):
+            async with semaphore:
+                await analyze(url, warm)
+
+        await asyncio.gather(*(bounded(url) for _ in range(repeat * 10) for url in urls))
+
+    return [cold.result("endpoint.cold"), warm.result("endpoint.warm")]
+
+
+async def run_all(env: BenchmarkEnvironment, repeat: int = 3) -> List[BenchmarkResult]:
+    results = [await bench_download(env, repeat)]
+    results.extend(await bench_decode(env, repeat))
+    results.append(bench_features(env, repeat))
+    results.extend(bench_classify(env, repeat))
+    results.extend(await bench_cache(env))
+    results.extend(await bench_endpoint(env, max(1, repeat // 2)))
+    return results
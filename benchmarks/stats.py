@@ -0,0 +1,90 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.5"))
+
+
+class BenchmarkResult(BaseModel):
+    name: str
+    samples: int
+    elapsed: float
+    p50: float
+    p95: float
+    p99: float
+    throughput: float
+    unit: str = "ops"
+
+    @classmethod
+    def from_timings(
+        cls, name: str, timings: List[float], elapsed: float, work: float = 0.0, unit: str = "ops"
+    ) -> "BenchmarkResult":
+        p50, p95, p99 = np.percentile(timings, [50, 95, 99]) if timings else (0.0, 0.0, 0.0)
+        return cls(
+            name=name,
+            samples=len(timings),
+            elapsed=elapsed,
+            p50=float(p50),
+            p95=float(p95),
+            p99=float(p99),
+            throughput=(work or len(timings)) / elapsed if elapsed > 0 else 0.0,
+            unit=unit,
+        )
+
+    def summary(self) -> str:
+        return (
+            f"{self.name:<32} n={self.samples:<5} p50={self.p50 * 1000:9.2f}ms "
+            f"p95={self.p95 * 1000:9.2f}ms p99={self.p99 * 1000:9.2f}ms "
+            f"{self.throughput:10.1f} {self.unit}/s"
+        )
+
+
+class Timer:
+    def __init__(self):
+        self.timings: List[float] = []
+        self.started: Optional[float] = None
+
+    def __enter__(self) -> "Timer":
+        self._start = time.perf_counter()
+        if self.started is None:
+            self.started = self._start
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.append(time.perf_counter() - self._start)
+
+    def result(self, name: str, work: float = 0.0, unit: str = "ops") -> BenchmarkResult:
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        return BenchmarkResult.from_timings(name, self.timings, elapsed, work, unit)
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, BenchmarkResult]:
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text())
+    return {name: BenchmarkResult(**result) for name, result in data.items()}
+
+
+def save_baseline(results: List[BenchmarkResult], path: Path = BASELINE_PATH):
+    data = {result.name: result.model_dump() for result in sorted(results, key=lambda r: r.name)}
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def regression(
+    result: BenchmarkResult, baseline: Optional[BenchmarkResult], tolerance: float = TOLERANCE
+) -> Optional[str]:
+    if baseline is None:
+        return None
+    limit = baseline.p50 * (1 + tolerance)
+    if result.p50 > limit:
+        return (
+            f"{result.name}: p50 {result.p50 * 1000:.2f}ms exceeds baseline "
+            f"{baseline.p50 * 1000:.2f}ms by more than {tolerance:.0%}"
+        )
+    return None
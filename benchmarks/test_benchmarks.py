@@ -0,0 +1,180 @@
+import asyncio
+import io
+import time
+from typing import List
+
+import httpx
+import pytest
+import soundfile as sf
+
+from benchmarks import stages
+from benchmarks.corpus import KINDS, SUBTYPES, generate
+from benchmarks.loadtest import LoadTest, LoadTestConfig, LoadTestReport, Workload, run
+from benchmarks.origin import OriginServer
+from benchmarks.stats import BenchmarkResult, load_baseline, regression
+
+BASELINE = load_baseline()
+
+
+def assert_no_regression(results: List[BenchmarkResult]):
+    failures = [regression(result, BASELINE.get(result.name)) for result in results]
+    assert not [failure for failure in failures if failure], failures
+
+
+class TestCorpus:
+    def test_generation_is_deterministic(self):
+        first = generate(durations=[1.0], sample_rates=[8000])
+        second = generate(durations=[1.0], sample_rates=[8000])
+        assert [item.data for item in first] == [item.data for item in second]
+
+    def test_corpus_decodes(self):
+        items = generate(durations=[1.0], sample_rates=[16000])
+        assert {item.kind for item in items} == set(KINDS)
+        assert {item.format for item in items} == set(SUBTYPES)
+
+        for item in items:
+            info = sf.info(io.BytesIO(item.data))
+            assert info.samplerate == 16000
+            assert info.channels == item.channels
+            assert info.duration == pytest.approx(1.0, abs=0.1)
+
+
+class TestOrigin:
+    def test_serves_unique_variants(self):
+        item = generate(kinds=["tone"], formats=["wav"], durations=[1.0])[0]
+        with OriginServer({item.name: item.data}) as origin:
+            first = httpx.get(origin.url(item.name, 1))
+            second = httpx.get(origin.url(item.name, 2))
+            missing = httpx.get(origin.url("missing.wav"))
+
+        assert first.status_code == second.status_code == 200
+        assert first.content != second.content
+        assert sf.info(io.BytesIO(first.content)).frames == sf.info(io.BytesIO(item.data)).frames
+        assert missing.status_code == 404
+
+    def test_injects_errors_latency_and_bandwidth(self):
+        data = bytes(200_000)
+        with OriginServer({"a.wav": data}, latency=0.1, bandwidth=1_000_000) as origin:
+            start = time.perf_counter()
+            response = httpx.get(origin.url("a.wav"))
+            elapsed = time.perf_counter() - start
+
+            origin.error_rate = 1.0
+            failed = httpx.get(origin.url("a.wav"))
+
+        assert response.content == data
+        assert elapsed >= 0.3
+        assert failed.status_code == 503
+        assert origin.requests == 2
+        assert origin.errors == 1
+
+
+class TestWorkload:
+    def test_hot_ratio_and_unique_cold_urls(self):
+        with OriginServer() as origin:
+            workload = Workload(origin, ["a.wav", "b.wav"], hot_urls=5, hot_ratio=0.8, seed=1)
+            picks = [workload.next() for _ in range(2000)]
+
+        hot = [url for url, is_hot in picks if is_hot]
+        cold = [url for url, is_hot in picks if not is_hot]
+        assert len(hot) / len(picks) == pytest.approx(0.8, abs=0.03)
+        assert set(hot) <= set(workload.hot)
+        assert len(set(cold)) == len(cold)
+        assert not set(cold) & set(workload.hot)
+
+
+@pytest.mark.asyncio
+class TestLoadTest:
+    def client(self, delay: float = 0.01):
+        state = {"active": 0, "peak": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(delay)
+            state["active"] -= 1
+            return httpx.Response(200, json={})
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://t"), state
+
+    async def test_closed_loop_respects_concurrency(self):
+        client, state = self.client()
+        config = LoadTestConfig(concurrency=4, requests=40, hot_urls=2)
+        with OriginServer() as origin:
+            workload = Workload(origin, ["a.wav"], config.hot_urls, config.hot_ratio, config.seed)
+            async with client:
+                samples = await LoadTest(client, workload, config).run()
+            report = LoadTestReport.from_samples(config, samples, 1.0, origin)
+
+        assert len(samples) == 40
+        assert state["peak"] == 4
+        assert report.succeeded == 40
+        assert report.statuses == {"200": 40}
+        assert report.hot.samples + report.cold.samples == 40
+
+    async def test_open_loop_follows_arrival_rate(self):
+        client, state = self.client(delay=0.2)
+        config = LoadTestConfig(mode="open", rate=200.0, duration=0.5)
+        with OriginServer() as origin:
+            workload = Workload(origin, ["a.wav"], config.hot_urls, config.hot_ratio, config.seed)
+            async with client:
+                loadtest = LoadTest(client, workload, config)
+                samples = await loadtest.run()
+
+        assert 50 <= len(samples) <= 150
+        assert state["peak"] > 8
+        assert min(sample.latency for sample in samples) >= 0.2
+
+
+class TestRegression:
+    def test_regression_allows_tolerance(self):
+        baseline = BenchmarkResult.from_timings("stage", [0.010] * 5, 0.05)
+        result = BenchmarkResult.from_timings("stage", [0.014] * 5, 0.07)
+
+        assert regression(result, baseline, tolerance=0.5) is None
+        assert regression(result, baseline, tolerance=0.2) is not None
+        assert regression(result, None) is None
+
+    def test_percentiles_and_throughput(self):
+        result = BenchmarkResult.from_timings("stage", [0.001 * i for i in range(1, 101)], 2.0)
+
+        assert result.p50 == pytest.approx(0.0505)
+        assert result.p99 == pytest.approx(0.09901)
+        assert result.throughput == pytest.approx(50.0)
+
+
+@pytest.mark.benchmark
+class TestStageBenchmarks:
+    def test_features(self, environment):
+        assert_no_regression([stages.bench_features(environment, repeat=1)])
+
+    def test_classify(self, environment):
+        assert_no_regression(stages.bench_classify(environment, repeat=1))
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+class TestAsyncBenchmarks:
+    async def test_decode(self, environment):
+        assert_no_regression(await stages.bench_decode(environment, repeat=2))
+
+    async def test_download(self, environment):
+        assert_no_regression([await stages.bench_download(environment, repeat=2)])
+
+    async def test_cache(self, environment):
+        assert_no_regression(await stages.bench_cache(environment))
+
+    async def test_endpoint(self, environment):
+        assert_no_regression(await stages.bench_endpoint(environment, repeat=1))
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+class TestLoadTestHarness:
+    async def test_closed_loop_against_service(self):
+        config = LoadTestConfig(concurrency=4, requests=12, hot_urls=2, error_rate=0.1, seed=3)
+        report = await run(config)
+
+        assert report.requests == 12
+        assert report.succeeded + report.origin_errors >= 12
+        assert report.overall.p50 > 0
@@ -6,12 +6,22 @@ import pytest_asyncio
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 
-from app.api.dependencies import get_audio_analyzer_service, get_metrics_service
+from app.api.dependencies import (
+    get_audio_analyzer_service,
+    get_job_service,
+    get_metrics_service,
+)
 from app.main import create_app
 from app.services.analyzer import AudioAnalyzerService
+from app.services.jobs import JobService
+from app.services.profiler import ProfilerService
 from app.services.redis import RedisService
 
 
+def pytest_configure(config):
+    config.addinivalue_line("markers", "integration: tests that need a running Redis server")
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     loop = asyncio.new_event_loop()
@@ -64,15 +74,25 @@ def mock_metrics_service():
 
 
 @pytest.fixture
-def test_app(mock_redis_service, mock_audio_analyzer_service, mock_metrics_service):
+def mock_job_service():
+    return AsyncMock(spec=JobService)
+
+
+@pytest.fixture
+def test_app(
+    mock_redis_service, mock_audio_analyzer_service, mock_metrics_service, mock_job_service
+):
     app = create_app()
 
     app.dependency_overrides[get_audio_analyzer_service] = lambda: mock_audio_analyzer_service
     app.dependency_overrides[get_metrics_service] = lambda: mock_metrics_service
+    app.dependency_overrides[get_job_service] = lambda: mock_job_service
 
     app.state.redis_service = mock_redis_service
     app.state.audio_analyzer_service = mock_audio_analyzer_service
     app.state.metrics_service = mock_metrics_service
+    app.state.job_service = mock_job_service
+    app.state.profiler_service = ProfilerService(mock_redis_service)
 
     yield app
 
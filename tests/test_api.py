@@ -1,5 +1,28 @@
+import json
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
 
+from app.models.job import AnalysisJob, JobStatus
+from app.models.profile import ProfileReport
+
+
+def make_job(**kwargs) -> AnalysisJob:
+    now = datetime.now(timezone.utc)
+    fields = {
+        "job_id": "abc123",
+        "audio_url": "https://example.com/test.wav",
+        "status": JobStatus.QUEUED,
+        "created_at": now,
+        "updated_at": now,
+    }
+    fields.update(kwargs)
+    return AnalysisJob(**fields)
+
 
 class TestHealthEndpoints:
 
@@ -30,6 +53,30 @@ class TestAudioAnalysisEndpoints:
             assert response.status_code == 200
             assert response.json()["status"] == "success"
 
+    def test_analyze_audio_timeline(
+        self, client: TestClient, mock_audio_analyzer_service, sample_audio_data
+    ):
+        mock_audio_analyzer_service.analyze_audio.return_value = {
+            **sample_audio_data,
+            "timeline": [[0.0, 2.5, "silence", 0.95], [2.5, 5.23, "music", 0.8]],
+        }
+
+        response = client.post(
+            "/v1/audio/analyze",
+            json={"audio_url": "https://example.com/test.wav", "timeline": True},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["data"]["timeline"][1] == {
+            "start": 2.5,
+            "end": 5.23,
+            "classification": "music",
+            "confidence": 0.8,
+        }
+        mock_audio_analyzer_service.analyze_audio.assert_called_once_with(
+            "https://example.com/test.wav", timeline=True
+        )
+
     def test_analyze_audio_invalid_format(self, client: TestClient):
         response = client.post(
             "/v1/audio/analyze", json={"audio_url": "https://example.com/test.txt"}
@@ -72,6 +119,206 @@ class TestAudioAnalysisEndpoints:
         assert "Internal server error" in response.json()["detail"]
 
 
+class TestBatchAnalysisEndpoints:
+
+    def test_analyze_batch_streams_ndjson(
+        self, client: TestClient, mock_audio_analyzer_service, sample_audio_data
+    ):
+        async def analyze_batch(urls):
+            for url in urls:
+                if "missing" in url:
+                    yield url, None, FileNotFoundError("HTTP 404")
+                else:
+                    yield url, sample_audio_data, None
+
+        mock_audio_analyzer_service.analyze_batch = analyze_batch
+
+        response = client.post(
+            "/v1/audio/analyze/batch",
+            json={
+                "audio_urls": [
+                    "https://example.com/a.wav",
+                    "https://example.com/missing.mp3",
+                    "https://example.com/a.wav",
+                    "https://example.com/notes.txt",
+                ]
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        items = sorted(
+            (json.loads(line) for line in response.text.splitlines()), key=lambda i: i["index"]
+        )
+        assert [item["status"] for item in items] == ["success", "error", "success", "error"]
+        assert items[0]["data"]["classification"] == "music"
+        assert items[2]["audio_url"] == "https://example.com/a.wav"
+        assert items[1]["error"] == "Audio file not found"
+        assert items[3]["error"] == "Invalid audio URL"
+
+    def test_analyze_batch_empty(self, client: TestClient):
+        response = client.post("/v1/audio/analyze/batch", json={"audio_urls": []})
+        assert response.status_code == 422
+
+    def test_analyze_batch_too_many_urls(self, client: TestClient):
+        urls = [f"https://example.com/{i}.wav" for i in range(1001)]
+
+        response = client.post("/v1/audio/analyze/batch", json={"audio_urls": urls})
+        assert response.status_code == 422
+
+
+class TestJobEndpoints:
+
+    def test_submit_job(self, client: TestClient, mock_job_service):
+        mock_job_service.submit.return_value = make_job()
+
+        response = client.post(
+            "/v1/audio/jobs",
+            json={
+                "audio_url": "https://example.com/test.wav",
+                "callback_url": "https://hooks.example.com/done",
+            },
+        )
+
+        assert response.status_code == 202
+        assert response.json()["job_id"] == "abc123"
+        assert response.json()["status"] == "queued"
+        mock_job_service.submit.assert_called_once_with(
+            "https://example.com/test.wav", "https://hooks.example.com/done", timeline=False
+        )
+
+    def test_submit_job_invalid_format(self, client: TestClient):
+        response = client.post("/v1/audio/jobs", json={"audio_url": "https://example.com/x.txt"})
+        assert response.status_code == 422
+
+    def test_submit_job_queue_unavailable(self, client: TestClient, mock_job_service):
+        mock_job_service.submit.side_effect = ConnectionError("Job queue is unavailable")
+
+        response = client.post("/v1/audio/jobs", json={"audio_url": "https://example.com/a.wav"})
+        assert response.status_code == 503
+
+    def test_get_finished_job(self, client: TestClient, mock_job_service, sample_audio_data):
+        mock_job_service.get.return_value = make_job(
+            status=JobStatus.SUCCEEDED, result=sample_audio_data, attempts=1
+        )
+
+        response = client.get("/v1/audio/jobs/abc123")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["data"]["classification"] == "music"
+
+    def test_get_unknown_job(self, client: TestClient, mock_job_service):
+        mock_job_service.get.return_value = None
+
+        response = client.get("/v1/audio/jobs/unknown")
+        assert response.status_code == 404
+
+
+class TestStreamingEndpoints:
+
+    def test_stream_pcm(self, client: TestClient):
+        sr = 16000
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(sr * 3) / sr)
+        stereo = np.repeat((tone * 32767).astype("<i2"), 2).tobytes()
+
+        with client.websocket_connect(
+            f"/v1/audio/stream?format=s16le&sample_rate={sr}&channels=2"
+        ) as websocket:
+            for start in range(0, len(stereo), 6001):
+                end = start + 6001
+                websocket.send_bytes(stereo[start:end])
+            websocket.send_text("end")
+
+            updates = []
+            while not updates or not updates[-1]["final"]:
+                updates.append(websocket.receive_json())
+
+        assert [update["time"] for update in updates[:3]] == [1.0, 2.0, 3.0]
+        assert updates[-1]["features"]["rms"] == pytest.approx(0.3535, abs=0.01)
+        assert updates[-1]["features"]["spectral_centroid"] == pytest.approx(440, abs=20)
+
+    def test_stream_rejects_unknown_format(self, client: TestClient):
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect("/v1/audio/stream?format=u8") as websocket:
+                websocket.receive_json()
+
+        assert exc_info.value.code == 1008
+
+
+class TestProfilingEndpoints:
+
+    @pytest.fixture
+    def profiling(self):
+        with patch("app.services.profiler.settings.PROFILING_ENABLED", True):
+            with patch("app.services.profiler.settings.PROFILING_TOKEN", "secret"):
+                yield
+
+    def test_profile_header_ignored_when_disabled(
+        self, client: TestClient, mock_audio_analyzer_service
+    ):
+        response = client.post(
+            "/v1/audio/analyze",
+            json={"audio_url": "https://example.com/test.wav"},
+            headers={"X-Profile-Token": "secret"},
+        )
+
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        mock_audio_analyzer_service.analyze_audio.assert_called_once()
+        mock_audio_analyzer_service.analyze_fresh.assert_not_called()
+
+    def test_profile_header_profiles_request(
+        self, client: TestClient, mock_audio_analyzer_service, mock_redis_service, profiling
+    ):
+        mock_audio_analyzer_service.analyze_fresh.return_value = (
+            mock_audio_analyzer_service.analyze_audio.return_value
+        )
+
+        response = client.post(
+            "/v1/audio/analyze",
+            json={"audio_url": "https://example.com/test.wav"},
+            headers={"X-Profile-Token": "secret"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["data"]["classification"] == "music"
+        profile_id = response.headers["x-profile-id"]
+        mock_audio_analyzer_service.analyze_fresh.assert_called_once_with(
+            "https://example.com/test.wav", timeline=False
+        )
+        assert mock_redis_service.setex.call_args[0][0] == f"audio:profile:{profile_id}"
+
+    def test_admin_endpoints_hidden_without_token(self, client: TestClient, profiling):
+        response = client.get("/v1/admin/profiles/abc", headers={"X-Profile-Token": "wrong"})
+        assert response.status_code == 404
+
+        response = client.post(
+            "/v1/admin/profile", json={"audio_url": "https://example.com/test.wav"}
+        )
+        assert response.status_code == 404
+
+    def test_get_profile_collapsed(self, client: TestClient, mock_redis_service, profiling):
+        report = ProfileReport(
+            profile_id="abc",
+            audio_url="https://example.com/test.wav",
+            duration=1.5,
+            samples=3,
+            peak_memory=1024,
+            stacks={"worker;tasks.py:classify": 2, "loop;base_events.py:run_forever": 1},
+        )
+        mock_redis_service.get.return_value = report.model_dump_json()
+
+        response = client.get(
+            "/v1/admin/profiles/abc?collapsed=true", headers={"X-Profile-Token": "secret"}
+        )
+
+        assert response.status_code == 200
+        assert response.text == ("worker;tasks.py:classify 2\nloop;base_events.py:run_forever 1\n")
+        mock_redis_service.get.assert_called_once_with("audio:profile:abc")
+
+
 class TestMetricsEndpoints:
 
     def test_prometheus_metrics_endpoint(self, client: TestClient):
@@ -1,8 +1,11 @@
-from unittest.mock import AsyncMock
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from app.repository.cache import CacheRepository
+from app.repository.local_cache import LocalCache
 from app.services.redis import RedisService
 
 
@@ -33,21 +36,23 @@ class TestCacheRepository:
     @pytest.mark.asyncio
     async def test_get_cache_hit(self, cache_repository, mock_redis_service):
         test_data = {"duration": 5.0, "classification": "music"}
-        mock_redis_service.get.return_value = '{"duration": 5.0, "classification": "music"}'
+        mock_redis_service.mget_with_ttl.return_value = [
+            ('{"duration": 5.0, "classification": "music"}', None)
+        ]
 
         result = await cache_repository.get("https://example.com/test.wav")
 
         assert result == test_data
-        mock_redis_service.get.assert_called_once()
+        mock_redis_service.mget_with_ttl.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_get_cache_miss(self, cache_repository, mock_redis_service):
-        mock_redis_service.get.return_value = None
+        mock_redis_service.mget_with_ttl.return_value = [(None, None)]
 
         result = await cache_repository.get("https://example.com/test.wav")
 
         assert result is None
-        mock_redis_service.get.assert_called_once()
+        mock_redis_service.mget_with_ttl.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_get_redis_disconnected(self, cache_repository, mock_redis_service):
@@ -56,7 +61,7 @@ class TestCacheRepository:
         result = await cache_repository.get("https://example.com/test.wav")
 
         assert result is None
-        mock_redis_service.get.assert_not_called()
+        mock_redis_service.mget_with_ttl.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_set_success(self, cache_repository, mock_redis_service):
@@ -99,7 +104,7 @@ class TestCacheRepository:
         url = "https://example.com/test.wav"
         test_data = {"duration": 5.0, "classification": "music"}
 
-        mock_redis_service.get.return_value = None
+        mock_redis_service.mget_with_ttl.return_value = [(None, None)]
         result = await cache_repository.get(url)
         assert result is None
 
@@ -107,6 +112,235 @@ class TestCacheRepository:
         set_result = await cache_repository.set(url, test_data, 3600)
         assert set_result is True
 
-        mock_redis_service.get.return_value = '{"duration": 5.0, "classification": "music"}'
+        mock_redis_service.mget_with_ttl.return_value = [
+            ('{"duration": 5.0, "classification": "music"}', None)
+        ]
         cached_result = await cache_repository.get(url)
         assert cached_result == test_data
+
+    @pytest.mark.asyncio
+    async def test_get_served_from_local_cache(self, cache_repository, mock_redis_service):
+        mock_redis_service.mget_with_ttl.return_value = [
+            ('{"duration": 5.0, "classification": "music"}', None)
+        ]
+
+        first = await cache_repository.get("https://example.com/test.wav")
+        second = await cache_repository.get("https://example.com/test.wav")
+
+        assert first == second == {"duration": 5.0, "classification": "music"}
+        mock_redis_service.mget_with_ttl.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_local_entry_expires_with_redis_ttl(self, cache_repository, mock_redis_service):
+        mock_redis_service.mget_with_ttl.return_value = [('{"classification": "music"}', 2.0)]
+
+        with patch("app.repository.local_cache.time.monotonic", return_value=100.0):
+            await cache_repository.get("https://example.com/test.wav")
+
+        with patch("app.repository.local_cache.time.monotonic", return_value=103.0):
+            await cache_repository.get("https://example.com/test.wav")
+
+        assert mock_redis_service.mget_with_ttl.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_fill_is_not_cached(
+        self, cache_repository, mock_redis_service
+    ):
+        url = "https://example.com/test.wav"
+        key = cache_repository.generate_key(url)
+
+        async def mget_with_ttl(keys):
+            cache_repository._handle_invalidation(f"other-node:{key}")
+            return [('{"classification": "music"}', None)]
+
+        mock_redis_service.mget_with_ttl.side_effect = mget_with_ttl
+
+        assert await cache_repository.get(url) == {"classification": "music"}
+        assert len(cache_repository.local) == 0
+        assert cache_repository._fills == {}
+
+    @pytest.mark.asyncio
+    async def test_set_publishes_invalidation(self, cache_repository, mock_redis_service):
+        mock_redis_service.setex.return_value = True
+
+        await cache_repository.set("https://example.com/test.wav", {"duration": 5.0}, 3600)
+
+        channel, message = mock_redis_service.publish.call_args[0]
+        assert message == f"{cache_repository.node_id}:" + cache_repository.generate_key(
+            "https://example.com/test.wav"
+        )
+
+    @pytest.mark.asyncio
+    async def test_remote_invalidation_evicts_local_entry(self, cache_repository):
+        key = cache_repository.generate_key("https://example.com/test.wav")
+        cache_repository.local.set(key, {"duration": 5.0})
+
+        cache_repository._handle_invalidation(f"{cache_repository.node_id}:{key}")
+        assert len(cache_repository.local) == 1
+
+        cache_repository._handle_invalidation(f"other-node:{key}")
+        assert len(cache_repository.local) == 0
+
+    @pytest.mark.asyncio
+    async def test_invalidation_listener(self, cache_repository, mock_redis_service):
+        key = cache_repository.generate_key("https://example.com/test.wav")
+        received = asyncio.Event()
+
+        async def listen():
+            cache_repository.local.set(key, {"duration": 5.0})
+            yield {"type": "message", "data": f"other-node:{key}"}
+            received.set()
+            await asyncio.Event().wait()
+
+        pubsub = MagicMock()
+        pubsub.listen = listen
+        pubsub.aclose = AsyncMock()
+        mock_redis_service.subscribe.return_value = pubsub
+
+        await cache_repository.start()
+        await asyncio.wait_for(received.wait(), 1)
+        await cache_repository.close()
+
+        assert len(cache_repository.local) == 0
+        pubsub.aclose.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self, cache_repository, mock_redis_service):
+        mock_redis_service.delete.return_value = True
+        key = cache_repository.generate_key("https://example.com/test.wav")
+        cache_repository.local.set(key, {"duration": 5.0})
+
+        assert await cache_repository.invalidate("https://example.com/test.wav") is True
+        assert len(cache_repository.local) == 0
+        mock_redis_service.delete.assert_called_once_with(key)
+        mock_redis_service.publish.assert_called_once()
+
+
+class TestLocalCache:
+
+    @pytest.fixture
+    def metrics(self):
+        return MagicMock()
+
+    def test_lru_eviction(self, metrics):
+        cache = LocalCache(max_size=2, ttl=60, metrics=metrics)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        cache.get("a")
+        cache.set("c", {"v": 3})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        assert cache.get("c") == {"v": 3}
+        metrics.record_local_cache_eviction.assert_called_once_with("capacity")
+
+    def test_ttl_expiry(self, metrics):
+        cache = LocalCache(max_size=10, ttl=60, metrics=metrics)
+
+        with patch("app.repository.local_cache.time.monotonic", return_value=100.0):
+            cache.set("a", {"v": 1}, ttl=5)
+
+        with patch("app.repository.local_cache.time.monotonic", return_value=104.0):
+            assert cache.get("a") == {"v": 1}
+
+        with patch("app.repository.local_cache.time.monotonic", return_value=106.0):
+            assert cache.get("a") is None
+
+        metrics.record_local_cache_eviction.assert_called_once_with("expired")
+
+    def test_hit_and_miss_metrics(self, metrics):
+        cache = LocalCache(max_size=10, ttl=60, metrics=metrics)
+        cache.get("a")
+        cache.set("a", {"v": 1})
+        cache.get("a")
+
+        assert [c.kwargs["hit"] for c in metrics.record_local_cache.call_args_list] == [
+            False,
+            True,
+        ]
+
+    def test_disabled_when_size_is_zero(self, metrics):
+        cache = LocalCache(max_size=0, ttl=60, metrics=metrics)
+        cache.set("a", {"v": 1})
+
+        assert cache.get("a") is None
+
+    def test_returned_values_are_copies(self, metrics):
+        cache = LocalCache(max_size=10, ttl=60, metrics=metrics)
+        cache.set("a", {"v": 1})
+        cache.get("a")["v"] = 2
+
+        assert cache.get("a") == {"v": 1}
+
+
+class TestContentAddressedCache:
+
+    @pytest.fixture
+    def redis_store(self):
+        return {}
+
+    @pytest.fixture
+    def cache_repository(self, redis_store):
+        mock_redis = AsyncMock(spec=RedisService)
+        mock_redis.is_connected.return_value = True
+
+        async def setex(key, ttl, value):
+            redis_store[key] = value
+            return True
+
+        async def mget_with_ttl(keys):
+            return [(redis_store.get(key), None) for key in keys]
+
+        mock_redis.setex.side_effect = setex
+        mock_redis.mget_with_ttl.side_effect = mget_with_ttl
+        return CacheRepository(mock_redis)
+
+    @pytest.mark.asyncio
+    async def test_url_key_points_to_content_entry(self, cache_repository, redis_store):
+        data = {"duration": 5.0, "classification": "music"}
+        content_hash = "cd" * 32
+
+        assert await cache_repository.set("https://a.example.com/x.wav", data, 60, content_hash)
+
+        url_key = cache_repository.generate_key("https://a.example.com/x.wav")
+        content_key = cache_repository.generate_content_key(content_hash)
+        assert json.loads(redis_store[url_key]) == {"ref": content_key}
+        assert json.loads(redis_store[content_key]) == data
+
+    @pytest.mark.asyncio
+    async def test_linked_url_resolves_to_content(self, cache_repository):
+        data = {"duration": 5.0, "classification": "music"}
+        content_hash = "cd" * 32
+        await cache_repository.set("https://a.example.com/x.wav", data, 60, content_hash)
+
+        assert await cache_repository.get("https://b.example.com/x.wav") is None
+        assert await cache_repository.get_content(content_hash) == data
+
+        await cache_repository.link("https://b.example.com/x.wav", content_hash, 60)
+        cache_repository.local.clear()
+
+        assert await cache_repository.get("https://b.example.com/x.wav") == data
+
+    @pytest.mark.asyncio
+    async def test_get_many_uses_one_mget_per_level(self, cache_repository, redis_store):
+        data = {"duration": 5.0, "classification": "music"}
+        await cache_repository.set("https://a.example.com/x.wav", data, 60, "cd" * 32)
+        redis_store[cache_repository.generate_key("https://legacy.example.com/y.wav")] = json.dumps(
+            {"classification": "speech"}
+        )
+        cache_repository.local.clear()
+
+        results = await cache_repository.get_many(
+            [
+                "https://a.example.com/x.wav",
+                "https://missing.example.com/z.wav",
+                "https://legacy.example.com/y.wav",
+            ]
+        )
+
+        assert results == {
+            "https://a.example.com/x.wav": data,
+            "https://missing.example.com/z.wav": None,
+            "https://legacy.example.com/y.wav": {"classification": "speech"},
+        }
+        assert cache_repository.redis.mget_with_ttl.call_count == 2
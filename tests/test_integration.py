@@ -1,5 +1,19 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
 from fastapi.testclient import TestClient
 
+from app.config.base import settings
+from app.models.job import JobStatus
+from app.services.analyzer import AudioAnalyzerService
+from app.services.job_worker import JobWorker
+from app.services.jobs import JobService
+from app.services.redis import RedisService
+
 
 class TestIntegration:
 
@@ -30,7 +44,7 @@ class TestIntegration:
         assert data["data"]["confidence"] == 0.92
 
         mock_audio_analyzer_service.analyze_audio.assert_called_once_with(
-            "https://example.com/test.wav"
+            "https://example.com/test.wav", timeline=False
         )
 
     def test_error_handling_workflow(self, client: TestClient, mock_audio_analyzer_service):
@@ -199,3 +213,71 @@ class TestPerformanceAndStress:
         for response in responses:
             assert response.status_code == 200
             assert response.json()["status"] == "success"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestJobQueueRedis:
+
+    @pytest_asyncio.fixture
+    async def redis_service(self):
+        service = RedisService()
+        try:
+            service.redis = redis.from_url("redis://localhost:6379/15", decode_responses=True)
+            await service.redis.ping()
+            service._connected = True
+        except Exception:
+            pytest.skip("Local Redis is not available")
+
+        stream = f"test:jobs:{uuid.uuid4().hex}"
+        with patch("app.config.base.settings.JOB_STREAM", stream):
+            yield service
+            await service.redis.delete(stream)
+        await service.close()
+
+    async def test_worker_processes_submitted_job(self, redis_service):
+        jobs = JobService(redis_service)
+        analyzer = AsyncMock(spec=AudioAnalyzerService)
+        analyzer.analyze_audio.return_value = {"classification": "speech"}
+        worker = JobWorker(redis_service, jobs, analyzer)
+
+        job = await jobs.submit("https://example.com/test.wav")
+        runner = asyncio.create_task(worker.run())
+        for _ in range(100):
+            job = await jobs.get(job.job_id)
+            if job.finished:
+                break
+            await asyncio.sleep(0.05)
+        worker.stop()
+        await runner
+
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result == {"classification": "speech"}
+
+    async def test_pending_job_is_reclaimed_after_crash(self, redis_service):
+        jobs = JobService(redis_service)
+        await jobs.start()
+        job = await jobs.submit("https://example.com/test.wav")
+
+        entries = await redis_service.xreadgroup(
+            settings.JOB_STREAM, settings.JOB_GROUP, "crashed-worker", 1, 0.1
+        )
+        assert len(entries) == 1
+
+        analyzer = AsyncMock(spec=AudioAnalyzerService)
+        analyzer.analyze_audio.return_value = {"classification": "music"}
+        worker = JobWorker(redis_service, jobs, analyzer)
+
+        with patch("app.config.base.settings.JOB_CLAIM_IDLE", 0.05):
+            await asyncio.sleep(0.1)
+            runner = asyncio.create_task(worker.run())
+            for _ in range(100):
+                job = await jobs.get(job.job_id)
+                if job.finished:
+                    break
+                await asyncio.sleep(0.05)
+            worker.stop()
+            await runner
+
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.attempts == 1
@@ -1,12 +1,45 @@
+import asyncio
+import hashlib
+import os
+import struct
+import time
+from concurrent.futures.process import BrokenProcessPool
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import av
+import httpx
+import librosa
+import numpy as np
 import pytest
+import soundfile as sf
+from fastapi import WebSocketDisconnect
+from prometheus_client import REGISTRY
 
-from app.models.audio import AudioFormat, DownloadMetadata
+from app.models.audio import (
+    AudioClassification,
+    AudioFormat,
+    AudioStream,
+    ClassificationResult,
+    DecodedAudio,
+    DownloadMetadata,
+)
+from app.models.job import JobStatus
+from app.services import tasks
 from app.services.analyzer import AudioAnalyzerService
+from app.services.batcher import ClassifyBatcher
 from app.services.classifier import ClassifierService
+from app.services.decoder import DecoderService
 from app.services.downloader import DownloaderService
+from app.services.executor import ExecutorService
+from app.services.job_worker import JobWorker
+from app.services.jobs import JobService
+from app.services.loop_monitor import LoopMonitorService
+from app.services.probe import ProbeService, sniff_format
+from app.services.profiler import ProfilerService, current_session
 from app.services.redis import RedisService
+from app.services.shared import MappedPcm, SharedArray
+from app.services.singleflight import SingleFlightService
+from app.services.streaming import PcmDecoder, StreamAnalyzer, StreamingService
 
 
 @pytest.mark.asyncio
@@ -60,6 +93,34 @@ class TestRedisService:
         result = await redis_service.setex("test_key", 60, "test_value")
         assert result is True
 
+    async def test_set_nx(self, redis_service):
+        redis_service._connected = True
+        redis_service.redis = AsyncMock()
+        redis_service.redis.set.return_value = True
+
+        assert await redis_service.set_nx("lock:key", "token", 1.5) is True
+        redis_service.redis.set.assert_called_once_with("lock:key", "token", nx=True, px=1500)
+
+        redis_service.redis.set.return_value = None
+        assert await redis_service.set_nx("lock:key", "token", 1.5) is False
+
+    async def test_set_nx_unavailable(self, redis_service):
+        redis_service._connected = False
+        assert await redis_service.set_nx("lock:key", "token", 1.0) is None
+
+        redis_service._connected = True
+        redis_service.redis = AsyncMock()
+        redis_service.redis.set.side_effect = Exception("Connection lost")
+        assert await redis_service.set_nx("lock:key", "token", 1.0) is None
+
+    async def test_release_lock(self, redis_service):
+        redis_service._connected = True
+        redis_service.redis = AsyncMock()
+        redis_service.redis.eval.return_value = 1
+
+        assert await redis_service.release_lock("lock:key", "token") is True
+        assert redis_service.redis.eval.call_args[0][1:] == (1, "lock:key", "token")
+
 
 @pytest.mark.asyncio
 class TestAudioAnalyzerService:
@@ -82,14 +143,29 @@ class TestAudioAnalyzerService:
         assert result == sample_audio_data
         analyzer_service.cache.get.assert_called_once()
 
-    async def test_analyze_audio_cache_miss(self, analyzer_service):
+    @pytest.fixture
+    def download_metadata(self):
+        return DownloadMetadata(
+            url="https://example.com/test.wav",
+            content_type="audio/wav",
+            file_size=1000,
+            temp_path="/tmp/test.wav",
+            content_hash="ab" * 32,
+        )
+
+    async def test_analyze_audio_cache_miss(self, analyzer_service, download_metadata):
+        download_metadata.format = AudioFormat.WAV
         analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
         analyzer_service.cache.set = AsyncMock(return_value=True)
-        analyzer_service.downloader.download = AsyncMock()
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
         analyzer_service.downloader.cleanup = MagicMock()
+        stream = AudioStream(sample_rate=44100, channels=2, bit_depth=16, frames=220500)
+        pcm = MagicMock()
+        analyzer_service.decode = AsyncMock(return_value=(stream, pcm))
 
         with patch.object(analyzer_service, "extract_features") as mock_extract:
-            with patch.object(analyzer_service.classifier, "classify") as mock_classify:
+            with patch.object(analyzer_service, "classify") as mock_classify:
                 mock_extract.return_value = MagicMock(
                     duration=5.0,
                     sample_rate=44100,
@@ -107,13 +183,448 @@ class TestAudioAnalyzerService:
                 assert result["duration"] == 5.0
                 assert result["classification"] == "music"
                 analyzer_service.cache.set.assert_called_once()
+                assert analyzer_service.cache.set.call_args.kwargs["content_hash"] == "ab" * 32
+                mock_classify.assert_called_once_with(stream, pcm)
+                pcm.unlink.assert_called_once()
+
+    async def test_analyze_audio_content_hit_skips_decode(
+        self, analyzer_service, download_metadata, sample_audio_data
+    ):
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=sample_audio_data)
+        analyzer_service.cache.link = AsyncMock(return_value=True)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+        analyzer_service.decode = AsyncMock()
+
+        result = await analyzer_service.analyze_audio("https://example.com/mirror.wav?sig=1")
+
+        assert result == sample_audio_data
+        analyzer_service.decode.assert_not_called()
+        analyzer_service.cache.link.assert_called_once_with(
+            "https://example.com/mirror.wav?sig=1", "ab" * 32, 3600
+        )
+        analyzer_service.downloader.cleanup.assert_called_once_with("/tmp/test.wav")
+
+    async def test_analyze_audio_rejects_long_file_before_decode(
+        self, analyzer_service, download_metadata, tmp_path
+    ):
+        path = tmp_path / "long.wav"
+        sf.write(path, np.zeros(1000, dtype=np.float32), 1, subtype="PCM_16")
+        download_metadata.temp_path = str(path)
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+        analyzer_service.decode = AsyncMock()
+
+        with patch("app.services.analyzer.settings.MAX_DURATION", 600), pytest.raises(
+            ValueError, match="Audio too long"
+        ):
+            await analyzer_service.analyze_audio("https://example.com/long.wav")
+
+        analyzer_service.decode.assert_not_called()
+
+    async def test_analyze_audio_decodes_window_when_probed(
+        self, analyzer_service, download_metadata, tmp_path
+    ):
+        path = tmp_path / "test.flac"
+        sf.write(path, np.zeros(8000 * 40, dtype=np.float32), 8000, subtype="PCM_16")
+        download_metadata.temp_path = str(path)
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.cache.set = AsyncMock(return_value=True)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+
+        result = await analyzer_service.analyze_audio("https://example.com/test.flac")
+
+        assert result["duration"] == 40.0
+        assert result["bit_depth"] == 16
+        assert result["classification"] == "silence"
+
+    async def test_analyze_audio_records_stage_metrics(
+        self, analyzer_service, download_metadata, tmp_path
+    ):
+        path = tmp_path / "test.flac"
+        sf.write(path, np.zeros(8000 * 5, dtype=np.float32), 8000, subtype="PCM_16")
+        download_metadata.temp_path = str(path)
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.cache.set = AsyncMock(return_value=True)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0.0
+
+        stages = ["cache_lookup", "download", "probe", "decode", "classify", "cache_store"]
+        before = {
+            stage: sample("audio_stage_duration_seconds_count", stage=stage) for stage in stages
+        }
+        misses = sample("audio_cache_lookups_total", key="url", result="miss")
+        downloaded = sample("audio_download_bytes_total")
+        decoded = sample("audio_decoded_samples_total")
+
+        await analyzer_service.analyze_audio("https://example.com/test.flac")
+
+        for stage in stages:
+            assert sample("audio_stage_duration_seconds_count", stage=stage) > before[stage]
+        assert sample("audio_cache_lookups_total", key="url", result="miss") == misses + 1
+        assert sample("audio_download_bytes_total") == downloaded + 1000
+        assert sample("audio_decoded_samples_total") == decoded + 8000 * 5
+        assert sample("audio_in_flight", operation="analysis") == 0
+        assert sample("audio_in_flight", operation="download") == 0
+
+    async def test_analyze_audio_samples_excerpts_from_long_file(
+        self, analyzer_service, download_metadata, tmp_path
+    ):
+        path = tmp_path / "long.flac"
+        sf.write(path, np.zeros(8000 * 120, dtype=np.float32), 8000, subtype="PCM_16")
+        download_metadata.temp_path = str(path)
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.cache.set = AsyncMock(return_value=True)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+        decode = analyzer_service.decode
+        analyzer_service.decode = AsyncMock(side_effect=decode)
+
+        with patch("app.services.analyzer.settings.CLASSIFY_EXCERPTS", 3):
+            result = await analyzer_service.analyze_audio("https://example.com/long.flac")
+
+        assert result["duration"] == 120.0
+        assert result["classification"] == "silence"
+        offsets = sorted(call.args[2] for call in analyzer_service.decode.call_args_list)
+        assert offsets == [15.0, 55.0, 95.0]
+
+    async def test_analyze_audio_samples_excerpts_when_header_probe_fails(
+        self, analyzer_service, download_metadata, tmp_path
+    ):
+        path = tmp_path / "stream.wav"
+        sf.write(path, np.zeros(8000 * 120, dtype=np.float32), 8000, subtype="PCM_16")
+        data = bytearray(path.read_bytes())
+        struct.pack_into("<I", data, 4, 0xFFFFFFFF)
+        struct.pack_into("<I", data, data.find(b"data") + 4, 0xFFFFFFFF)
+        path.write_bytes(bytes(data))
+        assert analyzer_service.probe.probe(str(path)) is None
+
+        download_metadata.temp_path = str(path)
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.cache.set = AsyncMock(return_value=True)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+        decode = analyzer_service.decode
+        analyzer_service.decode = AsyncMock(side_effect=decode)
+
+        with patch("app.services.analyzer.settings.CLASSIFY_EXCERPTS", 3):
+            result = await analyzer_service.analyze_audio("https://example.com/stream.wav")
+
+        assert result["duration"] == 120.0
+        windows = sorted(call.args[1:3] for call in analyzer_service.decode.call_args_list)
+        assert windows == [(10.0, 15.0), (10.0, 55.0), (10.0, 95.0)]
+
+    async def test_analyze_audio_timeline(self, analyzer_service, download_metadata, tmp_path):
+        path = tmp_path / "test.wav"
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(8000 * 4) / 8000)
+        tone[: 8000 * 2] = 0.0
+        sf.write(path, tone, 8000, subtype="PCM_16")
+        download_metadata.temp_path = str(path)
+        analyzer_service.cache.get = AsyncMock(return_value={"classification": "music"})
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.cache.set = AsyncMock(return_value=True)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+
+        result = await analyzer_service.analyze_audio("https://example.com/test.wav", True)
+
+        timeline = result["timeline"]
+        assert timeline[0][:3] == [0.0, timeline[1][0], "silence"]
+        assert timeline[0][1] == pytest.approx(2.0, abs=0.1)
+        assert timeline[-1][1] == 4.0
+        assert analyzer_service.cache.set.call_args[0][1]["timeline"] == timeline
+
+    async def test_analyze_audio_timeline_keeps_excerpt_label(
+        self, analyzer_service, download_metadata, tmp_path
+    ):
+        path = tmp_path / "long.flac"
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(8000 * 120) / 8000)
+        tone[: 8000 * 30] = 0.0
+        sf.write(path, tone, 8000, subtype="PCM_16")
+        download_metadata.temp_path = str(path)
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.cache.set = AsyncMock(return_value=True)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+        decode = analyzer_service.decode
+        analyzer_service.decode = AsyncMock(side_effect=decode)
+
+        with patch("app.services.analyzer.settings.CLASSIFY_EXCERPTS", 3), patch(
+            "app.services.classifier.settings.TIMELINE_BLOCK_DURATION", 30.0
+        ):
+            plain = await analyzer_service.analyze_audio("https://example.com/long.flac")
+            timed = await analyzer_service.analyze_audio("https://example.com/long.flac", True)
+
+        assert plain["classification"] != "silence"
+        assert {key: timed[key] for key in plain} == plain
+        assert timed["timeline"][0][:3] == [0.0, timed["timeline"][1][0], "silence"]
+        assert timed["timeline"][-1][1] == 120.0
+        windows = sorted(call.args[1:3] for call in analyzer_service.decode.call_args_list)
+        assert windows == sorted([(10.0, 15.0), (10.0, 55.0), (10.0, 95.0)] * 2)
+
+    async def test_memory_backed_download_through_process_pool(self, mock_redis_service, tmp_path):
+        path = tmp_path / "test.wav"
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(8000 * 2) / 8000)
+        sf.write(path, tone, 8000, subtype="PCM_16")
+        content = path.read_bytes()
+
+        downloader = DownloaderService()
+        downloader.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=content))
+        )
+        executor = ExecutorService(max_workers=1)
+        await executor.start()
+        analyzer_service = AudioAnalyzerService(
+            mock_redis_service, executor=executor, downloader=downloader
+        )
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.cache.set = AsyncMock(return_value=True)
+        created = []
+        create_temp_file = downloader._create_temp_file
+
+        def record(*args):
+            created.append(create_temp_file(*args))
+            return created[-1]
+
+        try:
+            with patch.object(downloader, "_create_temp_file", side_effect=record):
+                result = await analyzer_service.analyze_audio("https://example.com/a.wav")
+
+                assert created[0].startswith("/proc/")
+                assert result["duration"] == 2.0
+                assert result["sample_rate"] == 8000
+                assert downloader._memory_files == {}
+
+                blocker = asyncio.create_task(executor.run(time.sleep, 1.0))
+                task = asyncio.create_task(
+                    analyzer_service.analyze_audio("https://example.com/b.wav")
+                )
+                while len(executor._in_flight) < 2:
+                    await asyncio.sleep(0.01)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+
+                assert list(downloader._memory_files) == [created[1]]
+                await blocker
+                while executor._in_flight:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0)
+                assert downloader._memory_files == {}
+        finally:
+            await executor.close()
+            await downloader.close()
+
+    async def test_analyze_audio_strips_cached_timeline(self, analyzer_service, sample_audio_data):
+        cached = {**sample_audio_data, "timeline": [[0.0, 5.23, "music", 0.9]]}
+        analyzer_service.cache.get = AsyncMock(return_value=cached)
+
+        assert await analyzer_service.analyze_audio("https://example.com/test.wav") == (
+            sample_audio_data
+        )
+        assert await analyzer_service.analyze_audio("https://example.com/test.wav", True) == cached
+
+    async def test_decode_and_classify_share_pcm(self, analyzer_service, tmp_path):
+        path = tmp_path / "test.flac"
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(22050) / 22050)
+        sf.write(path, tone, 22050, subtype="PCM_16")
+
+        stream, pcm = await analyzer_service.decode(str(path))
+        try:
+            with pcm.open() as samples:
+                assert samples.shape == (22050,)
+
+            result = await analyzer_service.classify(stream, pcm)
+        finally:
+            pcm.unlink()
+
+        assert stream.sample_rate == 22050
+        assert result.classification.value in ["speech", "music", "silence", "noise"]
+
+    async def test_decode_maps_wav(self, analyzer_service, tmp_path):
+        path = tmp_path / "test.wav"
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(22050 * 3) / 22050)
+        sf.write(path, np.stack([tone, tone], axis=1), 22050, subtype="PCM_16")
+
+        stream, pcm = await analyzer_service.decode(str(path), 1.0, 1.0)
+
+        assert isinstance(pcm, MappedPcm)
+        assert stream.frames == 22050
+        with pcm.open() as samples:
+            assert samples.shape == (22050, 2)
+            np.testing.assert_allclose(samples[:, 0] / 32768, tone[22050:44100], atol=1e-4)
+
+        flac = tmp_path / "test.flac"
+        sf.write(flac, np.stack([tone, tone], axis=1), 22050, subtype="PCM_16")
+        _, shared = await analyzer_service.decode(str(flac), 1.0, 1.0)
+        try:
+            mapped_result = await analyzer_service.classify(stream, pcm)
+            shared_result = await analyzer_service.classify(stream, shared)
+        finally:
+            shared.unlink()
+
+        assert mapped_result.classification == shared_result.classification
+
+    async def test_classify_records_tier(self, analyzer_service):
+        analyzer_service.metrics = MagicMock()
+        analyzer_service.batcher.classify = AsyncMock(
+            return_value=ClassificationResult(
+                classification=AudioClassification.SPEECH, confidence=0.95, tier="frame"
+            )
+        )
+
+        await analyzer_service.classify(MagicMock(), MagicMock())
+
+        analyzer_service.metrics.record_classifier_tier.assert_called_once_with("frame")
+
+    async def test_extract_features_too_long(self, analyzer_service):
+        stream = AudioStream(sample_rate=1000, channels=1, frames=10_000_000)
+        metadata = DownloadMetadata(
+            url="https://example.com/test.wav",
+            content_type="audio/wav",
+            file_size=1000,
+            temp_path="/tmp/test.wav",
+        )
+
+        with pytest.raises(ValueError, match="Audio too long"):
+            analyzer_service.extract_features(stream, metadata)
+
+    async def test_analyze_batch(self, analyzer_service, sample_audio_data):
+        cached_url = "https://example.com/cached.wav"
+        analyzer_service.cache.get_many = AsyncMock(
+            return_value={
+                cached_url: sample_audio_data,
+                "https://example.com/new.wav": None,
+                "https://example.com/bad.wav": None,
+            }
+        )
+
+        analyzer_service.cache.get = AsyncMock()
+        analyzer_service.metrics.record_cache = MagicMock()
+
+        async def analyze_shared(url):
+            if "bad" in url:
+                raise ValueError("Cannot process audio file")
+            return {"classification": "speech"}
+
+        analyzer_service._analyze_shared = AsyncMock(side_effect=analyze_shared)
+
+        results = [
+            item
+            async for item in analyzer_service.analyze_batch(
+                [
+                    cached_url,
+                    "https://example.com/new.wav",
+                    "https://example.com/bad.wav",
+                    cached_url,
+                ]
+            )
+        ]
+
+        assert results[0] == (cached_url, sample_audio_data, None)
+        assert len(results) == 3
+        by_url = {url: (result, error) for url, result, error in results}
+        assert by_url["https://example.com/new.wav"] == ({"classification": "speech"}, None)
+        assert isinstance(by_url["https://example.com/bad.wav"][1], ValueError)
+        assert analyzer_service._analyze_shared.call_count == 2
+        analyzer_service.cache.get.assert_not_called()
+        assert [call.args for call in analyzer_service.metrics.record_cache.call_args_list] == [
+            ("url", True),
+            ("url", False),
+            ("url", False),
+        ]
+
+    async def test_analyze_batch_bounded_concurrency(self, analyzer_service):
+        urls = [f"https://example.com/{i}.wav" for i in range(10)]
+        analyzer_service.cache.get_many = AsyncMock(return_value={url: None for url in urls})
+        active = 0
+        peak = 0
+
+        async def analyze_shared(url):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {}
+
+        analyzer_service._analyze_shared = analyze_shared
 
-    async def test_detect_format_from_extension(self, analyzer_service):
-        result = analyzer_service.detect_format("/tmp/test.mp3", "audio/mpeg")
-        assert result == AudioFormat.MP3
+        with patch("app.services.analyzer.settings.BATCH_CONCURRENCY", 3):
+            results = [item async for item in analyzer_service.analyze_batch(urls)]
 
-        result = analyzer_service.detect_format("/tmp/test.wav", "audio/wav")
-        assert result == AudioFormat.WAV
+        assert len(results) == 10
+        assert peak == 3
+
+    async def test_detect_format_from_content(self, analyzer_service, download_metadata, tmp_path):
+        path = tmp_path / "test.mp3"
+        sf.write(path, np.zeros(1000, dtype=np.float32), 8000, subtype="PCM_16", format="WAV")
+        download_metadata.temp_path = str(path)
+
+        assert analyzer_service.detect_format(download_metadata) == AudioFormat.WAV
+
+        download_metadata.format = AudioFormat.FLAC
+        assert analyzer_service.detect_format(download_metadata) == AudioFormat.FLAC
+
+    async def test_analyze_audio_rejects_unknown_format(
+        self, analyzer_service, download_metadata, tmp_path
+    ):
+        path = tmp_path / "page.html"
+        path.write_bytes(b"<html></html>")
+        download_metadata.temp_path = str(path)
+        analyzer_service.cache.get = AsyncMock(return_value=None)
+        analyzer_service.cache.get_content = AsyncMock(return_value=None)
+        analyzer_service.downloader.download = AsyncMock(return_value=download_metadata)
+        analyzer_service.downloader.cleanup = MagicMock()
+        analyzer_service.decode = AsyncMock()
+
+        with pytest.raises(ValueError, match="Unsupported audio format"):
+            await analyzer_service.analyze_audio("https://example.com/page.mp3")
+
+        analyzer_service.decode.assert_not_called()
+
+
+class TestAudioAnalyzerAggregation:
+
+    @pytest.fixture
+    def analyzer_service(self):
+        return AudioAnalyzerService(AsyncMock())
+
+    def test_excerpts(self, analyzer_service):
+        with patch("app.services.analyzer.settings.CLASSIFY_EXCERPTS", 3):
+            assert analyzer_service.excerpts(20.0) == [(0.0, 30.0)]
+            assert analyzer_service.excerpts(600.0) == [
+                (95.0, 10.0),
+                (295.0, 10.0),
+                (495.0, 10.0),
+            ]
+
+        assert analyzer_service.excerpts(600.0) == [(0.0, 30.0)]
+
+    def test_aggregate_weights_by_confidence(self, analyzer_service):
+        results = [
+            ClassificationResult(classification=AudioClassification.MUSIC, confidence=0.95),
+            ClassificationResult(classification=AudioClassification.SPEECH, confidence=0.9),
+            ClassificationResult(classification=AudioClassification.SPEECH, confidence=0.7),
+        ]
+
+        result = analyzer_service.aggregate(results)
+
+        assert result.classification == AudioClassification.SPEECH
+        assert result.confidence == pytest.approx(1.6 / 3)
 
 
 class TestDownloaderService:
@@ -123,40 +634,384 @@ class TestDownloaderService:
         return DownloaderService()
 
     @pytest.mark.asyncio
-    async def test_download_success(self, downloader_service):
-        with patch("httpx.AsyncClient") as mock_client:
-            mock_response = MagicMock()
-            mock_response.headers = {"content-type": "audio/wav"}
-            mock_response.content = b"fake audio content"
-            mock_response.raise_for_status = MagicMock()
+    async def test_download_success(self, downloader_service, tmp_path):
+        content = b"RIFF\x00\x00\x00\x00WAVE" + b"x" * 988
+
+        def handler(request):
+            return httpx.Response(200, headers={"content-type": "audio/wav"}, content=content)
+
+        downloader_service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        with patch("app.services.downloader.settings.TEMP_DIR", str(tmp_path)):
+            result = await downloader_service.download("https://example.com/test.wav")
+
+        assert isinstance(result, DownloadMetadata)
+        assert result.url == "https://example.com/test.wav"
+        assert result.content_type == "audio/wav"
+        assert result.file_size == 1000
+        assert result.format == AudioFormat.WAV
+        assert result.content_hash == hashlib.sha256(content).hexdigest()
+
+        downloader_service.cleanup(result.temp_path)
+        await downloader_service.close()
+
+    @pytest.mark.asyncio
+    async def test_client_negotiates_http2_when_enabled(self):
+        downloader_service = DownloaderService()
+        with patch("app.services.downloader.settings.DOWNLOAD_HTTP2", True):
+            await downloader_service.start()
+
+        assert downloader_service.client._transport._pool._http2 is True
+        await downloader_service.close()
+
+    @pytest.mark.asyncio
+    async def test_download_http_error(self, downloader_service):
+        downloader_service.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(404))
+        )
+
+        with pytest.raises(FileNotFoundError, match="HTTP 404"):
+            await downloader_service.download("https://example.com/missing.wav")
+
+        await downloader_service.close()
+
+    @pytest.mark.asyncio
+    async def test_download_rejects_large_content_length(self, downloader_service, tmp_path):
+        def handler(request):
+            return httpx.Response(200, headers={"content-length": "2000"}, content=b"x" * 2000)
+
+        downloader_service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        with patch("app.services.downloader.settings.MAX_FILE_SIZE", 1000):
+            with patch("app.services.downloader.settings.TEMP_DIR", str(tmp_path)):
+                with pytest.raises(ValueError, match="File too large: 2000 bytes"):
+                    await downloader_service.download("https://example.com/test.wav")
+
+        assert list(tmp_path.iterdir()) == []
+        await downloader_service.close()
+
+    @pytest.mark.asyncio
+    async def test_download_aborts_stream_over_limit(self, downloader_service, tmp_path):
+        sent = []
+
+        async def body():
+            for _ in range(100):
+                sent.append(1)
+                yield b"x" * 100
+
+        def handler(request):
+            return httpx.Response(200, content=body())
+
+        downloader_service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        with patch("app.services.downloader.settings.MAX_FILE_SIZE", 1000):
+            with patch("app.services.downloader.settings.DOWNLOAD_CHUNK_SIZE", 100):
+                with patch("app.services.downloader.settings.TEMP_DIR", str(tmp_path)):
+                    with pytest.raises(ValueError, match="File too large"):
+                        await downloader_service.download("https://example.com/test.wav")
+
+        assert len(sent) < 100
+        assert list(tmp_path.iterdir()) == []
+        await downloader_service.close()
+
+    @pytest.mark.asyncio
+    async def test_download_empty_file(self, downloader_service, tmp_path):
+        downloader_service.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b""))
+        )
+
+        with patch("app.services.downloader.settings.TEMP_DIR", str(tmp_path)):
+            with pytest.raises(ValueError, match="empty"):
+                await downloader_service.download("https://example.com/test.wav")
+
+        assert list(tmp_path.iterdir()) == []
+        await downloader_service.close()
+
+    @pytest.mark.asyncio
+    async def test_client_is_shared_between_downloads(self, downloader_service):
+        await downloader_service.start()
+        client = downloader_service.client
+
+        await downloader_service.start()
+        assert downloader_service.client is client
+
+        await downloader_service.close()
+        assert downloader_service.client is None
+        assert client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_per_host_concurrency_limit(self, downloader_service):
+        active = 0
+        peak = 0
+
+        async def hold():
+            nonlocal active, peak
+            async with downloader_service._host_slot("cdn.example.com"):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        with patch("app.services.downloader.settings.DOWNLOAD_PER_HOST_LIMIT", 2):
+            await asyncio.gather(*(hold() for _ in range(6)))
+
+        assert peak == 2
+        assert downloader_service._hosts == {}
+
+    @pytest.mark.asyncio
+    async def test_download_small_file_stays_in_memory(self, downloader_service, tmp_path):
+        downloader_service.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"x" * 100))
+        )
+
+        with patch("app.services.downloader.settings.TEMP_DIR", str(tmp_path)):
+            result = await downloader_service.download("https://example.com/test.wav")
+
+        assert list(tmp_path.iterdir()) == []
+        with open(result.temp_path, "rb") as f:
+            assert f.read() == b"x" * 100
+
+        downloader_service.cleanup(result.temp_path)
+        assert downloader_service._memory_files == {}
+        await downloader_service.close()
+
+    @pytest.mark.asyncio
+    async def test_download_spills_to_disk_over_threshold(self, downloader_service, tmp_path):
+        async def body():
+            for i in range(10):
+                yield bytes([i]) * 100
+
+        downloader_service.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+        )
+
+        with patch("app.services.downloader.settings.DOWNLOAD_MEMORY_THRESHOLD", 250):
+            with patch("app.services.downloader.settings.DOWNLOAD_CHUNK_SIZE", 100):
+                with patch("app.services.downloader.settings.TEMP_DIR", str(tmp_path)):
+                    result = await downloader_service.download("https://example.com/test.wav")
+
+        assert list(tmp_path.iterdir()) == [tmp_path / os.path.basename(result.temp_path)]
+        with open(result.temp_path, "rb") as f:
+            assert f.read() == b"".join(bytes([i]) * 100 for i in range(10))
+        assert downloader_service._memory_files == {}
+
+        downloader_service.cleanup(result.temp_path)
+        await downloader_service.close()
+
+    @pytest.mark.asyncio
+    async def test_download_sniffs_header_across_chunks(self, downloader_service, tmp_path):
+        async def body():
+            yield b"fL"
+            yield b"aC" + b"\x00" * 100
+
+        downloader_service.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+        )
+
+        with patch("app.services.downloader.settings.TEMP_DIR", str(tmp_path)):
+            result = await downloader_service.download("https://example.com/track")
+
+        assert result.format == AudioFormat.FLAC
+
+        downloader_service.cleanup(result.temp_path)
+        await downloader_service.close()
+
+
+class TestDecoderService:
+
+    @pytest.fixture
+    def decoder_service(self):
+        return DecoderService()
+
+    def test_decode_wav_stereo(self, decoder_service, tmp_path):
+        path = tmp_path / "test.wav"
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(8000) / 8000)
+        sf.write(path, np.stack([tone, tone], axis=1), 8000, subtype="PCM_16")
+
+        decoded = decoder_service.decode(str(path))
+
+        assert decoded.stream.sample_rate == 8000
+        assert decoded.stream.channels == 2
+        assert decoded.stream.bit_depth == 16
+        assert decoded.stream.duration == 1.0
+        assert decoded.samples.dtype == np.float32
+        assert decoded.samples.shape == (8000,)
+        np.testing.assert_allclose(decoded.samples, tone, atol=1e-3)
+
+    def test_decode_window(self, decoder_service, tmp_path):
+        path = tmp_path / "test.wav"
+        sf.write(path, np.zeros(8000 * 3, dtype=np.float32), 8000, subtype="PCM_16")
+
+        decoded = decoder_service.decode(str(path), duration=1.0)
+
+        assert decoded.stream.duration == 1.0
+
+    def test_decode_excerpt(self, decoder_service, tmp_path):
+        path = tmp_path / "test.flac"
+        ramp = np.repeat(np.arange(4, dtype=np.float32) / 8, 8000)
+        sf.write(path, ramp, 8000, subtype="PCM_16")
+
+        decoded = decoder_service.decode(str(path), duration=1.0, offset=2.0)
+
+        assert decoded.stream.frames == 8000
+        np.testing.assert_allclose(decoded.samples, 0.25, atol=1e-3)
+
+    def test_decode_invalid_file(self, decoder_service, tmp_path):
+        path = tmp_path / "test.wav"
+        path.write_bytes(b"not audio")
+
+        with pytest.raises(ValueError, match="Cannot process audio file"):
+            decoder_service.decode(str(path))
+
+    def test_decode_dispatches_on_content(self, decoder_service, tmp_path):
+        path = tmp_path / "test.mp3"
+        sf.write(path, np.zeros(8000, dtype=np.float32), 8000, subtype="PCM_16", format="WAV")
+
+        with patch.object(decoder_service, "_decode_librosa") as librosa_decode:
+            decoded = decoder_service.decode(str(path))
+
+        librosa_decode.assert_not_called()
+        assert decoded.stream.bit_depth == 16
+
+    def test_decode_m4a_in_process(self, decoder_service, tmp_path):
+        path = tmp_path / "test.m4a"
+        sr = 44100
+        tone = (0.5 * np.sin(2 * np.pi * 440 * np.arange(sr * 3) / sr)).astype(np.float32)
+        with av.open(str(path), "w", format="mp4") as container:
+            stream = container.add_stream("aac", rate=sr, layout="stereo")
+            for start in range(0, len(tone), 1024):
+                end = start + 1024
+                frame = av.AudioFrame.from_ndarray(
+                    np.stack([tone[start:end]] * 2), format="fltp", layout="stereo"
+                )
+                frame.sample_rate = sr
+                container.mux(stream.encode(frame))
+            container.mux(stream.encode(None))
+
+        with patch("subprocess.run") as run, patch("subprocess.Popen") as popen:
+            decoded = decoder_service.decode(str(path), duration=1.0, offset=1.0)
+
+        run.assert_not_called()
+        popen.assert_not_called()
+        assert decoded.stream.sample_rate == sr
+        assert decoded.stream.channels == 2
+        assert decoded.stream.frames == sr
+        assert decoded.samples.dtype == np.float32
+        assert np.sqrt(np.mean(decoded.samples**2)) == pytest.approx(0.5 / np.sqrt(2), rel=0.05)
+        full = decoder_service.decode(str(path)).samples
+        np.testing.assert_allclose(decoded.samples, full[sr:][:sr], atol=1e-4)
+
+
+class TestProbeService:
+
+    @pytest.fixture
+    def probe_service(self):
+        return ProbeService()
+
+    @pytest.fixture
+    def stereo(self):
+        tone = 0.3 * np.sin(2 * np.pi * 440 * np.arange(44100 * 2) / 44100)
+        return np.stack([tone, tone], axis=1)
+
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            (b"RIFF\x00\x00\x00\x00WAVE", AudioFormat.WAV),
+            (b"fLaC\x00\x00\x00\x22", AudioFormat.FLAC),
+            (b"OggS\x00\x02", AudioFormat.OGG),
+            (b"\x00\x00\x00\x18ftypM4A ", AudioFormat.M4A),
+            (b"ID3\x04\x00", AudioFormat.MP3),
+            (b"\xff\xfb\x90\x00", AudioFormat.MP3),
+            (b"<html>", None),
+        ],
+    )
+    def test_sniff_format(self, header, expected):
+        assert sniff_format(header) == expected
+
+    @pytest.mark.parametrize(
+        "ext, subtype, bit_depth",
+        [
+            ("wav", "PCM_24", 24),
+            ("wav", "FLOAT", 32),
+            ("flac", "PCM_16", 16),
+            ("ogg", "VORBIS", None),
+            ("mp3", "MPEG_LAYER_III", None),
+        ],
+    )
+    def test_probe_matches_decoder(self, probe_service, stereo, tmp_path, ext, subtype, bit_depth):
+        path = tmp_path / f"test.{ext}"
+        sf.write(path, stereo, 44100, subtype=subtype)
 
-            mock_client_instance = mock_client.return_value.__aenter__.return_value
-            mock_client_instance.get.return_value = mock_response
+        stream = probe_service.probe(str(path))
 
-            with patch("tempfile.NamedTemporaryFile") as mock_temp:
-                mock_temp.return_value.name = "/tmp/test.wav"
-                mock_temp.return_value.close = MagicMock()
+        assert stream.sample_rate == 44100
+        assert stream.channels == 2
+        assert stream.bit_depth == bit_depth
+        assert stream.frames == sf.info(str(path)).frames
 
-                with patch("aiofiles.open"):
-                    with patch("os.path.getsize", return_value=1000):
-                        result = await downloader_service.download("https://example.com/test.wav")
+    def test_probe_m4a(self, probe_service, tmp_path):
+        def box(box_type, payload):
+            return struct.pack(">I4s", 8 + len(payload), box_type) + payload
 
-                        assert isinstance(result, DownloadMetadata)
-                        assert result.url == "https://example.com/test.wav"
-                        assert result.content_type == "audio/wav"
-                        assert result.file_size == 1000
+        mdhd = bytes(12) + struct.pack(">II", 1000, 2500) + bytes(4)
+        hdlr = bytes(8) + b"soun" + bytes(12)
+        mp4a = bytes(16) + struct.pack(">HH", 2, 16) + bytes(4) + struct.pack(">I", 48000 << 16)
+        stsd = bytes(8) + box(b"mp4a", mp4a)
+        stbl = box(b"stbl", box(b"stsd", stsd))
+        mdia = box(b"mdia", box(b"mdhd", mdhd) + box(b"hdlr", hdlr) + box(b"minf", stbl))
+        path = tmp_path / "test.m4a"
+        path.write_bytes(box(b"ftyp", b"M4A ") + box(b"moov", box(b"trak", mdia)))
 
-    def test_get_extension_from_url(self, downloader_service):
-        result = downloader_service._get_extension("https://example.com/test.mp3", "")
-        assert result == ".mp3"
+        stream = probe_service.probe(str(path))
 
-    def test_get_extension_from_content_type(self, downloader_service):
-        result = downloader_service._get_extension("https://example.com/test", "audio/mpeg")
-        assert result == ".mp3"
+        assert stream.sample_rate == 48000
+        assert stream.channels == 2
+        assert stream.duration == 2.5
 
-    def test_get_extension_default(self, downloader_service):
-        result = downloader_service._get_extension("https://example.com/test", "unknown/type")
-        assert result == ".mp3"
+    def test_probe_cbr_mp3_without_xing_header(self, probe_service, stereo, tmp_path):
+        path = tmp_path / "test.mp3"
+        with av.open(str(path), "w", format="mp3", options={"write_xing": "0"}) as container:
+            stream = container.add_stream("libmp3lame", rate=44100, layout="stereo")
+            stream.bit_rate = 128000
+            frame = av.AudioFrame.from_ndarray(
+                np.ascontiguousarray(stereo.T, dtype=np.float32), format="fltp", layout="stereo"
+            )
+            frame.sample_rate = 44100
+            for packet in [*stream.encode(frame), *stream.encode(None)]:
+                container.mux(packet)
+        data = path.read_bytes()
+        assert data[:3] == b"ID3" and b"Xing" not in data and b"Info" not in data
+        path.write_bytes(data + b"TAG" + bytes(125))
+
+        probed = probe_service.probe(str(path))
+
+        assert probed.sample_rate == 44100
+        assert probed.channels == 2
+        assert probed.duration == pytest.approx(sf.info(str(path)).duration, abs=0.05)
+
+    def test_inspect_ignores_unknown_length(self, probe_service, stereo, tmp_path):
+        path = tmp_path / "test.flac"
+        sf.write(path, stereo, 44100, subtype="PCM_16")
+        data = bytearray(path.read_bytes())
+        packed = int.from_bytes(data[18:26], "big") & ~0xFFFFFFFFF
+        data[18:26] = packed.to_bytes(8, "big")
+        path.write_bytes(bytes(data))
+
+        assert probe_service.probe(str(path)) is None
+        assert probe_service.inspect(str(path)) is None
+
+    def test_probe_truncated_file(self, probe_service, stereo, tmp_path):
+        path = tmp_path / "test.flac"
+        sf.write(path, stereo, 44100, subtype="PCM_16")
+        path.write_bytes(path.read_bytes()[:20])
+
+        assert probe_service.probe(str(path)) is None
+
+    def test_probe_unknown_format(self, probe_service, tmp_path):
+        path = tmp_path / "test.wav"
+        path.write_bytes(b"not audio")
+
+        assert probe_service.probe(str(path)) is None
 
 
 class TestClassifierService:
@@ -165,33 +1020,158 @@ class TestClassifierService:
     def classifier_service(self):
         return ClassifierService()
 
-    @pytest.mark.asyncio
-    async def test_classify_audio_success(self, classifier_service):
-        with patch("librosa.load") as mock_load:
-            mock_load.return_value = ([0.1, 0.2, 0.3], 22050)
+    @pytest.fixture
+    def decoded_audio(self):
+        stream = AudioStream(sample_rate=44100, channels=1, bit_depth=16, frames=44100 * 40)
+        return DecodedAudio(stream=stream, samples=np.zeros(44100 * 40, dtype=np.float32))
 
-            with patch.object(classifier_service, "extract_features") as mock_extract:
-                mock_extract.return_value = {
-                    "rms": 0.1,
-                    "zcr": 0.1,
-                    "spectral_centroid": 2000,
-                    "tempo": 120,
-                    "harmonic_ratio": 0.7,
-                }
+    def test_extract_features_matches_separate_transforms(self, classifier_service):
+        sr = 22050
+        t = np.arange(sr * 3) / sr
+        y = (0.3 * np.sin(2 * np.pi * 220 * t) + 0.5 * (np.mod(t, 0.5) < 0.01)).astype(np.float32)
 
-                result = await classifier_service.classify("/tmp/test.wav")
+        features = classifier_service.extract_features(y, sr)
 
-                assert result.classification.value in ["speech", "music", "silence", "noise"]
-                assert 0.0 <= result.confidence <= 1.0
+        tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+        y_harmonic, _ = librosa.effects.hpss(y)
+        expected = {
+            "spectral_centroid": np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)),
+            "tempo": np.atleast_1d(tempo)[0],
+            "harmonic_ratio": np.sum(y_harmonic**2) / (np.sum(y**2) + 1e-8),
+        }
+        for name, value in expected.items():
+            assert features[name] == pytest.approx(float(value), rel=1e-4)
 
-    @pytest.mark.asyncio
-    async def test_classify_audio_error_fallback(self, classifier_service):
-        with patch("librosa.load", side_effect=Exception("Load failed")):
-            result = await classifier_service.classify("/tmp/test.wav")
+    @pytest.mark.parametrize("subtype", ["PCM_U8", "PCM_16", "PCM_32", "FLOAT", "DOUBLE"])
+    def test_mono_matches_soundfile(self, classifier_service, tmp_path, subtype):
+        path = tmp_path / "test.wav"
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(8000) / 8000)
+        sf.write(path, np.stack([tone, 0.5 * tone], axis=1), 8000, subtype=subtype)
+
+        stream, pcm = DecoderService().map(str(path))
+        expected = DecoderService().decode(str(path), audio_format=AudioFormat.FLAC).samples
+
+        with pcm.open() as samples:
+            np.testing.assert_allclose(classifier_service.mono(samples), expected, atol=1e-6)
+        assert stream.frames == 8000
+
+    def test_timeline_blocks_match_single_pass(self, classifier_service):
+        sr = 22050
+        t = np.arange(sr * 15) / sr
+        y = np.concatenate(
+            [
+                np.zeros(sr * 15),
+                0.5 * np.sin(2 * np.pi * 440 * t),
+                np.random.default_rng(0).uniform(-0.5, 0.5, sr * 15),
+            ]
+        ).astype(np.float32)
+        audio = DecodedAudio(
+            stream=AudioStream(sample_rate=sr, channels=1, frames=len(y)), samples=y
+        )
+
+        with patch("app.services.classifier.settings.TIMELINE_BLOCK_DURATION", 1000.0):
+            single = classifier_service.timeline(audio, 1.0)
+        with patch("app.services.classifier.settings.TIMELINE_BLOCK_DURATION", 10.0):
+            blocked = classifier_service.timeline(audio, 1.0)
+
+        assert [(s.start, s.end, s.classification) for s in blocked] == [
+            (s.start, s.end, s.classification) for s in single
+        ]
+        assert [s.classification for s in blocked] == [
+            AudioClassification.SILENCE,
+            AudioClassification.MUSIC,
+            AudioClassification.NOISE,
+        ]
+
+    def test_classify_batch_matches_single_clips(self, classifier_service):
+        sr = 22050
+        t = np.arange(sr * 2) / sr
+        signals = [
+            0.3 * np.sin(2 * np.pi * 220 * t) + 0.8 * (np.mod(t, 0.5) < 0.01),
+            np.random.default_rng(0).uniform(-0.3, 0.3, len(t)),
+            0.5 * np.sin(2 * np.pi * 440 * t[:sr]),
+            np.zeros(len(t)),
+        ]
+        audios = [
+            DecodedAudio(
+                stream=AudioStream(sample_rate=sr, channels=1, frames=len(y)),
+                samples=y.astype(np.float32),
+            )
+            for y in signals
+        ]
+
+        assert classifier_service.classify_batch(audios) == [
+            classifier_service.classify(audio) for audio in audios
+        ]
+
+    def test_classify_batch_task_skips_released_clips(self):
+        stream = AudioStream(sample_rate=22050, channels=1, frames=22050)
+        live = SharedArray.from_array(np.zeros(22050, dtype=np.float32))
+        released = SharedArray.from_array(np.zeros(22050, dtype=np.float32))
+        released.unlink()
+        try:
+            results = tasks.classify_batch([stream, stream], [live, released])
+        finally:
+            live.unlink()
+
+        assert results[0].classification == AudioClassification.SILENCE
+        assert results[1] is None
+
+    def test_prepare_truncates_and_resamples(self, classifier_service, decoded_audio):
+        y = classifier_service.prepare(decoded_audio)
+
+        assert len(y) == int(classifier_service.duration * classifier_service.sr)
+
+    def test_classify_audio_success(self, classifier_service):
+        sr = 44100
+        t = np.arange(sr * 6) / sr
+        y = (0.3 * np.sin(2 * np.pi * 220 * t) + 0.8 * (np.mod(t, 0.5) < 0.01)).astype(np.float32)
+        audio = DecodedAudio(
+            stream=AudioStream(sample_rate=sr, channels=1, frames=len(y)), samples=y
+        )
+
+        result = classifier_service.classify(audio)
+
+        assert result.classification.value == "music"
+        assert result.confidence == 0.95
+        assert result.tier.value == "harmonic"
+
+    def test_classify_audio_error_fallback(self, classifier_service, decoded_audio):
+        with patch.object(classifier_service, "truncate", side_effect=Exception("Failed")):
+            result = classifier_service.classify(decoded_audio)
 
             assert result.classification.value == "noise"
             assert result.confidence == 0.5
 
+    def test_classify_silence_stops_at_rms_tier(self, classifier_service, decoded_audio):
+        with patch.object(classifier_service, "resample") as mock_resample:
+            result = classifier_service.classify(decoded_audio)
+
+        assert result.classification.value == "silence"
+        assert result.tier.value == "rms"
+        mock_resample.assert_not_called()
+
+    def test_classify_cascade_matches_full_features(self, classifier_service):
+        sr = 22050
+        t = np.arange(sr * 3) / sr
+        y = (0.3 * np.sin(2 * np.pi * 220 * t) + 0.8 * (np.mod(t, 0.5) < 0.01)).astype(np.float32)
+        audio = DecodedAudio(
+            stream=AudioStream(sample_rate=sr, channels=1, frames=len(y)), samples=y
+        )
+
+        result = classifier_service.classify(audio)
+
+        expected = classifier_service.classify_features(classifier_service.extract_features(y, sr))
+        assert (result.classification.value, result.confidence) == expected
+
+    def test_resolve_frame_tier(self, classifier_service):
+        speech = {"rms": 0.1, "zcr": 0.1, "spectral_centroid": 1000.0}
+        ambiguous = {"rms": 0.1, "zcr": 0.01, "spectral_centroid": 1000.0}
+
+        assert classifier_service.resolve(speech) == ("speech", 0.95)
+        assert classifier_service.resolve(ambiguous) is None
+        assert classifier_service.resolve({**ambiguous, "tempo": 30.0}) == ("noise", 0.6)
+
     def test_classify_features_silence(self, classifier_service):
         features = {
             "rms": 0.005,
@@ -217,3 +1197,544 @@ class TestClassifierService:
 
         assert classification == "music"
         assert confidence > 0.5
+
+
+class TestStreamAnalyzer:
+
+    def test_pcm_decoder_keeps_partial_frames(self):
+        decoder = PcmDecoder("s16le", 2)
+        data = np.array([16384, -16384, 8192, 8192], dtype="<i2").tobytes()
+
+        first = decoder.decode(data[:5])
+        second = decoder.decode(data[5:])
+
+        np.testing.assert_allclose(np.concatenate([first, second]), [0.0, 0.25])
+
+    def test_running_features_match_offline(self):
+        sr = 22050
+        t = np.arange(sr * 6) / sr
+        y = (0.3 * np.sin(2 * np.pi * 220 * t) + 0.8 * (np.mod(t, 0.5) < 0.01)).astype(np.float32)
+        analyzer = StreamAnalyzer(sr, update_interval=2.0, time_constant=60.0)
+
+        updates = []
+        for chunk in np.array_split(y, 44):
+            updates += analyzer.feed(chunk)
+        final = analyzer.finish()
+
+        offline = ClassifierService().extract_features(y, sr)
+        assert [update["time"] for update in updates] == [2.0, 4.0, 6.0]
+        assert final["classification"] == "music"
+        assert final["features"]["rms"] == pytest.approx(offline["rms"], rel=0.05)
+        assert final["features"]["zcr"] == pytest.approx(offline["zcr"], rel=0.05)
+        assert final["features"]["tempo"] == pytest.approx(offline["tempo"], rel=0.05)
+        assert final["features"]["harmonic_ratio"] == pytest.approx(
+            offline["harmonic_ratio"], abs=0.1
+        )
+
+    def test_state_is_bounded(self):
+        analyzer = StreamAnalyzer(22050)
+        for _ in range(20):
+            analyzer.feed(np.random.default_rng(0).uniform(-0.1, 0.1, 22050).astype(np.float32))
+
+        assert len(analyzer.buffer) < analyzer.n_fft
+        assert analyzer.history.shape[0] == analyzer.kernel_size - 1
+        assert analyzer.filled == len(analyzer.onsets)
+
+
+@pytest.mark.asyncio
+class TestStreamingService:
+
+    async def test_encoded_stream_stops_decoder_on_disconnect(self):
+        service = StreamingService("encoded", 22050, 1)
+
+        async def start_cat():
+            service.ffmpeg.process = await asyncio.create_subprocess_exec(
+                "cat", stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+            )
+
+        chunks = [np.zeros(4096, dtype="<f4").tobytes()]
+
+        async def receive():
+            if chunks:
+                return chunks.pop()
+            raise WebSocketDisconnect(1001)
+
+        with patch.object(service.ffmpeg, "start", start_cat):
+            with pytest.raises(WebSocketDisconnect):
+                await asyncio.wait_for(service.run(receive, AsyncMock()), timeout=5.0)
+
+        assert service.ffmpeg.process.returncode is not None
+
+
+@pytest.mark.asyncio
+class TestClassifyBatcher:
+
+    @pytest.fixture
+    def executor(self):
+        executor = ExecutorService(max_workers=0)
+        executor.run = AsyncMock(
+            side_effect=lambda fn, streams, pcms: [
+                ClassificationResult(classification=AudioClassification.MUSIC, confidence=pcm)
+                for pcm in pcms
+            ]
+        )
+        return executor
+
+    async def test_concurrent_clips_share_one_batch(self, executor):
+        metrics = MagicMock()
+        batcher = ClassifyBatcher(executor, metrics, window=0.01, max_size=16)
+
+        results = await asyncio.gather(*(batcher.classify(MagicMock(), 0.1 * i) for i in range(5)))
+
+        assert [result.confidence for result in results] == [0.1 * i for i in range(5)]
+        executor.run.assert_called_once()
+        assert executor.run.call_args[0][0] is tasks.classify_batch
+        assert metrics.record_classify_batch.call_args[0][0] == 5
+        assert all(wait >= 0 for wait in metrics.record_classify_batch.call_args[0][1])
+
+    async def test_flush_is_split_across_workers(self, executor):
+        executor.max_workers = 2
+        batcher = ClassifyBatcher(executor, window=0.01, max_size=16, min_chunk=2)
+
+        results = await asyncio.gather(*(batcher.classify(MagicMock(), 0.1 * i) for i in range(5)))
+
+        assert [result.confidence for result in results] == [0.1 * i for i in range(5)]
+        assert executor.run.call_count == 2
+        assert [len(call.args[2]) for call in executor.run.call_args_list] == [3, 2]
+
+    async def test_small_flush_is_not_split(self, executor):
+        executor.max_workers = 2
+        batcher = ClassifyBatcher(executor, window=0.01, max_size=16, min_chunk=4)
+
+        await asyncio.gather(*(batcher.classify(MagicMock(), 0.1 * i) for i in range(7)))
+
+        executor.run.assert_called_once()
+        assert len(executor.run.call_args.args[2]) == 7
+
+    async def test_cancelled_clip_is_not_dispatched(self, executor):
+        batcher = ClassifyBatcher(executor, window=0.05, max_size=16)
+
+        cancelled = asyncio.create_task(batcher.classify(MagicMock(), 0.1))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        result = await batcher.classify(MagicMock(), 0.2)
+
+        assert result.confidence == 0.2
+        assert executor.run.call_args.args[2] == [0.2]
+
+    async def test_full_batch_is_dispatched_without_waiting(self, executor):
+        batcher = ClassifyBatcher(executor, window=60.0, max_size=2)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.classify(MagicMock(), 0.1), batcher.classify(MagicMock(), 0.2)),
+            timeout=1.0,
+        )
+
+        assert len(results) == 2
+
+    async def test_batch_error_reaches_every_caller(self, executor):
+        executor.run = AsyncMock(side_effect=RuntimeError("pool failed"))
+        batcher = ClassifyBatcher(executor, window=0.01, max_size=16)
+
+        results = await asyncio.gather(
+            batcher.classify(MagicMock(), 0.1),
+            batcher.classify(MagicMock(), 0.2),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def test_disabled_batching_runs_single_clips(self, executor):
+        batcher = ClassifyBatcher(executor, window=0.0)
+
+        await batcher.classify(MagicMock(), MagicMock())
+
+        assert executor.run.call_args[0][0] is tasks.classify
+
+
+class TestExecutorService:
+
+    def test_shared_array_round_trip(self):
+        array = np.arange(1000, dtype=np.float32)
+        shared = SharedArray.from_array(array)
+        try:
+            with shared.open() as view:
+                np.testing.assert_array_equal(view, array)
+                view[0] = -1.0
+
+            with shared.open() as view:
+                assert view[0] == -1.0
+        finally:
+            shared.unlink()
+
+        with pytest.raises(FileNotFoundError):
+            with shared.open():
+                pass
+
+    def test_shared_array_unlink_is_idempotent(self):
+        shared = SharedArray.from_array(np.zeros(0, dtype=np.float32))
+        shared.unlink()
+        shared.unlink()
+
+    @pytest.mark.asyncio
+    async def test_run_without_pool_uses_threads(self):
+        executor = ExecutorService(max_workers=0)
+        await executor.start()
+
+        assert executor.pool is None
+        assert await executor.run(sum, [1, 2, 3]) == 6
+
+        await executor.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_run_releases_shared_pcm(self):
+        executor = ExecutorService(max_workers=0)
+        created = []
+
+        def decode():
+            time.sleep(0.2)
+            created.append(SharedArray.from_array(np.ones(1000, dtype=np.float32)))
+            return MagicMock(), created[0]
+
+        task = asyncio.create_task(executor.run(decode))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.3)
+
+        assert len(created) == 1
+        with pytest.raises(FileNotFoundError):
+            with created[0].open():
+                pass
+
+    @pytest.mark.asyncio
+    async def test_broken_pool_is_replaced_once(self):
+        executor = ExecutorService(max_workers=1)
+        await executor.start()
+        broken = executor.pool
+        try:
+            with patch.object(executor, "_create_pool", wraps=executor._create_pool) as create:
+                runs = [asyncio.create_task(executor.run(time.sleep, 5)) for _ in range(4)]
+                await asyncio.sleep(0.2)
+                for process in list(broken._processes.values()):
+                    process.kill()
+                results = await asyncio.gather(*runs, return_exceptions=True)
+
+            assert all(isinstance(result, BrokenProcessPool) for result in results)
+            create.assert_called_once()
+            assert executor.pool is not broken
+            assert broken._shutdown_thread
+            assert len(executor.pool._processes) == 1
+            assert await executor.run(tasks.ping) is True
+        finally:
+            await executor.close()
+
+
+@pytest.mark.asyncio
+class TestSingleFlightService:
+
+    @pytest.fixture
+    def redis_service(self):
+        mock_redis = AsyncMock(spec=RedisService)
+        mock_redis.set_nx.return_value = True
+        mock_redis.release_lock.return_value = True
+        mock_redis.extend_lock.return_value = True
+        return mock_redis
+
+    @pytest.fixture
+    def singleflight(self, redis_service):
+        return SingleFlightService(redis_service)
+
+    async def test_concurrent_calls_share_one_execution(self, singleflight, redis_service):
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"classification": "music"}
+
+        lookup = AsyncMock(return_value=None)
+        results = await asyncio.gather(
+            *(singleflight.do("audio:key", fn, lookup) for _ in range(10))
+        )
+
+        assert calls == 1
+        assert all(result == {"classification": "music"} for result in results)
+        redis_service.set_nx.assert_called_once()
+        redis_service.release_lock.assert_called_once()
+        assert singleflight._calls == {}
+
+    async def test_waiters_receive_leader_error(self, singleflight):
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ValueError("Cannot process audio file")
+
+        lookup = AsyncMock(return_value=None)
+        results = await asyncio.gather(
+            *(singleflight.do("audio:key", fn, lookup) for _ in range(3)), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    async def test_waits_for_remote_holder(self, singleflight, redis_service):
+        redis_service.set_nx.return_value = False
+        lookup = AsyncMock(side_effect=[None, {"classification": "speech"}])
+        fn = AsyncMock()
+
+        with patch("app.services.singleflight.settings.SINGLEFLIGHT_POLL_INTERVAL", 0.001):
+            result = await singleflight.do("audio:key", fn, lookup)
+
+        assert result == {"classification": "speech"}
+        fn.assert_not_called()
+
+    async def test_runs_directly_when_redis_unavailable(self, singleflight, redis_service):
+        redis_service.set_nx.return_value = None
+        fn = AsyncMock(return_value={"classification": "noise"})
+
+        result = await singleflight.do("audio:key", fn, AsyncMock(return_value=None))
+
+        assert result == {"classification": "noise"}
+        redis_service.release_lock.assert_not_called()
+
+    async def test_rechecks_cache_after_acquiring(self, singleflight, redis_service):
+        fn = AsyncMock()
+        lookup = AsyncMock(return_value={"classification": "music"})
+
+        result = await singleflight.do("audio:key", fn, lookup)
+
+        assert result == {"classification": "music"}
+        fn.assert_not_called()
+        redis_service.release_lock.assert_called_once()
+
+
+@pytest.mark.asyncio
+class TestJobService:
+
+    @pytest.fixture
+    def redis_service(self):
+        mock_redis = AsyncMock(spec=RedisService)
+        mock_redis.is_connected.return_value = True
+        mock_redis.setex.return_value = True
+        mock_redis.xadd.return_value = "1-0"
+        return mock_redis
+
+    @pytest.fixture
+    def job_service(self, redis_service):
+        return JobService(redis_service)
+
+    async def test_submit(self, job_service, redis_service):
+        job = await job_service.submit("https://example.com/test.wav", "https://hooks.example.com")
+
+        assert job.status == JobStatus.QUEUED
+        assert redis_service.setex.call_args[0][0] == f"audio:job:{job.job_id}"
+        stream, fields, _ = redis_service.xadd.call_args[0]
+        assert stream == "audio:jobs"
+        assert fields == {"job_id": job.job_id}
+
+    async def test_submit_when_unavailable(self, job_service, redis_service):
+        redis_service.xadd.return_value = None
+
+        with pytest.raises(ConnectionError):
+            await job_service.submit("https://example.com/test.wav")
+
+    async def test_get_round_trip(self, job_service, redis_service):
+        job = await job_service.submit("https://example.com/test.wav")
+        redis_service.get.return_value = redis_service.setex.call_args[0][2]
+
+        loaded = await job_service.get(job.job_id)
+
+        assert loaded.job_id == job.job_id
+        assert loaded.audio_url == "https://example.com/test.wav"
+
+
+@pytest.mark.asyncio
+class TestJobWorker:
+
+    @pytest.fixture
+    def redis_service(self):
+        mock_redis = AsyncMock(spec=RedisService)
+        mock_redis.is_connected.return_value = True
+        return mock_redis
+
+    @pytest.fixture
+    def job_service(self, redis_service):
+        jobs = JobService(redis_service)
+        jobs.save = AsyncMock(return_value=True)
+        return jobs
+
+    @pytest.fixture
+    def analyzer(self):
+        return AsyncMock(spec=AudioAnalyzerService)
+
+    @pytest.fixture
+    def worker(self, redis_service, job_service, analyzer):
+        worker = JobWorker(redis_service, job_service, analyzer)
+        worker.client = AsyncMock()
+        worker.client.post.return_value = MagicMock()
+        return worker
+
+    @pytest.fixture
+    def queued_job(self, job_service, redis_service):
+        async def make(**kwargs):
+            redis_service.setex.return_value = True
+            redis_service.xadd.return_value = "1-0"
+            job = await JobService(redis_service).submit("https://example.com/test.wav", **kwargs)
+            job_service.get = AsyncMock(return_value=job)
+            return job
+
+        return make
+
+    async def test_process_success(self, worker, analyzer, redis_service, queued_job):
+        job = await queued_job(callback_url="https://hooks.example.com/done")
+        analyzer.analyze_audio.return_value = {"classification": "music"}
+
+        await worker.process("1-0", {"job_id": job.job_id})
+
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result == {"classification": "music"}
+        assert job.attempts == 1
+        redis_service.xack.assert_called_once_with("audio:jobs", "analyzers", "1-0")
+        assert worker.client.post.call_args[0][0] == "https://hooks.example.com/done"
+
+    async def test_process_failure(self, worker, analyzer, redis_service, queued_job):
+        job = await queued_job()
+        analyzer.analyze_audio.side_effect = ValueError("Audio too long: 900s")
+
+        await worker.process("1-0", {"job_id": job.job_id})
+
+        assert job.status == JobStatus.FAILED
+        assert job.error == "Audio too long: 900s"
+        redis_service.xack.assert_called_once()
+        worker.client.post.assert_not_called()
+
+    async def test_process_gives_up_after_max_attempts(self, worker, analyzer, queued_job):
+        job = await queued_job()
+        job.attempts = 3
+
+        await worker.process("1-0", {"job_id": job.job_id})
+
+        assert job.status == JobStatus.FAILED
+        analyzer.analyze_audio.assert_not_called()
+
+    async def test_process_skips_finished_job(self, worker, analyzer, redis_service, queued_job):
+        job = await queued_job()
+        job.status = JobStatus.SUCCEEDED
+
+        await worker.process("1-0", {"job_id": job.job_id})
+
+        analyzer.analyze_audio.assert_not_called()
+        redis_service.xack.assert_called_once()
+
+    async def test_run_reclaims_and_stops(self, worker, redis_service, job_service):
+        redis_service.xgroup_create.return_value = True
+        redis_service.xautoclaim.return_value = [("1-0", {"job_id": "stale"})]
+        job_service.get = AsyncMock(return_value=None)
+
+        async def read(*args):
+            worker.stop()
+            return []
+
+        redis_service.xreadgroup.side_effect = read
+
+        await worker.run()
+
+        redis_service.xack.assert_called_once_with("audio:jobs", "analyzers", "1-0")
+
+
+@pytest.mark.asyncio
+class TestLoopMonitorService:
+
+    @pytest.fixture
+    def metrics(self):
+        return MagicMock()
+
+    async def test_records_loop_lag(self, metrics):
+        monitor = LoopMonitorService(metrics, interval=0.01, block_threshold=0.0)
+        await monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)
+        await asyncio.sleep(0.05)
+        await monitor.close()
+
+        lags = [call.args[0] for call in metrics.record_loop_lag.call_args_list]
+        assert max(lags) >= 0.05
+        assert monitor._watchdog is None
+
+    async def test_watchdog_logs_blocking_stack(self, metrics):
+        def blocking_call():
+            time.sleep(0.3)
+
+        monitor = LoopMonitorService(metrics, interval=0.01, block_threshold=0.1)
+        with patch("app.services.loop_monitor.logger") as logger:
+            await monitor.start()
+            await asyncio.sleep(0.02)
+            blocking_call()
+            await asyncio.sleep(0.02)
+            await monitor.close()
+
+        logger.warning.assert_called_once()
+        assert "blocking_call" in logger.warning.call_args[0][0]
+
+    async def test_disabled_monitor_starts_nothing(self, metrics):
+        monitor = LoopMonitorService(metrics, interval=0.0, block_threshold=1.0)
+        await monitor.start()
+
+        assert monitor._task is None
+        assert monitor._watchdog is None
+        await monitor.close()
+
+
+def _allocate_and_wait():
+    data = np.ones(1_000_000)
+    time.sleep(0.05)
+    return float(data.sum())
+
+
+@pytest.mark.asyncio
+class TestProfilerService:
+
+    @pytest.fixture
+    def redis_service(self):
+        redis_service = AsyncMock(spec=RedisService)
+        redis_service.setex.return_value = True
+        return redis_service
+
+    async def test_profile_collects_worker_stacks(self, redis_service):
+        executor = ExecutorService(max_workers=0)
+        profiler = ProfilerService(redis_service)
+
+        result, report = await profiler.profile(
+            "https://example.com/test.wav", lambda: executor.run(_allocate_and_wait)
+        )
+
+        assert result == 1_000_000.0
+        assert report.peak_memory >= 8_000_000
+        assert any(
+            stack.startswith("worker;") and stack.endswith("_allocate_and_wait")
+            for stack in report.stacks
+        )
+        assert report.samples == sum(report.stacks.values())
+        assert current_session() is None
+        redis_service.setex.assert_called_once()
+        assert redis_service.setex.call_args[0][0] == f"audio:profile:{report.profile_id}"
+
+    async def test_executor_skips_profiling_without_session(self):
+        executor = ExecutorService(max_workers=0)
+
+        with patch("app.services.executor.profile_call") as profile_call:
+            assert await executor.run(_allocate_and_wait) == 1_000_000.0
+
+        profile_call.assert_not_called()
+
+    async def test_authorize(self, redis_service):
+        profiler = ProfilerService(redis_service)
+        assert not profiler.authorize("secret")
+
+        with patch("app.services.profiler.settings.PROFILING_ENABLED", True):
+            assert not profiler.authorize("secret")
+            with patch("app.services.profiler.settings.PROFILING_TOKEN", "secret"):
+                assert profiler.authorize("secret")
+                assert not profiler.authorize("guess")
+                assert not profiler.authorize(None)